@@ -1,32 +1,89 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-
-app = FastAPI(
-    title="Jewelry ERP API",
-    description="Modern jewelry manufacturing management system API",
-    version="1.0.0"
-)
-
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Configure this properly for production
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-@app.get("/")
+"""Vercel serverless entry point for the full API.
+
+A cold start imports only FastAPI and the middleware. Each router, and
+with the first one Prisma, is imported on the first request under its
+prefix, and the database connects on the first request that needs it.
+Both are kept for the warm invocations that follow.
+"""
+import os
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+# An instance handles one request at a time, so a small pool is enough
+os.environ.setdefault("DB_POOL_SIZE", "2")
+
+from fastapi.responses import JSONResponse, PlainTextResponse
+from application import ROUTERS, create_app, include_router, health_status, metrics_text
+
+# The schema (read by /docs) needs every router
+ALL_ROUTER_PATHS = ("/openapi.json",)
+
+# The order event stream only carries changes made by the instance a client
+# is connected to, and each serverless invocation is its own short-lived
+# instance, so it is served by the long-running backend (main.py) only
+UNSUPPORTED_PATHS = ("/api/orders/events",)
+
+_loaded = set()
+
+def load_routers(path: str) -> bool:
+    """Include the routers serving path; True when path needs the database"""
+    needs_db = False
+    for name, prefix in ROUTERS:
+        if path in ALL_ROUTER_PATHS or path == prefix or path.startswith(prefix + "/"):
+            if name not in _loaded:
+                include_router(app, name, prefix)
+                _loaded.add(name)
+            needs_db = path not in ALL_ROUTER_PATHS
+    return needs_db
+
+async def connect():
+    from database import ensure_connected
+    
+    # Instruments the client for query stats whenever it (re)connects
+    await ensure_connected()
+
+class LazyRouterMiddleware:
+    """Imports routers and connects the database on first use"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in UNSUPPORTED_PATHS:
+            response = JSONResponse({"detail": "Not available on the serverless deployment"}, status_code=501)
+            await response(scope, receive, send)
+            return
+        if scope["type"] == "http" and load_routers(scope["path"]):
+            try:
+                await connect()
+            except Exception as e:
+                response = JSONResponse({"detail": f"Database unavailable: {e}"}, status_code=503)
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+# Inside metrics and query stats, so a cold request's loading is measured
+app = create_app(inner_middleware=[LazyRouterMiddleware])
+
+@app.get("/api")
 async def root():
     return {"message": "Jewelry ERP API is running"}
 
-@app.get("/health")
+@app.get("/api/health")
 async def health_check():
-    return {
-        "status": "healthy",
-        "database": "not configured yet",
-        "provider": "Neon PostgreSQL"
-    }
+    try:
+        await connect()
+    except Exception:
+        # Reported as disconnected below
+        pass
+    return await health_status()
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of request, query and cache metrics"""
+    return PlainTextResponse(await metrics_text(), media_type="text/plain; version=0.0.4")
 
 # This is required for Vercel
-handler = app
\ No newline at end of file
+handler = app
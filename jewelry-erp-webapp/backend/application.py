@@ -0,0 +1,147 @@
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+import importlib
+import os
+import re
+
+from serialization import FastJSONResponse
+from query_stats import QueryStatsMiddleware
+from metrics import MetricsMiddleware, Gauge, registry
+from read_routing import ReadRoutingMiddleware, replica_state
+
+# App construction shared by main.py (long-running server) and api/index.py
+# (serverless). Nothing here imports Prisma, so building an app is cheap;
+# the database comes in with the first router.
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:  # Fall back to gzip only
+    BrotliMiddleware = None
+
+# Responses smaller than this are sent uncompressed
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+# Event streams must reach clients as they are written, so skip compression
+UNCOMPRESSED_PATHS = [r"/events$"]
+
+# Router modules and the path prefix each one serves
+ROUTERS = [
+    ("orders", "/api/orders"),
+    ("issues", "/api/issues"),
+    ("receipts", "/api/receipts"),
+    ("karigars", "/api/karigars"),
+    ("processes", "/api/processes"),
+    ("designs", "/api/designs"),
+    ("stock", "/api/stock"),
+    ("cache", "/api/cache"),
+]
+
+registry.register(Gauge(
+    "db_replica_lag_seconds", "Read replica lag at the last check (NaN when unknown)",
+    lambda: replica_state.lag if replica_state.lag is not None else float("nan")
+))
+registry.register(Gauge(
+    "db_replica_reads_total", "Requests whose reads were served by the replica",
+    lambda: replica_state.replica_reads, kind="counter"
+))
+registry.register(Gauge(
+    "db_replica_fallbacks_total", "Reads sent to the primary because the replica lagged or failed",
+    lambda: replica_state.fallbacks, kind="counter"
+))
+
+class StreamingSafeGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that passes UNCOMPRESSED_PATHS through untouched"""
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and any(re.search(path, scope["path"]) for path in UNCOMPRESSED_PATHS):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+def create_app(lifespan=None, inner_middleware=()) -> FastAPI:
+    """The API app with its middleware, before any router is included.
+    
+    inner_middleware classes run closest to the routes, inside metrics and
+    query stats.
+    """
+    app = FastAPI(
+        title="Jewelry ERP API",
+        description="Modern jewelry manufacturing management system API",
+        version="1.0.0",
+        lifespan=lifespan,
+        default_response_class=FastJSONResponse
+    )
+    for middleware in inner_middleware:
+        app.add_middleware(middleware)
+    
+    # Response compression: brotli for clients that accept it, gzip otherwise
+    if BrotliMiddleware is not None:
+        app.add_middleware(
+            BrotliMiddleware,
+            quality=4,
+            minimum_size=COMPRESSION_MIN_SIZE,
+            gzip_fallback=True,
+            excluded_handlers=UNCOMPRESSED_PATHS
+        )
+    else:
+        app.add_middleware(StreamingSafeGZipMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+    
+    # Per-request query counts and timings (Server-Timing, X-DB-Queries)
+    app.add_middleware(QueryStatsMiddleware)
+    
+    # Prometheus request metrics, served at /metrics
+    app.add_middleware(MetricsMiddleware)
+    
+    # GET requests read from DATABASE_REPLICA_URL when set (X-DB-Route)
+    app.add_middleware(ReadRoutingMiddleware)
+    
+    # CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://localhost:3000", "https://*.vercel.app"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "X-Total-Count", "X-Total-Is-Estimate", "Server-Timing", "X-DB-Queries", "X-DB-Route"],
+    )
+    return app
+
+def include_router(app: FastAPI, name: str, prefix: str):
+    """Import routers/<name>.py and mount it at prefix"""
+    router = importlib.import_module(f"routers.{name}").router
+    # Routers that declare their own prefix (orders) are mounted as they are
+    app.include_router(router, prefix="" if router.prefix else prefix, tags=[name])
+    # Schema generated before this router was added would leave it out
+    app.openapi_schema = None
+
+async def health_status() -> dict:
+    try:
+        from database import check_db_connection
+        db_healthy = await check_db_connection()
+        return {
+            "status": "healthy" if db_healthy else "unhealthy",
+            "database": "connected" if db_healthy else "disconnected",
+            "provider": "Neon PostgreSQL",
+            "replica": replica_state.stats()
+        }
+    except Exception as e:
+        return {
+            "status": "unhealthy",
+            "database": "disconnected",
+            "provider": "Neon PostgreSQL",
+            "error": str(e)
+        }
+
+async def metrics_text() -> str:
+    """Prometheus text exposition of request, query and cache metrics"""
+    from database import get_primary_db
+    
+    body = registry.render()
+    try:
+        # Connection pool gauges from the primary's Prisma query engine
+        body += await (await get_primary_db()).get_metrics(format="prometheus")
+    except Exception as e:
+        # The request metrics above are still worth serving without the pool's
+        print(f"❌ Failed to read query engine metrics: {e}")
+    return body
@@ -0,0 +1,680 @@
+"""Benchmark the hot API endpoints and compare against a saved baseline.
+
+Run against a local Postgres loaded with generate_data.py (the write
+scenarios add issues and receipts and move order statuses, so never point
+this at real data):
+
+    python generate_data.py --orders 100000 --issues 200000
+    python benchmark.py --update-baseline        # record benchmark-baseline.json
+    python benchmark.py                          # compare; exits 1 on regression
+
+Unless --url is given, the app in main.py is started with uvicorn on a free
+port. Each endpoint gets --requests requests from --concurrency concurrent
+clients. The run reports p50/p95/p99 latency and throughput per endpoint.
+A regression is a p95 more than --threshold above the baseline, or a
+throughput more than --threshold below it.
+
+The karigar balance scenarios aggregate every issue and receipt, so size
+them with the dataset they are meant for, 500 karigars and about 5M
+transactions (each issue brings about 1.5 receipts):
+
+    python generate_data.py --karigars 500 --issues 2000000
+    python benchmark.py --only karigar_balances karigar_balances_as_of karigar_balance
+
+    python benchmark.py --encode --encode-rows 100
+
+measures, without a database, the per-row cost of encoding a page of
+issues with their karigar and process: through response_model validation,
+jsonable_encoder and json as FastAPI does by default, and through
+FastJSONResponse. It fails if the fast path is not the cheaper one.
+
+    python benchmark.py --pool-sizes 5 10 20 40 --concurrency 50
+
+starts the app once per DB_POOL_SIZE and reports read throughput for each,
+to find where a bigger pool stops paying off.
+
+    python generate_data.py --orders 1000000
+    python benchmark.py --dashboard
+
+compares, in process, the dashboard as first written (one COUNT per
+headline number and per status, in sequence) with the current endpoint,
+reporting database round trips and latency for each over --dashboard-runs.
+
+    python benchmark.py --import-throughput --import-rows 500
+
+creates issues through the bulk endpoint, then times an end-of-day sheet
+of --import-rows receipts (several per issue) through POST
+/api/receipts/import: once as a JSON dry run, once as JSON and once as CSV.
+It reports rows per second and fails if any row is rejected.
+
+    python benchmark.py --number-allocation --allocation-requests 200
+
+reserves --allocation-requests order, issue and receipt numbers at once
+through POST /api/<documents>/generate/number. It reports reservations per
+second for each type and fails on an error or a number handed out twice.
+
+    python generate_data.py --orders 1000000
+    python benchmark.py --export-memory --export-format ndjson
+
+starts the app, streams the whole /api/orders/export and samples the
+resident memory of the server and its query engine while it does. It
+reports rows, throughput and peak RSS, and fails if the peak grows more
+than --rss-budget-mb over the idle server.
+"""
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+# Statuses the status-update scenario moves orders between
+STATUS_CYCLE = [
+    ("IN_PRODUCTION", "FACTORY"),
+    ("POLISHING_PENDING", "KARIGAR"),
+    ("QUALITY_CHECK_PENDING", "FACTORY"),
+]
+
+# Scenarios the pool-size sweep runs; writes would change the data between runs
+READ_SCENARIOS = [
+    "order_list", "order_list_page_5", "order_search", "order_detail", "dashboard",
+    "karigar_balances", "karigar_balances_as_of", "karigar_balance"
+]
+
+SEARCH_TERMS = ["Shah", "Patel", "Jewellers", "Mehta", "ORD-2", "Gold"]
+
+class Scenario:
+    """One endpoint under test: builds the method, path and body of the n-th request"""
+    
+    def __init__(self, name: str, build: Callable[[int], Tuple[str, str, Optional[dict]]], expect: int = 200):
+        self.name = name
+        self.build = build
+        self.expect = expect
+
+async def wait_until_healthy(client: httpx.AsyncClient, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            response = await client.get("/health")
+            if response.status_code == 200 and response.json().get("status") == "healthy":
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError("API did not become healthy")
+
+def start_server(env: Optional[Dict[str, str]] = None) -> Tuple[subprocess.Popen, str]:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env={**os.environ, **(env or {})}
+    )
+    return process, f"http://127.0.0.1:{port}"
+
+@asynccontextmanager
+async def api_client(args, connections: Optional[int] = None, env: Optional[Dict[str, str]] = None):
+    """A client for --url, or for main:app started on a free port for the block"""
+    server = None
+    url = args.url
+    if not url:
+        server, url = start_server(env)
+    connections = connections or args.concurrency
+    try:
+        limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+        async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+            await wait_until_healthy(client)
+            yield client
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+async def load_fixtures(client: httpx.AsyncClient, rng: random.Random) -> dict:
+    """Ids the scenarios sample from, read through the API itself"""
+    orders = (await client.get("/api/orders/", params={"page_size": 100, "count": "none"})).json()["orders"]
+    karigars = (await client.get("/api/karigars/")).json()
+    processes = (await client.get("/api/processes/")).json()
+    if not orders or not karigars or not processes:
+        raise RuntimeError("Load the synthetic dataset first (python generate_data.py)")
+    return {
+        "order_ids": [order["id"] for order in orders],
+        "karigar_ids": [karigar["id"] for karigar in karigars],
+        "process_ids": [process["id"] for process in processes],
+        "issue_ids": [],
+        "run": f"{datetime.now():%Y%m%d%H%M%S}-{rng.randrange(10000):04d}"
+    }
+
+def build_scenarios(fixtures: dict, rng: random.Random) -> List[Scenario]:
+    order_ids = fixtures["order_ids"]
+    karigar_ids = fixtures["karigar_ids"]
+    # Half a year back lands inside the generated period and cuts it mid-way
+    as_of = (datetime.now() - timedelta(days=182)).replace(microsecond=0).isoformat()
+    run = fixtures["run"]
+    
+    def issue_body(n: int):
+        return {
+            "issue_no": f"BENCH-{run}-{n}",
+            "karigar_id": rng.choice(fixtures["karigar_ids"]),
+            "process_id": rng.choice(fixtures["process_ids"]),
+            "pieces": 10,
+            "gross_weight": 50.0,
+            "stone_weight": 2.0,
+            "net_weight": 48.0
+        }
+    
+    def receipt_body(n: int):
+        # Small lots against issues made by create_issue stay within tolerance
+        return {
+            "receipt_no": f"BENCH-{run}-{n}",
+            "issue_id": fixtures["issue_ids"][n % len(fixtures["issue_ids"])],
+            "pieces": 1,
+            "gross_weight": 0.5,
+            "stone_weight": 0.0,
+            "wastage_weight": 0.01
+        }
+    
+    def status_body(n: int):
+        status, location = STATUS_CYCLE[n % len(STATUS_CYCLE)]
+        return {"newStatus": status, "location": location, "comments": "benchmark"}
+    
+    return [
+        Scenario("order_list", lambda n: ("GET", "/api/orders/", None)),
+        Scenario("order_list_page_5", lambda n: ("GET", "/api/orders/?page=5&page_size=20", None)),
+        Scenario("order_search", lambda n: ("GET", f"/api/orders/search?q={SEARCH_TERMS[n % len(SEARCH_TERMS)]}", None)),
+        Scenario("order_detail", lambda n: ("GET", f"/api/orders/{order_ids[n % len(order_ids)]}", None)),
+        Scenario("dashboard", lambda n: ("GET", "/api/orders/dashboard/stats", None)),
+        Scenario("karigar_balances", lambda n: ("GET", "/api/karigars/balances", None)),
+        Scenario("karigar_balances_as_of", lambda n: ("GET", f"/api/karigars/balances?as_of={as_of}", None)),
+        Scenario("karigar_balance", lambda n: ("GET", f"/api/karigars/{karigar_ids[n % len(karigar_ids)]}/balance", None)),
+        Scenario("create_issue", lambda n: ("POST", "/api/issues/", issue_body(n))),
+        Scenario("create_receipt", lambda n: ("POST", "/api/receipts/", receipt_body(n))),
+        Scenario("order_status_update", lambda n: ("PUT", f"/api/orders/{order_ids[n % len(order_ids)]}/status", status_body(n))),
+    ]
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, requests: int, concurrency: int, fixtures: dict) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+    
+    async def worker():
+        nonlocal errors
+        for n in counter:
+            method, path, body = scenario.build(n)
+            started = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != scenario.expect:
+                errors += 1
+            elif scenario.name == "create_issue":
+                fixtures["issue_ids"].append(response.json()["id"])
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        **latency_summary(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 1)
+    }
+
+def latency_summary(latencies: List[float]) -> dict:
+    cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {"p50_ms": round(cuts[49], 2), "p95_ms": round(cuts[94], 2), "p99_ms": round(cuts[98], 2)}
+
+async def connected_client():
+    """A Prisma client for the in-process modes, with query counting installed"""
+    from database import create_client
+    from query_stats import instrument_client
+    
+    db = create_client()
+    await db.connect()
+    instrument_client(db)
+    return db
+
+def find_regressions(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        if result["p95_ms"] > before["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {before['p95_ms']}ms -> {result['p95_ms']}ms")
+        if result["throughput_rps"] < before["throughput_rps"] * (1 - threshold):
+            regressions.append(f"{name}: throughput {before['throughput_rps']} -> {result['throughput_rps']} req/s")
+        if result["errors"] > before.get("errors", 0):
+            regressions.append(f"{name}: {result['errors']} errors (baseline {before.get('errors', 0)})")
+    return regressions
+
+async def benchmark(args) -> int:
+    if args.encode:
+        costs = await encode_cost(args.encode_rows, 200)
+        print(
+            f"Encode cost per row: {costs['response_model']:.1f}us through response_model, "
+            f"{costs['fast_path']:.1f}us through FastJSONResponse "
+            f"({costs['response_model'] / costs['fast_path']:.1f}x)"
+        )
+        return 1 if costs["fast_path"] >= costs["response_model"] else 0
+    
+    if args.pool_sizes:
+        return await pool_size_sweep(args)
+    
+    if args.dashboard:
+        return await dashboard_comparison(args)
+    
+    if args.import_throughput:
+        return await import_throughput(args)
+    
+    if args.number_allocation:
+        return await number_allocation(args)
+    
+    if args.export_memory:
+        return await export_memory(args)
+    
+    async with api_client(args) as client:
+        rng = random.Random(args.seed)
+        fixtures = await load_fixtures(client, rng)
+        scenarios = build_scenarios(fixtures, rng)
+        if args.only:
+            scenarios = [scenario for scenario in scenarios if scenario.name in args.only]
+        
+        results = {}
+        for scenario in scenarios:
+            if scenario.name == "create_receipt" and not fixtures["issue_ids"]:
+                print(f"  {scenario.name}: skipped (needs create_issue in the same run)")
+                continue
+            # A short warm-up so connection setup and caches are not measured
+            await run_scenario(client, scenario, min(args.requests, args.concurrency * 2), args.concurrency, fixtures)
+            results[scenario.name] = await run_scenario(client, scenario, args.requests, args.concurrency, fixtures)
+            result = results[scenario.name]
+            print(
+                f"  {scenario.name}: p50 {result['p50_ms']}ms  p95 {result['p95_ms']}ms  "
+                f"p99 {result['p99_ms']}ms  {result['throughput_rps']} req/s  errors {result['errors']}"
+            )
+    
+    report = {
+        "createdAt": datetime.now().isoformat(),
+        "config": {"requests": args.requests, "concurrency": args.concurrency, "seed": args.seed},
+        "endpoints": results
+    }
+    
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    
+    if args.update_baseline:
+        with open(args.baseline, "w") as output:
+            json.dump(report, output, indent=2)
+        print(f"✅ Baseline written to {args.baseline}")
+        return 0
+    
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline first")
+        return 0
+    
+    with open(args.baseline) as source:
+        baseline = json.load(source)["endpoints"]
+    regressions = find_regressions(results, baseline, args.threshold)
+    if regressions:
+        print("❌ Regressions beyond threshold:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    
+    print("✅ No regressions beyond threshold")
+    return 0
+
+async def pool_size_sweep(args) -> int:
+    """Read throughput of the app started with each DB_POOL_SIZE in turn"""
+    sweep = {}
+    for pool_size in args.pool_sizes:
+        async with api_client(args, env={"DB_POOL_SIZE": str(pool_size)}) as client:
+            rng = random.Random(args.seed)
+            fixtures = await load_fixtures(client, rng)
+            scenarios = [
+                scenario for scenario in build_scenarios(fixtures, rng)
+                if scenario.name in (args.only or READ_SCENARIOS)
+            ]
+            print(f"DB_POOL_SIZE={pool_size}")
+            results = {}
+            for scenario in scenarios:
+                await run_scenario(client, scenario, min(args.requests, args.concurrency * 2), args.concurrency, fixtures)
+                results[scenario.name] = await run_scenario(client, scenario, args.requests, args.concurrency, fixtures)
+                result = results[scenario.name]
+                print(f"  {scenario.name}: p95 {result['p95_ms']}ms  {result['throughput_rps']} req/s  errors {result['errors']}")
+            sweep[str(pool_size)] = results
+    
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump({
+                "createdAt": datetime.now().isoformat(),
+                "config": {"requests": args.requests, "concurrency": args.concurrency, "seed": args.seed},
+                "poolSizes": sweep
+            }, output, indent=2)
+    return 0
+
+async def legacy_dashboard(db):
+    """The dashboard queries as first written: one COUNT after another"""
+    from schemas.orders import OrderStatus
+    
+    closed = {"not_in": [OrderStatus.DELIVERED.value, OrderStatus.CANCELLED.value]}
+    await db.order.count()
+    await db.order.count(where={"currentStatus": closed})
+    await db.order.count(where={"currentStatus": OrderStatus.DELIVERED.value})
+    await db.order.count(where={"currentStatus": OrderStatus.ON_HOLD.value})
+    await db.order.count(where={"urgencyLevel": "URGENT", "currentStatus": closed})
+    await db.order.count(where={"deliveryDate": {"lt": datetime.now()}, "currentStatus": closed})
+    for status in OrderStatus:
+        await db.order.count(where={"currentStatus": status.value})
+
+async def dashboard_comparison(args) -> int:
+    """Round trips and latency of the sequential-COUNT dashboard against the current one"""
+    from query_stats import track_queries
+    from routers.orders import get_order_dashboard
+    
+    db = await connected_client()
+    try:
+        report = {}
+        for name, build in (("sequential_counts", legacy_dashboard), ("current", get_order_dashboard)):
+            latencies = []
+            round_trips = 0
+            for _ in range(args.dashboard_runs):
+                with track_queries() as stats:
+                    started = time.perf_counter()
+                    await build(db=db)
+                    latencies.append((time.perf_counter() - started) * 1000)
+                round_trips = stats.count
+            report[name] = {"round_trips": round_trips, **latency_summary(latencies)}
+            result = report[name]
+            print(f"  {name}: {round_trips} round trips  p50 {result['p50_ms']}ms  p95 {result['p95_ms']}ms")
+    finally:
+        await db.disconnect()
+    
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump({"createdAt": datetime.now().isoformat(), "dashboard": report}, output, indent=2)
+    return 0
+
+async def import_throughput(args) -> int:
+    """Rows per second through the receipt import, validated only and written"""
+    rows_per_issue = 5
+    issue_count = max(1, args.import_rows // rows_per_issue)
+    
+    async with api_client(args) as client:
+        karigars = (await client.get("/api/karigars/")).json()
+        processes = (await client.get("/api/processes/")).json()
+        if not karigars or not processes:
+            raise RuntimeError("Load the seed data first (python seed.py)")
+        
+        # Fresh issues with room for every written run of the sheet
+        issue_ids = []
+        for start in range(0, issue_count, 500):
+            response = await client.post("/api/issues/bulk", json={"issues": [
+                {
+                    "karigar_id": karigars[n % len(karigars)]["id"],
+                    "process_id": processes[n % len(processes)]["id"],
+                    "pieces": 10,
+                    "gross_weight": 100.0,
+                    "stone_weight": 0.0,
+                    "net_weight": 100.0
+                }
+                for n in range(start, min(start + 500, issue_count))
+            ]})
+            issue_ids.extend(result["issue_id"] for result in response.json()["results"] if result["success"])
+        if not issue_ids:
+            print("❌ Could not create issues for the import")
+            return 1
+        
+        sheet = [
+            {
+                "issue_id": issue_ids[n % len(issue_ids)],
+                "pieces": 1,
+                "gross_weight": 1.0,
+                "stone_weight": 0.0,
+                "wastage_weight": 0.01
+            }
+            for n in range(args.import_rows)
+        ]
+        csv_sheet = io.StringIO()
+        writer = csv.DictWriter(csv_sheet, fieldnames=list(sheet[0]))
+        writer.writeheader()
+        writer.writerows(sheet)
+        
+        report = {}
+        failures = []
+        for name, params, content, content_type in (
+            ("json_dry_run", {"dry_run": "true"}, json.dumps(sheet), "application/json"),
+            ("json", {}, json.dumps(sheet), "application/json"),
+            ("csv", {}, csv_sheet.getvalue(), "text/csv"),
+        ):
+            started = time.perf_counter()
+            response = await client.post(
+                "/api/receipts/import", params=params, content=content, headers={"content-type": content_type}
+            )
+            elapsed = time.perf_counter() - started
+            if response.status_code != 200:
+                failures.append(f"{name}: {response.status_code} {response.text[:200]}")
+                continue
+            result = response.json()
+            if result["rejected"]:
+                failures.append(f"{name}: {result['rejected']} rows rejected")
+            report[name] = {
+                "rows": args.import_rows,
+                "accepted": result["accepted"],
+                "seconds": round(elapsed, 3),
+                "rows_per_s": round(args.import_rows / elapsed, 1)
+            }
+            print(f"  {name}: {args.import_rows} rows in {elapsed * 1000:.0f}ms  {report[name]['rows_per_s']} rows/s")
+    
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump({"createdAt": datetime.now().isoformat(), "import": report}, output, indent=2)
+    for failure in failures:
+        print(f"❌ {failure}")
+    return 1 if failures else 0
+
+async def number_allocation(args) -> int:
+    """Concurrent number reservations must all succeed and never repeat"""
+    endpoints = [
+        ("order", "/api/orders/generate/number", "orderNo"),
+        ("issue", "/api/issues/generate/number", "issue_number"),
+        ("receipt", "/api/receipts/generate/number", "receipt_number"),
+    ]
+    
+    report = {}
+    failures = []
+    async with api_client(args, connections=args.allocation_requests) as client:
+        for name, path, key in endpoints:
+            started = time.perf_counter()
+            responses = await asyncio.gather(*(client.post(path) for _ in range(args.allocation_requests)))
+            elapsed = time.perf_counter() - started
+            
+            numbers = [response.json()[key] for response in responses if response.status_code == 200]
+            errors = len(responses) - len(numbers)
+            duplicates = len(numbers) - len(set(numbers))
+            report[name] = {
+                "requests": args.allocation_requests,
+                "errors": errors,
+                "duplicates": duplicates,
+                "seconds": round(elapsed, 3),
+                "rps": round(args.allocation_requests / elapsed, 1)
+            }
+            print(
+                f"  {name}: {args.allocation_requests} at once in {elapsed * 1000:.0f}ms  "
+                f"{report[name]['rps']} req/s  {errors} errors  {duplicates} duplicates"
+            )
+            if errors:
+                failures.append(f"{name}: {errors} reservations failed")
+            if duplicates:
+                failures.append(f"{name}: {duplicates} numbers handed out twice")
+    
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump({"createdAt": datetime.now().isoformat(), "allocation": report}, output, indent=2)
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ Every reserved number is unique")
+    return 1 if failures else 0
+
+def tree_rss_mb(pid: int) -> float:
+    """Resident memory of a process and its children (the Prisma query engine)"""
+    total = 0.0
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    total += int(line.split()[1]) / 1024
+        with open(f"/proc/{pid}/task/{pid}/children") as children:
+            for child in children.read().split():
+                total += tree_rss_mb(int(child))
+    except FileNotFoundError:
+        pass
+    return total
+
+async def export_memory(args) -> int:
+    """Peak server memory while a whole table streams out"""
+    if args.url:
+        print("❌ --export-memory watches the memory of a server it starts itself; drop --url")
+        return 1
+    
+    server, url = start_server()
+    idle = peak = 0.0
+    rows = size = 0
+    elapsed = 0.0
+    try:
+        async with httpx.AsyncClient(base_url=url, timeout=None) as client:
+            await wait_until_healthy(client)
+            idle = peak = tree_rss_mb(server.pid)
+            
+            async def sample():
+                nonlocal peak
+                while True:
+                    peak = max(peak, tree_rss_mb(server.pid))
+                    await asyncio.sleep(0.05)
+            
+            sampler = asyncio.create_task(sample())
+            started = time.perf_counter()
+            try:
+                async with client.stream("GET", "/api/orders/export", params={"format": args.export_format}) as response:
+                    if response.status_code != 200:
+                        print(f"❌ Export failed: {response.status_code}")
+                        return 1
+                    async for chunk in response.aiter_bytes():
+                        size += len(chunk)
+                        rows += chunk.count(b"\n")
+            finally:
+                elapsed = time.perf_counter() - started
+                sampler.cancel()
+    finally:
+        server.terminate()
+        server.wait()
+    
+    if args.export_format == "csv":
+        rows -= 1  # Header
+    growth = peak - idle
+    print(
+        f"  {rows} rows ({size / 1e6:.0f}MB {args.export_format}) in {elapsed:.1f}s  "
+        f"{rows / elapsed:.0f} rows/s  RSS {idle:.0f}MB idle, {peak:.0f}MB peak (+{growth:.0f}MB)"
+    )
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump({"createdAt": datetime.now().isoformat(), "export": {
+                "format": args.export_format,
+                "rows": rows,
+                "bytes": size,
+                "seconds": round(elapsed, 3),
+                "idleRssMb": round(idle, 1),
+                "peakRssMb": round(peak, 1)
+            }}, output, indent=2)
+    if growth > args.rss_budget_mb:
+        print(f"❌ RSS grew {growth:.0f}MB while exporting (budget {args.rss_budget_mb}MB)")
+        return 1
+    return 0
+
+async def encode_cost(rows: int, repeats: int) -> Dict[str, float]:
+    """Microseconds per row to encode a page of issues, validated and direct"""
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+    from prisma.models import Issue, Karigar, Process
+    from schemas.issue import IssueResponse
+    from serialization import FastJSONResponse
+    
+    now = datetime.now()
+    karigar = Karigar(
+        id="kar-1", code="K001", name="Ramesh Soni", contact="98200 00000", address="Zaveri Bazaar",
+        active=True, createdAt=now, updatedAt=now
+    )
+    process = Process(id="proc-1", name="Setting", description="Stone setting", active=True)
+    page = [
+        Issue(
+            id=f"iss-{n}", issueNo=f"ISS-{now:%Y%m%d}-{n:03d}", issueDate=now,
+            karigarId=karigar.id, processId=process.id, designId=None,
+            pieces=10, grossWeight=50.5, stoneWeight=2.25, netWeight=48.25, remarks=None,
+            status="Pending", receivedGross=0.0, receivedNet=0.0, receivedWastage=0.0,
+            createdAt=now, updatedAt=now, karigar=karigar, process=process
+        )
+        for n in range(rows)
+    ]
+    field = create_response_field(name="Response_get_issues", type_=List[IssueResponse])
+    
+    async def validated():
+        # What FastAPI does with a returned list and response_model
+        content = await serialize_response(field=field, response_content=page, is_coroutine=True)
+        return JSONResponse(content).body
+    
+    async def direct():
+        return FastJSONResponse(page).body
+    
+    costs = {}
+    for name, encode in (("response_model", validated), ("fast_path", direct)):
+        await encode()
+        started = time.perf_counter()
+        for _ in range(repeats):
+            await encode()
+        costs[name] = (time.perf_counter() - started) / (repeats * rows) * 1e6
+    return costs
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark hot API endpoints against a baseline")
+    parser.add_argument("--url", help="Benchmark a running API instead of starting main:app")
+    parser.add_argument("--requests", type=int, default=500, help="Measured requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent clients")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative slowdown before failing")
+    parser.add_argument("--baseline", default="benchmark-baseline.json", help="Baseline file to compare with or write")
+    parser.add_argument("--update-baseline", action="store_true", help="Write this run as the new baseline")
+    parser.add_argument("--output", help="Also write this run's results to a file")
+    parser.add_argument("--only", nargs="*", help="Run only these scenarios")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for sampled ids and bodies")
+    parser.add_argument("--encode", action="store_true", help="Only measure per-row response encoding cost")
+    parser.add_argument("--encode-rows", type=int, default=100, help="Rows per page encoded by --encode")
+    parser.add_argument("--pool-sizes", type=int, nargs="+", help="Compare read throughput across these DB_POOL_SIZE values")
+    parser.add_argument("--dashboard", action="store_true", help="Only compare the sequential-COUNT dashboard with the current one")
+    parser.add_argument("--dashboard-runs", type=int, default=20, help="Dashboard builds measured per variant")
+    parser.add_argument("--import-throughput", action="store_true", help="Only measure receipt import throughput")
+    parser.add_argument("--import-rows", type=int, default=500, help="Rows in the sheet --import-throughput imports")
+    parser.add_argument("--number-allocation", action="store_true", help="Only check concurrent document number reservations")
+    parser.add_argument("--allocation-requests", type=int, default=200, help="Reservations fired at once per document type")
+    parser.add_argument("--export-memory", action="store_true", help="Only measure server memory while streaming the order export")
+    parser.add_argument("--export-format", choices=["ndjson", "csv"], default="ndjson", help="Format --export-memory streams")
+    parser.add_argument("--rss-budget-mb", type=float, default=200, help="Allowed RSS growth while exporting")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(benchmark(parse_args())))
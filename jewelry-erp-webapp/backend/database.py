@@ -1,18 +1,124 @@
 from prisma import Prisma
+from typing import Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, quote
 import asyncio
 import os
 
-# Global database instance
-db = Prisma()
+from read_routing import use_replica
+from query_stats import instrument_client
 
-async def connect_db():
-    """Connect to the Neon database"""
+# Connection pool settings, applied as Prisma connection-string parameters
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+# Seconds a query waits for a free pooled connection
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "10"))
+# Seconds allowed to open a new connection (Neon compute may be waking up)
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "15"))
+# Seconds Postgres lets a single statement run before cancelling it (0: no limit)
+DB_STATEMENT_TIMEOUT = int(os.getenv("DB_STATEMENT_TIMEOUT", "30"))
+# Seconds the engine waits on a silent connection before dropping it; keep it
+# above DB_STATEMENT_TIMEOUT so the server cancels a slow statement first
+DB_SOCKET_TIMEOUT = int(os.getenv("DB_SOCKET_TIMEOUT", "60"))
+# Connections opened at startup so the first requests do not pay for them
+DB_WARM_CONNECTIONS = int(os.getenv("DB_WARM_CONNECTIONS", "2"))
+# Use DIRECT_URL instead of the pooled DATABASE_URL for the API
+DB_USE_DIRECT_URL = os.getenv("DB_USE_DIRECT_URL", "false").lower() == "true"
+
+def database_url(
+    direct: bool = False,
+    pool_size: int = DB_POOL_SIZE,
+    replica: bool = False,
+    statement_timeout: int = DB_STATEMENT_TIMEOUT
+) -> Optional[str]:
+    """Connection string with the pool settings added.
+    
+    Parameters already present in the URL win. Neon's pooled endpoints
+    (host containing "-pooler") run PgBouncer in transaction mode, which
+    needs pgbouncer=true; DIRECT_URL goes straight to Postgres.
+    DATABASE_REPLICA_URL is a read replica of the same database.
+    
+    statement_timeout is set per connection through the startup options.
+    PgBouncer rejects those, so pooled connections get it from the role
+    instead (ALTER ROLE ... SET statement_timeout, see NEON_SETUP.md).
+    """
+    if replica:
+        url = os.getenv("DATABASE_REPLICA_URL")
+    else:
+        url = (os.getenv("DIRECT_URL") if direct else None) or os.getenv("DATABASE_URL")
+    if not url:
+        return None
+    
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    query.setdefault("connection_limit", str(pool_size))
+    query.setdefault("pool_timeout", str(DB_POOL_TIMEOUT))
+    query.setdefault("connect_timeout", str(DB_CONNECT_TIMEOUT))
+    query.setdefault("socket_timeout", str(DB_SOCKET_TIMEOUT))
+    if "-pooler" in (parts.hostname or ""):
+        query.setdefault("pgbouncer", "true")
+    else:
+        query.setdefault("options", f"-c statement_timeout={statement_timeout}s")
+    
+    return urlunsplit(parts._replace(query=urlencode(query, quote_via=quote)))
+
+def create_client(
+    direct: bool = False,
+    pool_size: int = DB_POOL_SIZE,
+    replica: bool = False,
+    statement_timeout: int = DB_STATEMENT_TIMEOUT
+) -> Prisma:
+    """Prisma client configured from the DB_* settings"""
+    url = database_url(direct, pool_size, replica, statement_timeout)
+    return Prisma(
+        datasource={"url": url} if url else None,
+        connect_timeout=DB_CONNECT_TIMEOUT
+    )
+
+# Global database instance shared by every router
+db = create_client(direct=DB_USE_DIRECT_URL)
+
+# Read replica for GET requests, when DATABASE_REPLICA_URL is set
+replica_db = create_client(replica=True) if os.getenv("DATABASE_REPLICA_URL") else None
+
+async def connect_db(replica: bool = True):
+    """Connect to the Neon database, and the read replica unless replica=False"""
     try:
         await db.connect()
+        instrument_client(db)
         print("✅ Connected to Neon PostgreSQL database successfully")
     except Exception as e:
         print(f"❌ Failed to connect to Neon database: {e}")
         raise
+    
+    if replica and replica_db is not None:
+        try:
+            await replica_db.connect()
+            instrument_client(replica_db)
+            print("✅ Connected to read replica")
+        except Exception as e:
+            # Reads stay on the primary until the lag monitor reaches the replica
+            print(f"❌ Failed to connect to read replica: {e}")
+
+_connect_lock = asyncio.Lock()
+
+async def ensure_connected() -> Prisma:
+    """Connect on first use and keep the connection for later requests.
+    
+    For serverless instances, which get no startup hook: a warm instance
+    reuses the connection opened by an earlier invocation. The replica is
+    left alone, since its lag monitor needs a long-running process.
+    """
+    if not db.is_connected():
+        async with _connect_lock:
+            if not db.is_connected():
+                await connect_db(replica=False)
+    return db
+
+async def warm_up_db(connections: int = DB_WARM_CONNECTIONS):
+    """Open pooled connections ahead of the first requests"""
+    # Overlapping queries make the engine open one connection each
+    connections = max(1, min(connections, DB_POOL_SIZE))
+    await asyncio.gather(*(db.query_raw("SELECT pg_sleep(0.05)") for _ in range(connections)))
+    print(f"✅ Warmed {connections} database connections")
 
 async def disconnect_db():
     """Disconnect from the database"""
@@ -21,9 +127,22 @@ async def disconnect_db():
         print("✅ Disconnected from Neon database")
     except Exception as e:
         print(f"❌ Error disconnecting from database: {e}")
+    
+    if replica_db is not None and replica_db.is_connected():
+        await replica_db.disconnect()
 
 async def get_db():
-    """Dependency to get database instance"""
+    """Dependency to get database instance.
+    
+    GET and HEAD requests that ReadRoutingMiddleware sent to the replica
+    get the replica client; everything else gets the primary.
+    """
+    if replica_db is not None and use_replica():
+        return replica_db
+    return db
+
+async def get_primary_db():
+    """Dependency for handlers that write even though they are GETs"""
     return db
 
 async def check_db_connection():
@@ -34,4 +153,4 @@ async def check_db_connection():
         return True
     except Exception as e:
         print(f"❌ Database health check failed: {e}")
-        return False
\ No newline at end of file
+        return False
@@ -0,0 +1,47 @@
+from fastapi import HTTPException
+from typing import Dict, Iterable, List, Optional, Sequence
+
+# Sparse fieldsets for list endpoints: `fields` picks scalar columns and
+# `expand` picks relations. The relations become the Prisma include, so
+# unrequested joins are never run; prisma-client-py has no per-query select,
+# so scalar columns are trimmed before serialization instead (the order list
+# reads only the requested columns with raw SQL, see services/order_list.py).
+
+def _split(value: str) -> List[str]:
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str], always: Iterable[str] = ("id",)) -> Optional[List[str]]:
+    """Requested scalar fields (plus the ones paging needs), or None for all"""
+    if fields is None:
+        return None
+    
+    requested = _split(fields)
+    unknown = [name for name in requested if name not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    
+    selected = list(always)
+    selected.extend(name for name in requested if name not in selected)
+    return selected
+
+def parse_expand(expand: Optional[str], allowed: Sequence[str], default: Sequence[str]) -> Dict[str, bool]:
+    """Prisma include for the requested relations; default when expand is omitted"""
+    if expand is None:
+        return {name: True for name in default}
+    
+    requested = _split(expand)
+    unknown = [name for name in requested if name not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown relations: {', '.join(unknown)}")
+    
+    return {name: True for name in requested}
+
+def project_rows(rows: list, fields: Optional[List[str]], include: Dict[str, bool], scalars: Sequence[str]) -> list:
+    """Trim rows to the selected fields (all scalars when None) and included relations.
+    
+    Prisma rows carry every relation of the model, None unless included;
+    those keys are left out rather than sent as nulls.
+    """
+    names = list(fields if fields is not None else scalars)
+    names.extend(name for name in include if name not in names)
+    return [{name: row.__dict__[name] for name in names} for row in rows]
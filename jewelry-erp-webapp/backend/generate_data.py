@@ -0,0 +1,443 @@
+"""Bulk-load a large synthetic dataset for sizing and load testing.
+
+    python generate_data.py --orders 1000000 --issues 2000000 --seed 42 --end 2026-01-01
+
+Orders move through the OrderStatus pipeline with a history row per step,
+issues get zero or more partial receipts with wastage, and every issue and
+receipt gets its stock register entry. Rows are inserted with create_many
+in batches, and the dashboard counters and stock balances are rebuilt at
+the end. Document numbers come from the normal allocator.
+
+It only loads a database with no orders, issues, receipts, register entries
+or allocated numbers, so ids cannot clash with an earlier run and numbering
+starts at 1 on each day. On such a database the same --seed and --end give
+the same rows and numbers; without --end the period ends now.
+"""
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+import argparse
+import asyncio
+import math
+import random
+import sys
+import time
+import uuid
+
+from database import create_client
+from seed import seed_master_data, KARIGARS
+from schemas.orders import OrderStatus, Location, ClientCategory, UrgencyLevel
+from services.document_numbers import allocate_document_numbers
+from services.issue_receipts import issue_status
+from services.order_counters import rebuild_order_counters
+from services.stock_ledger import stock_entry, rebuild_stock_ledger
+
+# Normal route of an order: status, where it is, and the karigar process
+# for steps done at a karigar
+PIPELINE: List[Tuple[OrderStatus, Location, Optional[str]]] = [
+    (OrderStatus.RECEIVED, Location.HEAD_OFFICE, None),
+    (OrderStatus.DESIGN_PENDING, Location.HEAD_OFFICE, None),
+    (OrderStatus.DESIGN_APPROVED, Location.HEAD_OFFICE, None),
+    (OrderStatus.CAD_PENDING, Location.HEAD_OFFICE, None),
+    (OrderStatus.CAD_COMPLETED, Location.HEAD_OFFICE, None),
+    (OrderStatus.CAM_PENDING, Location.HEAD_OFFICE, None),
+    (OrderStatus.CAM_COMPLETED, Location.HEAD_OFFICE, None),
+    (OrderStatus.WAX_PENDING, Location.HEAD_OFFICE, "Wax Model"),
+    (OrderStatus.WAX_COMPLETED, Location.HEAD_OFFICE, "Wax Model"),
+    (OrderStatus.DISPATCHED_TO_FACTORY, Location.FACTORY, None),
+    (OrderStatus.RECEIVED_AT_FACTORY, Location.FACTORY, None),
+    (OrderStatus.MATERIAL_ISSUED, Location.FACTORY, None),
+    (OrderStatus.IN_PRODUCTION, Location.FACTORY, None),
+    (OrderStatus.CASTING_PENDING, Location.KARIGAR, "Casting"),
+    (OrderStatus.CASTING_COMPLETED, Location.KARIGAR, "Casting"),
+    (OrderStatus.FILING_PENDING, Location.KARIGAR, "Filing"),
+    (OrderStatus.FILING_COMPLETED, Location.KARIGAR, "Filing"),
+    (OrderStatus.POLISHING_PENDING, Location.KARIGAR, "Polishing"),
+    (OrderStatus.POLISHING_COMPLETED, Location.KARIGAR, "Polishing"),
+    (OrderStatus.STONE_SETTING_PENDING, Location.KARIGAR, "Stone Setting"),
+    (OrderStatus.STONE_SETTING_COMPLETED, Location.KARIGAR, "Stone Setting"),
+    (OrderStatus.QUALITY_CHECK_PENDING, Location.FACTORY, None),
+    (OrderStatus.QUALITY_APPROVED, Location.FACTORY, None),
+    (OrderStatus.PRODUCTION_COMPLETED, Location.FACTORY, None),
+    (OrderStatus.DISPATCHED_TO_HEAD_OFFICE, Location.HEAD_OFFICE, None),
+    (OrderStatus.RECEIVED_AT_HEAD_OFFICE, Location.HEAD_OFFICE, None),
+    (OrderStatus.FINAL_INSPECTION, Location.HEAD_OFFICE, None),
+    (OrderStatus.READY_FOR_DELIVERY, Location.HEAD_OFFICE, None),
+    (OrderStatus.DELIVERED, Location.HEAD_OFFICE, None),
+]
+
+# Failing quality check sends an order back to polishing
+QUALITY_CHECK_STEP = [status for status, _, _ in PIPELINE].index(OrderStatus.QUALITY_CHECK_PENDING)
+REWORK_STEP = [status for status, _, _ in PIPELINE].index(OrderStatus.POLISHING_PENDING)
+
+CLIENT_CATEGORY_WEIGHTS = {
+    ClientCategory.RETAIL: 50,
+    ClientCategory.WHOLESALE: 30,
+    ClientCategory.ONLINE: 15,
+    ClientCategory.SAMPLE: 5,
+}
+
+URGENCY_WEIGHTS = {
+    UrgencyLevel.NORMAL: 80,
+    UrgencyLevel.URGENT: 15,
+    UrgencyLevel.RUSH: 5,
+}
+
+# Typical days from order to delivery, by urgency
+LEAD_DAYS = {
+    UrgencyLevel.NORMAL: 30,
+    UrgencyLevel.URGENT: 14,
+    UrgencyLevel.RUSH: 7,
+}
+
+CANCEL_RATE = 0.03
+HOLD_RATE = 0.02
+REWORK_RATE = 0.08
+ORDERS_PER_BAG = 40
+
+STONE_TYPES = ["Diamond", "Ruby", "Emerald", "Sapphire", "CZ", None]
+STONE_SIZES = ["0.5mm", "1mm", "1.5mm", "2mm", "3mm"]
+STONE_QUALITIES = ["VVS", "VS", "SI", "AAA", "AA"]
+FIRST_NAMES = ["Amit", "Priya", "Rahul", "Neha", "Vikram", "Anjali", "Karan", "Pooja", "Arjun", "Kavya"]
+LAST_NAMES = ["Shah", "Patel", "Mehta", "Jain", "Gupta", "Agarwal", "Desai", "Kapoor", "Rao", "Iyer"]
+SHOP_SUFFIXES = ["Jewellers", "Gold House", "Ornaments", "& Sons", "Diamonds"]
+
+class Generator:
+    """Deterministic row factory; every random draw comes from one seeded Random"""
+    
+    def __init__(self, seed: int, end: datetime, days: int, karigars: List, processes: List, designs: List):
+        self.rng = random.Random(seed)
+        self.end = end
+        self.start = end - timedelta(days=days)
+        self.karigars = karigars
+        self.processes = {process.name: process for process in processes}
+        self.designs = designs
+        # A few karigars get most of the work
+        self.karigar_weights = [1 / rank for rank in range(1, len(karigars) + 1)]
+        self.clients = [
+            f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)} {self.rng.choice(SHOP_SUFFIXES)}"
+            for _ in range(500)
+        ]
+    
+    def new_id(self) -> str:
+        return str(uuid.UUID(int=self.rng.getrandbits(128)))
+    
+    def pick(self, weights: dict):
+        return self.rng.choices(list(weights), weights=list(weights.values()))[0]
+    
+    def karigar(self):
+        return self.rng.choices(self.karigars, weights=self.karigar_weights)[0]
+    
+    def spread(self, index: int, count: int) -> datetime:
+        """index-th of count dates spread evenly, with jitter, over the period"""
+        span = (self.end - self.start).total_seconds()
+        return self.start + timedelta(seconds=span * (index + self.rng.random()) / count)
+    
+    def order_route(self, order_date: datetime, urgency: UrgencyLevel) -> List[Tuple[OrderStatus, Location, Optional[str], datetime]]:
+        """Statuses the order has passed through by the end of the period"""
+        lead = max(2.0, self.rng.gauss(LEAD_DAYS[urgency], LEAD_DAYS[urgency] / 4))
+        step_days = lead / (len(PIPELINE) - 1)
+        
+        route = []
+        step = 0
+        at = order_date
+        reworked = False
+        while at <= self.end:
+            status, location, process = PIPELINE[step]
+            route.append((status, location, process, at))
+            if step == len(PIPELINE) - 1:
+                break
+            
+            if self.rng.random() < CANCEL_RATE / len(PIPELINE):
+                route.append((OrderStatus.CANCELLED, location, None, at + timedelta(hours=1)))
+                break
+            
+            if step == QUALITY_CHECK_STEP and not reworked and self.rng.random() < REWORK_RATE:
+                reworked = True
+                at += timedelta(days=self.rng.expovariate(1 / step_days))
+                route.append((OrderStatus.REWORK_REQUIRED, Location.FACTORY, None, at))
+                step = REWORK_STEP
+            else:
+                step += 1
+            at += timedelta(days=self.rng.expovariate(1 / step_days))
+        
+        last_status, last_location, _, last_at = route[-1]
+        if last_status not in (OrderStatus.DELIVERED, OrderStatus.CANCELLED) and self.rng.random() < HOLD_RATE:
+            route.append((OrderStatus.ON_HOLD, last_location, None, min(self.end, last_at + timedelta(hours=2))))
+        
+        return route
+    
+    def orders(self, first: int, count: int, total: int) -> Tuple[List[dict], List[dict]]:
+        """Orders first..first+count of total, with their status history"""
+        orders = []
+        history = []
+        
+        for index in range(first, first + count):
+            order_id = self.new_id()
+            order_date = self.spread(index, total)
+            urgency = self.pick(URGENCY_WEIGHTS)
+            route = self.order_route(order_date, urgency)
+            
+            karigar = None
+            previous = None
+            for status, location, process_name, status_date in route:
+                if location == Location.KARIGAR and (karigar is None or process_name != previous[2]):
+                    karigar = self.karigar()
+                process = self.processes.get(process_name) if process_name else None
+                history.append({
+                    "orderId": order_id,
+                    "previousStatus": previous[0].value if previous else None,
+                    "newStatus": status.value,
+                    "location": location.value,
+                    "karigarId": karigar.id if location == Location.KARIGAR else None,
+                    "processId": process.id if process else None,
+                    "statusDate": status_date,
+                    "changedBy": "Generator"
+                })
+                previous = (status, location, process_name)
+            
+            final_status, final_location, final_process, final_date = route[-1]
+            step = next((n for n, (status, _, _) in enumerate(PIPELINE) if status == final_status), None)
+            stone_type = self.rng.choice(STONE_TYPES)
+            process = self.processes.get(final_process) if final_process else None
+            
+            orders.append({
+                "id": order_id,
+                "bagNo": f"BAG-{order_date:%Y%m%d}-{index // ORDERS_PER_BAG:05d}",
+                "clientName": self.rng.choice(self.clients),
+                "clientCategory": self.pick(CLIENT_CATEGORY_WEIGHTS).value,
+                "designNo": self.rng.choice(self.designs).code,
+                "quantity": self.rng.choices([1, 2, 3, 5, 10], weights=[60, 20, 10, 7, 3])[0],
+                "stoneType": stone_type,
+                "stoneSize": self.rng.choice(STONE_SIZES) if stone_type else None,
+                "stoneQuality": self.rng.choice(STONE_QUALITIES) if stone_type else None,
+                "orderDate": order_date,
+                "deliveryDate": order_date + timedelta(days=LEAD_DAYS[urgency]),
+                "urgencyLevel": urgency.value,
+                "currentStatus": final_status.value,
+                "currentLocation": final_location.value,
+                "currentKarigarId": history[-1]["karigarId"],
+                "currentProcessId": process.id if process else None,
+                "progressPercentage": round(100 * step / (len(PIPELINE) - 1), 1) if step is not None else 0.0,
+                "createdAt": order_date,
+                "updatedAt": final_date
+            })
+        
+        return orders, history
+    
+    def issues(self, first: int, count: int, total: int) -> Tuple[List[dict], List[dict], List[dict]]:
+        """Issues first..first+count of total, with their receipts and register entries"""
+        issues = []
+        receipts = []
+        entries = []
+        process_list = list(self.processes.values())
+        
+        for index in range(first, first + count):
+            issue_id = self.new_id()
+            issue_date = self.spread(index, total)
+            karigar = self.karigar()
+            gross = round(self.rng.lognormvariate(math.log(40), 0.6), 3)
+            stone = round(gross * self.rng.choice([0, 0, 0.02, 0.05, 0.1]), 3)
+            net = round(gross - stone, 3)
+            
+            # Work comes back in up to three lots; older issues are more complete
+            received_net = 0.0
+            received_gross = 0.0
+            received_wastage = 0.0
+            lots = self.rng.choices([0, 1, 2, 3], weights=[10, 50, 25, 15])[0]
+            receipt_date = issue_date
+            for lot in range(lots):
+                receipt_date += timedelta(days=self.rng.expovariate(1 / 4))
+                if receipt_date > self.end:
+                    break
+                if lot == lots - 1:
+                    lot_net = round(net - received_net, 3)
+                else:
+                    lot_net = round((net - received_net) * self.rng.uniform(0.3, 0.7), 3)
+                lot_stone = round(stone * lot_net / net, 3) if net else 0.0
+                wastage = round(lot_net * self.rng.uniform(0.005, 0.03), 3)
+                lot_gross = round(lot_net + lot_stone + wastage, 3)
+                receipt_id = self.new_id()
+                
+                receipts.append({
+                    "id": receipt_id,
+                    "receiptDate": receipt_date,
+                    "issueId": issue_id,
+                    "karigarId": karigar.id,
+                    "pieces": 0,
+                    "grossWeight": lot_gross,
+                    "stoneWeight": lot_stone,
+                    "wastageWeight": wastage,
+                    "netWeight": lot_net,
+                    "createdAt": receipt_date,
+                    "updatedAt": receipt_date
+                })
+                entries.append({
+                    **stock_entry("Receipt", receipt_id, receipt_date, gross_in=lot_gross, net_in=lot_net),
+                    "createdAt": receipt_date
+                })
+                received_net += lot_net
+                received_gross += lot_gross
+                received_wastage += wastage
+            
+            design = self.rng.choice(self.designs) if self.rng.random() < 0.7 else None
+            issues.append({
+                "id": issue_id,
+                "issueDate": issue_date,
+                "karigarId": karigar.id,
+                "processId": self.rng.choice(process_list).id,
+                "designId": design.id if design else None,
+                "pieces": self.rng.randint(1, 50),
+                "grossWeight": gross,
+                "stoneWeight": stone,
+                "netWeight": net,
+                "status": issue_status(net, received_net),
+                "receivedGross": round(received_gross, 3),
+                "receivedNet": round(received_net, 3),
+                "receivedWastage": round(received_wastage, 3),
+                "createdAt": issue_date,
+                "updatedAt": receipt_date if received_net else issue_date
+            })
+            entries.append({
+                **stock_entry("Issue", issue_id, issue_date, gross_out=gross, net_out=net),
+                "createdAt": issue_date
+            })
+        
+        return issues, receipts, entries
+
+async def number_rows(db, rows: List[dict], document_type: str, number_field: str, date_field: str):
+    """Give rows real document numbers, reserving one block per day"""
+    by_day: Dict[str, List[dict]] = {}
+    for row in rows:
+        by_day.setdefault(row[date_field].strftime("%Y%m%d"), []).append(row)
+    for day_rows in by_day.values():
+        numbers = await allocate_document_numbers(db, document_type, len(day_rows), day_rows[0][date_field])
+        for row, number in zip(day_rows, numbers):
+            row[number_field] = number
+
+async def insert_batches(model, rows: List[dict], batch_size: int) -> int:
+    inserted = 0
+    for start in range(0, len(rows), batch_size):
+        inserted += await model.create_many(data=rows[start:start + batch_size])
+    return inserted
+
+# Tables that must be empty: ids and document numbers are only repeatable,
+# and only guaranteed not to clash, on a fresh database
+GENERATED_TABLES = {
+    "orders": "order",
+    "issues": "issue",
+    "receipts": "receipt",
+    "stock_register": "stockregister",
+    "document_sequences": "documentsequence"
+}
+
+async def generate(args) -> int:
+    # Long bulk transactions go straight to Postgres rather than through the
+    # pooler, with no statement timeout
+    db = create_client(direct=True, pool_size=max(args.concurrency * 2, 4), statement_timeout=0)
+    await db.connect()
+    started = time.monotonic()
+    counts = {"orders": 0, "order_status_history": 0, "issues": 0, "receipts": 0, "stock_register": 0}
+    
+    try:
+        for table, model in GENERATED_TABLES.items():
+            if await getattr(db, model).find_first():
+                print(f"❌ {table} already has rows; generate_data.py only loads an empty database")
+                return 1
+        
+        extra_karigars = [
+            {"code": f"K{number:03d}", "name": f"Karigar {number}"}
+            for number in range(len(KARIGARS) + 1, args.karigars + 1)
+        ]
+        await seed_master_data(db)
+        if extra_karigars:
+            await db.karigar.create_many(data=extra_karigars, skip_duplicates=True)
+        
+        karigars = await db.karigar.find_many(where={"active": True}, order={"code": "asc"})
+        processes = await db.process.find_many(order={"name": "asc"})
+        designs = await db.design.find_many(order={"code": "asc"})
+        
+        generator = Generator(
+            args.seed,
+            args.end or datetime.now(timezone.utc).replace(microsecond=0),
+            args.days,
+            karigars,
+            processes,
+            designs
+        )
+        
+        # Rows are built in order on this task so the seed fixes the data;
+        # only the inserts of up to --concurrency chunks overlap
+        pending = set()
+        
+        async def run(chunk_inserts):
+            for table, model, rows in chunk_inserts:
+                counts[table] += await insert_batches(model, rows, args.batch_size)
+        
+        async def submit(chunk_inserts):
+            while len(pending) >= args.concurrency:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                pending.difference_update(done)
+                for task in done:
+                    task.result()
+            pending.add(asyncio.create_task(run(chunk_inserts)))
+        
+        for first in range(0, args.orders, args.chunk_size):
+            count = min(args.chunk_size, args.orders - first)
+            orders, history = generator.orders(first, count, args.orders)
+            await number_rows(db, orders, "order", "orderNo", "orderDate")
+            await submit([
+                ("orders", db.order, orders),
+                ("order_status_history", db.orderstatushistory, history)
+            ])
+            print(f"Orders: {first + count}/{args.orders}")
+        
+        for first in range(0, args.issues, args.chunk_size):
+            count = min(args.chunk_size, args.issues - first)
+            issues, receipts, entries = generator.issues(first, count, args.issues)
+            await number_rows(db, issues, "issue", "issueNo", "issueDate")
+            await number_rows(db, receipts, "receipt", "receiptNo", "receiptDate")
+            await submit([
+                ("issues", db.issue, issues),
+                ("receipts", db.receipt, receipts),
+                ("stock_register", db.stockregister, entries)
+            ])
+            print(f"Issues: {first + count}/{args.issues}")
+        
+        if pending:
+            for task in (await asyncio.wait(pending))[0]:
+                task.result()
+        
+        print("Rebuilding dashboard counters and stock balances...")
+        await rebuild_order_counters(db)
+        await rebuild_stock_ledger(db)
+        
+        elapsed = time.monotonic() - started
+        total = sum(counts.values())
+        for table, count in counts.items():
+            print(f"  {table}: {count}")
+        print(f"✅ Generated {total} rows in {elapsed:.1f}s ({total / elapsed:.0f} rows/s)")
+        return 0
+    
+    finally:
+        await db.disconnect()
+
+def utc_datetime(value: str) -> datetime:
+    """ISO date or datetime, read as UTC unless it carries an offset"""
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Bulk-load a deterministic synthetic dataset")
+    parser.add_argument("--orders", type=int, default=10000, help="Orders to create (about 20 history rows each)")
+    parser.add_argument("--issues", type=int, default=20000, help="Issues to create (about 1.5 receipts and 2.5 register rows each)")
+    parser.add_argument("--karigars", type=int, default=50, help="Total karigars, including the seeded ones")
+    parser.add_argument("--days", type=int, default=365, help="Length of the period the data covers")
+    parser.add_argument("--end", type=utc_datetime, help="End of the period, e.g. 2026-01-01 (UTC); defaults to now")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed; with the same --end, the same seed gives the same rows")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Parent rows generated per chunk")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per create_many statement")
+    parser.add_argument("--concurrency", type=int, default=4, help="Chunks inserted at the same time")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(generate(parse_args())))
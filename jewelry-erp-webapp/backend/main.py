@@ -1,46 +1,68 @@
-from fastapi import FastAPI, HTTPException, Depends
-from fastapi.middleware.cors import CORSMiddleware
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
 import asyncio
-import os
-from prisma import Prisma
-from routers import issues, receipts, karigars, processes, designs, orders
-from database import connect_db, disconnect_db
-
-# Global Prisma client
-db = Prisma()
+from application import ROUTERS, create_app, include_router, health_status, metrics_text
+from database import connect_db, disconnect_db, warm_up_db, get_db, replica_db
+from services.master_data import master_data
+from metrics import Gauge, registry
+from read_routing import replica_state
+from services.order_events import order_events
+from services.order_counters import ensure_order_counters
+from services.stock_ledger import ensure_stock_ledger
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     await connect_db()
+    replica_monitor = None
+    if replica_db is not None:
+        replica_monitor = asyncio.create_task(replica_state.monitor(replica_db))
+    try:
+        await warm_up_db()
+    except Exception as e:
+        # Connections then open on first use instead
+        print(f"❌ Failed to warm database connections: {e}")
+    try:
+        await master_data.warm(await get_db())
+        print(f"✅ Master-data cache warmed: {master_data.stats()['sizes']}")
+    except Exception as e:
+        # The cache loads lazily on first use instead
+        print(f"❌ Failed to warm master-data cache: {e}")
+    try:
+        if await ensure_order_counters(await get_db()):
+            print("✅ Dashboard counters built from existing orders")
+    except Exception as e:
+        print(f"❌ Failed to check dashboard counters: {e}")
+    try:
+        if await ensure_stock_ledger(await get_db()):
+            print("✅ Stock running balances built from existing register entries")
+    except Exception as e:
+        print(f"❌ Failed to check stock balances: {e}")
     yield
     # Shutdown
+    if replica_monitor is not None:
+        replica_monitor.cancel()
     await disconnect_db()
 
-app = FastAPI(
-    title="Jewelry ERP API",
-    description="Modern jewelry manufacturing management system API",
-    version="1.0.0",
-    lifespan=lifespan
-)
+app = create_app(lifespan)
 
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:3000", "https://*.vercel.app"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+registry.register(Gauge(
+    "master_data_cache_hits_total", "Master-data lookups served from memory",
+    lambda: master_data.hits, kind="counter"
+))
+registry.register(Gauge(
+    "master_data_cache_misses_total", "Master-data lookups that went to the database",
+    lambda: master_data.misses, kind="counter"
+))
+registry.register(Gauge(
+    "order_event_subscribers", "Open order event streams",
+    lambda: order_events.stats()["subscribers"]
+))
 
 # Include routers
-app.include_router(orders.router, tags=["orders"])
-app.include_router(issues.router, prefix="/api/issues", tags=["issues"])
-app.include_router(receipts.router, prefix="/api/receipts", tags=["receipts"])
-app.include_router(karigars.router, prefix="/api/karigars", tags=["karigars"])
-app.include_router(processes.router, prefix="/api/processes", tags=["processes"])
-app.include_router(designs.router, prefix="/api/designs", tags=["designs"])
+for name, prefix in ROUTERS:
+    include_router(app, name, prefix)
 
 @app.get("/")
 async def root():
@@ -48,22 +70,13 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    try:
-        from database import check_db_connection
-        db_healthy = await check_db_connection()
-        return {
-            "status": "healthy" if db_healthy else "unhealthy",
-            "database": "connected" if db_healthy else "disconnected",
-            "provider": "Neon PostgreSQL"
-        }
-    except Exception as e:
-        return {
-            "status": "unhealthy",
-            "database": "disconnected",
-            "provider": "Neon PostgreSQL",
-            "error": str(e)
-        }
+    return await health_status()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of request, query and cache metrics"""
+    return PlainTextResponse(await metrics_text(), media_type="text/plain; version=0.0.4")
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000)
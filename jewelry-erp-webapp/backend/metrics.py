@@ -0,0 +1,155 @@
+from bisect import bisect_left
+from typing import Callable, Dict, List, Tuple
+import time
+
+# Metrics are plain counters updated from the event loop thread only, so
+# recording needs no locks: a dict lookup, a bisect and a few additions.
+# Text is rendered only when /metrics is scraped.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    pairs = ",".join(f'{name}="{value}"' for name, value in zip(names, values))
+    return "{" + pairs + "}" if pairs else ""
+
+def _with_label(labels: str, extra: str) -> str:
+    return "{" + (labels[1:-1] + "," if labels else "") + extra + "}"
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.values: Dict[Tuple[str, ...], float] = {}
+    
+    def inc(self, *labels: str, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in self.values.items():
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {value}")
+        return lines
+
+class Gauge:
+    """A value set directly, or read from a callback at scrape time.
+    
+    Callbacks export totals kept elsewhere (such as cache hit counts)
+    without touching their hot paths; pass kind="counter" for those.
+    """
+    
+    def __init__(self, name: str, help_text: str, read: Callable[[], float] = None, kind: str = "gauge"):
+        self.name = name
+        self.help_text = help_text
+        self.value = 0.0
+        self.read = read
+        self.kind = kind
+    
+    def render(self) -> List[str]:
+        value = self.read() if self.read else self.value
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}", f"{self.name} {value}"]
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        # Per label set: count in each bucket (plus +Inf), sum of observations
+        self.series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+    
+    def observe(self, value: float, *labels: str):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1][0] += value
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in self.series.items():
+            label_text = _labels(self.label_names, labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = _with_label(label_text, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{label_text} {total[0]}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+    
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+    
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "Requests by route template and status", ("method", "route", "status")
+))
+http_errors = registry.register(Counter(
+    "http_request_errors_total", "Requests that failed with a 5xx or an exception", ("method", "route")
+))
+http_latency = registry.register(Histogram(
+    "http_request_duration_seconds", "Time to the end of the response by route template", ("method", "route")
+))
+http_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "Requests currently being handled"
+))
+db_query_latency = registry.register(Histogram(
+    "db_query_duration_seconds", "Query engine round trips by Prisma operation", ("operation",), DB_BUCKETS
+))
+
+def route_template(scope) -> str:
+    """The matched route's path with {name} parameters, to keep label cardinality low"""
+    route = scope.get("route")
+    if route is not None:
+        return route.path_format
+    if "endpoint" not in scope:
+        return "unmatched"
+    # Plain Starlette routes (the docs and schema) take no path parameters
+    return scope["path"]
+
+class MetricsMiddleware:
+    """Records request count, errors, latency and in-flight requests per route template"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        status = 500
+        
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+        
+        http_in_flight.value += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_in_flight.value -= 1
+            method = scope["method"]
+            route = route_template(scope)
+            http_latency.observe(time.perf_counter() - started, method, route)
+            http_requests.inc(method, route, str(status))
+            if status >= 500:
+                http_errors.inc(method, route)
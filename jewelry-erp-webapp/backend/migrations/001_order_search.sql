@@ -0,0 +1,17 @@
+-- Trigram indexes for order search
+-- Apply after `prisma db push`:
+--   prisma db execute --file migrations/001_order_search.sql --schema schema.prisma
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- One GIN index per searched column. Postgres combines them with a BitmapOr,
+-- which serves both the ILIKE '%term%' filter in GET /api/orders and the
+-- ranked similarity search in GET /api/orders/search.
+CREATE INDEX IF NOT EXISTS orders_order_no_trgm_idx
+    ON orders USING gin ("orderNo" gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS orders_client_name_trgm_idx
+    ON orders USING gin ("clientName" gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS orders_description_trgm_idx
+    ON orders USING gin ("description" gin_trgm_ops);
@@ -0,0 +1,17 @@
+-- Backfill the received totals kept on issues from existing receipts
+-- Apply after `prisma db push` has added the receivedGross/receivedNet/receivedWastage columns:
+--   prisma db execute --file migrations/002_issue_received_totals.sql --schema schema.prisma
+
+UPDATE issues i
+SET "receivedGross" = r.gross,
+    "receivedNet" = r.net,
+    "receivedWastage" = r.wastage
+FROM (
+    SELECT "issueId",
+           SUM("grossWeight") AS gross,
+           SUM("netWeight") AS net,
+           SUM("wastageWeight") AS wastage
+    FROM receipts
+    GROUP BY "issueId"
+) r
+WHERE r."issueId" = i.id;
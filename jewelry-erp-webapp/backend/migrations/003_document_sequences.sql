@@ -0,0 +1,20 @@
+-- Seed the document number counters from numbers already issued
+-- Apply after `prisma db push` has created document_sequences:
+--   prisma db execute --file migrations/003_document_sequences.sql --schema schema.prisma
+
+INSERT INTO document_sequences ("documentType", "day", "lastValue", "updatedAt")
+SELECT prefix, day, MAX(sequence), NOW()
+FROM (
+    SELECT 'ORD' AS prefix, split_part("orderNo", '-', 2) AS day, split_part("orderNo", '-', 3)::int AS sequence
+    FROM orders WHERE "orderNo" ~ '^ORD-[0-9]{8}-[0-9]+$'
+    UNION ALL
+    SELECT 'ISS', split_part("issueNo", '-', 2), split_part("issueNo", '-', 3)::int
+    FROM issues WHERE "issueNo" ~ '^ISS-[0-9]{8}-[0-9]+$'
+    UNION ALL
+    SELECT 'RCP', split_part("receiptNo", '-', 2), split_part("receiptNo", '-', 3)::int
+    FROM receipts WHERE "receiptNo" ~ '^RCP-[0-9]{8}-[0-9]+$'
+) issued
+GROUP BY prefix, day
+ON CONFLICT ("documentType", "day") DO UPDATE SET
+    "lastValue" = GREATEST(document_sequences."lastValue", EXCLUDED."lastValue"),
+    "updatedAt" = NOW();
@@ -0,0 +1,18 @@
+-- Fill the dashboard counters from the orders already in the table
+-- Apply after `prisma db push` has created order_status_counters:
+--   prisma db execute --file migrations/004_order_status_counters.sql --schema schema.prisma
+-- Safe to re-run: like POST /api/orders/dashboard/counters/rebuild, it replaces every bucket.
+
+BEGIN;
+
+-- Writers adjust counters in their own transactions; keep them out until the rebuild commits
+LOCK TABLE order_status_counters IN EXCLUSIVE MODE;
+
+DELETE FROM order_status_counters;
+
+INSERT INTO order_status_counters (status, location, "urgencyLevel", count, "updatedAt")
+SELECT "currentStatus", "currentLocation", "urgencyLevel", COUNT(*), NOW()
+FROM orders
+GROUP BY "currentStatus", "currentLocation", "urgencyLevel";
+
+COMMIT;
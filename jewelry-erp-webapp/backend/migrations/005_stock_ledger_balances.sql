@@ -0,0 +1,39 @@
+-- Fill the running balances of the stock register entries written before
+-- stock_balance existed, and seed the stock_balance row from them
+-- Apply after `prisma db push` has created stock_balance and stock_snapshots:
+--   prisma db execute --file migrations/005_stock_ledger_balances.sql --schema schema.prisma
+-- Safe to re-run: like POST /api/stock/rebuild, it recomputes every balance.
+
+BEGIN;
+
+-- Ledger writers upsert the stock_balance row; keep them out until the backfill commits
+LOCK TABLE stock_balance IN EXCLUSIVE MODE;
+
+UPDATE stock_register s
+SET "balanceGross" = r.gross,
+    "balanceNet" = r.net
+FROM (
+    SELECT id,
+           SUM("grossWeightIn" - "grossWeightOut") OVER (ORDER BY "createdAt", id) AS gross,
+           SUM("netWeightIn" - "netWeightOut") OVER (ORDER BY "createdAt", id) AS net
+    FROM stock_register
+) r
+WHERE s.id = r.id;
+
+INSERT INTO stock_balance (id, "balanceGross", "balanceNet", "snapshotThrough", "updatedAt")
+SELECT 1,
+       COALESCE(SUM("grossWeightIn" - "grossWeightOut"), 0),
+       COALESCE(SUM("netWeightIn" - "netWeightOut"), 0),
+       NULL,
+       NOW()
+FROM stock_register
+ON CONFLICT (id) DO UPDATE SET
+    "balanceGross" = EXCLUDED."balanceGross",
+    "balanceNet" = EXCLUDED."balanceNet",
+    "snapshotThrough" = NULL,
+    "updatedAt" = NOW();
+
+-- The next ledger write takes today's snapshot from the entries themselves
+DELETE FROM stock_snapshots;
+
+COMMIT;
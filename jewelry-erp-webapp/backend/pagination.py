@@ -0,0 +1,79 @@
+from fastapi import HTTPException
+from typing import Optional, Tuple
+from datetime import datetime
+import base64
+import json
+
+# Count modes accepted by the list endpoints
+COUNT_MODES = ("exact", "estimate", "none")
+
+def encode_cursor(sort_value: datetime, row_id: str) -> str:
+    """Encode the (sort value, id) of the last row on a page as an opaque cursor"""
+    payload = json.dumps([sort_value.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(sort_value), str(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def seek_where(where_clause: dict, sort_field: str, sort_value: datetime, row_id: str, descending: bool = True) -> dict:
+    """Restrict where_clause to rows after (sort_value, row_id) in keyset_order"""
+    op = "lt" if descending else "gt"
+    seek = {
+        "OR": [
+            {sort_field: {op: sort_value}},
+            {sort_field: sort_value, "id": {op: row_id}}
+        ]
+    }
+    return {"AND": [where_clause, seek]} if where_clause else seek
+
+def keyset_where(where_clause: dict, sort_field: str, cursor: Optional[str]) -> dict:
+    """Restrict where_clause to rows after the cursor in (sort_field desc, id desc) order"""
+    if not cursor:
+        return where_clause
+    
+    sort_value, row_id = decode_cursor(cursor)
+    return seek_where(where_clause, sort_field, sort_value, row_id)
+
+def keyset_order(sort_field: str, descending: bool = True) -> list:
+    """Order matching keyset_where, with id as the tiebreaker"""
+    direction = "desc" if descending else "asc"
+    return [{sort_field: direction}, {"id": direction}]
+
+def next_cursor(rows: list, page_size: int, sort_field: str) -> Optional[str]:
+    """Cursor for the page after rows, fetched with take=page_size + 1"""
+    if len(rows) <= page_size:
+        return None
+    last = rows[page_size - 1]
+    return encode_cursor(getattr(last, sort_field), last.id)
+
+def paging_headers(rows: list, page_size: int, sort_field: str, total: Optional[int], count_mode: str) -> dict:
+    """X-Next-Cursor / X-Total-Count headers for list endpoints whose body is a plain list"""
+    headers = {}
+    cursor = next_cursor(rows, page_size, sort_field)
+    if cursor:
+        headers["X-Next-Cursor"] = cursor
+    if total is not None:
+        headers["X-Total-Count"] = str(total)
+        headers["X-Total-Is-Estimate"] = str(count_mode == "estimate").lower()
+    return headers
+
+async def count_rows(db, model, table: str, where_clause: dict, mode: str) -> Optional[int]:
+    """Count rows according to mode: exact COUNT, planner estimate or nothing"""
+    if mode == "none":
+        return None
+    if mode == "estimate":
+        # The planner statistics only describe the whole table
+        if where_clause:
+            return None
+        rows = await db.query_raw(
+            "SELECT reltuples::bigint AS estimate FROM pg_class WHERE relname = $1",
+            table
+        )
+        return max(int(rows[0]["estimate"]), 0) if rows else None
+    return await model.count(where=where_clause)
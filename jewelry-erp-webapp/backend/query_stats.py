@@ -0,0 +1,157 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+import os
+import re
+import time
+
+from metrics import db_query_latency
+
+# Requests issuing more queries, or taking longer, than this are logged
+QUERY_BUDGET = int(os.getenv("DB_QUERY_BUDGET", "20"))
+LATENCY_BUDGET_MS = float(os.getenv("DB_LATENCY_BUDGET_MS", "500"))
+
+# The same query shape this many times in one request is reported as a
+# likely N+1; 0 turns the check off
+N_PLUS_ONE_THRESHOLD = int(os.getenv("DB_N_PLUS_ONE_THRESHOLD", "5"))
+
+# Exports page through a whole table one keyset batch at a time, so their
+# query count and duration grow with the data; they are not checked
+UNBUDGETED_PATHS = [r"/export$"]
+
+_OPERATION = re.compile(r"result:\s*(\w+)")
+_PARAMETERS = re.compile(r'parameters:\s*"(?:[^"\\]|\\.)*"')
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"')
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+
+def query_shape(content: str) -> str:
+    """The query with its values removed, so repeats of one statement compare equal"""
+    if "queryRaw" in content or "executeRaw" in content:
+        # Raw SQL already uses $n placeholders; only the bound values vary
+        return _PARAMETERS.sub("parameters: ?", content)
+    return _NUMBER.sub("?", _STRING.sub("?", content))
+
+def query_label(content: str) -> str:
+    match = _OPERATION.search(content)
+    return match.group(1) if match else "query"
+
+class RequestQueryStats:
+    """Queries issued while handling one request"""
+    
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Dict[str, Tuple[str, int]] = {}
+    
+    def record(self, content: str, duration: float):
+        self.count += 1
+        self.duration += duration
+        shape = query_shape(content)
+        label, seen = self.shapes.get(shape, (None, 0))
+        self.shapes[shape] = (label or query_label(content), seen + 1)
+    
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Operations whose identical shape ran at least threshold times"""
+        if threshold <= 0:
+            return []
+        return [(label, seen) for label, seen in self.shapes.values() if seen >= threshold]
+
+_current: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+@contextmanager
+def track_queries() -> Iterator[RequestQueryStats]:
+    """Tally the queries made inside the block, as the middleware does per request"""
+    stats = RequestQueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+def instrument_client(client):
+    """Time every query the client (and its transactions) sends to the engine.
+    
+    Transactions share the client's engine, so wrapping the engine once
+    covers db.tx() blocks and raw SQL as well. Every query feeds the
+    db_query_duration_seconds metric; those made during a request are also
+    added to its tally.
+    
+    connect() may give the client a new engine, so call this after every
+    connect (connect_db does); an engine already wrapped is left alone.
+    """
+    engine = client._engine
+    if getattr(engine, "query_stats_installed", False):
+        return
+    
+    query = engine.query
+    
+    async def timed_query(content, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await query(content, *args, **kwargs)
+        finally:
+            duration = time.perf_counter() - started
+            db_query_latency.observe(duration, query_label(content))
+            stats = _current.get()
+            if stats is not None:
+                stats.record(content, duration)
+    
+    engine.query = timed_query
+    engine.query_stats_installed = True
+
+class QueryStatsMiddleware:
+    """Adds Server-Timing and X-DB-Queries headers and logs chatty requests.
+    
+    Headers carry the queries made before the response started; the log
+    line at the end also covers queries made while a body was streaming.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        stats = RequestQueryStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        event_stream = False
+        
+        async def send_with_timing(message):
+            nonlocal event_stream
+            if message["type"] == "http.response.start":
+                event_stream = any(
+                    name == b"content-type" and value.startswith(b"text/event-stream")
+                    for name, value in message.get("headers", [])
+                )
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((
+                    b"server-timing",
+                    f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries", app;dur={elapsed_ms:.1f}'.encode()
+                ))
+                headers.append((b"x-db-queries", str(stats.count).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            # Event streams stay open by design, so only their queries count
+            elapsed_ms = 0.0 if event_stream else (time.perf_counter() - started) * 1000
+            self._report(scope, stats, elapsed_ms)
+    
+    def _report(self, scope, stats: RequestQueryStats, elapsed_ms: float):
+        if any(re.search(path, scope["path"]) for path in UNBUDGETED_PATHS):
+            return
+        request = f'{scope["method"]} {scope["path"]}'
+        if stats.count > QUERY_BUDGET or elapsed_ms > LATENCY_BUDGET_MS:
+            print(
+                f"⚠️ Over budget: {request} made {stats.count} queries "
+                f"({stats.duration * 1000:.1f}ms in the database) in {elapsed_ms:.1f}ms"
+            )
+        for label, seen in stats.repeated(N_PLUS_ONE_THRESHOLD):
+            print(f"⚠️ Possible N+1: {request} ran the same {label} query {seen} times")
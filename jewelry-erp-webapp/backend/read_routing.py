@@ -0,0 +1,148 @@
+from contextvars import ContextVar
+from http.cookies import SimpleCookie
+from typing import Optional
+import asyncio
+import math
+import os
+import time
+
+from query_stats import instrument_client
+
+# After a write, the writing client reads from the primary for this many
+# seconds. Keep it above DB_REPLICA_MAX_LAG + DB_REPLICA_LAG_CHECK_INTERVAL
+# so a replica that is still in use has always caught up with the write.
+READ_YOUR_WRITES_SECONDS = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
+# Replica lag in seconds beyond which every read goes to the primary
+REPLICA_MAX_LAG = float(os.getenv("DB_REPLICA_MAX_LAG", "2"))
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv("DB_REPLICA_LAG_CHECK_INTERVAL", "1"))
+
+STICKY_COOKIE = "db_primary_until"
+READ_METHODS = ("GET", "HEAD")
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+# Seconds the replica is behind. A standby that has replayed everything it
+# received is caught up even when the primary has been idle for a while; a
+# server that is not in recovery (a second, independent instance) is
+# treated as current.
+REPLICA_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+END::float AS lag
+"""
+
+class ReplicaState:
+    """Replica lag as last measured, and how reads have been routed"""
+    
+    def __init__(self):
+        self.enabled = False
+        self.lag: Optional[float] = None
+        self.checked_at: Optional[float] = None
+        self.replica_reads = 0
+        self.fallbacks = 0
+    
+    @property
+    def healthy(self) -> bool:
+        # A check that has not run for a few intervals means the monitor is stuck
+        return (
+            self.enabled
+            and self.lag is not None
+            and self.lag <= REPLICA_MAX_LAG
+            and time.monotonic() - self.checked_at < REPLICA_LAG_CHECK_INTERVAL * 3
+        )
+    
+    async def monitor(self, replica):
+        """Measure replica lag until cancelled"""
+        self.enabled = True
+        while True:
+            was_healthy = self.healthy
+            try:
+                if not replica.is_connected():
+                    await replica.connect()
+                    instrument_client(replica)
+                rows = await replica.query_raw(REPLICA_LAG_SQL)
+                self.lag = rows[0]["lag"]
+            except Exception as e:
+                self.lag = None
+                if was_healthy:
+                    print(f"❌ Replica lag check failed: {e}")
+            self.checked_at = time.monotonic()
+            if was_healthy and not self.healthy:
+                print(f"⚠️ Reads moved to the primary (replica lag {self.lag}s)")
+            elif self.healthy and not was_healthy:
+                print(f"✅ Reads routed to the replica (lag {self.lag}s)")
+            await asyncio.sleep(REPLICA_LAG_CHECK_INTERVAL)
+    
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "healthy": self.healthy,
+            "lagSeconds": self.lag,
+            "replicaReads": self.replica_reads,
+            "fallbacks": self.fallbacks
+        }
+
+replica_state = ReplicaState()
+
+_route: ContextVar[str] = ContextVar("db_route", default="primary")
+
+def use_replica() -> bool:
+    """Whether the current request was routed to the read replica"""
+    return _route.get() == "replica"
+
+def _sticky(scope) -> bool:
+    for name, value in scope.get("headers", []):
+        if name == b"cookie":
+            morsel = SimpleCookie(value.decode("latin-1")).get(STICKY_COOKIE)
+            if morsel is not None:
+                try:
+                    return float(morsel.value) > time.time()
+                except ValueError:
+                    return False
+    return False
+
+class ReadRoutingMiddleware:
+    """Routes GET and HEAD requests to the read replica while it keeps up.
+    
+    Successful writes set a short-lived cookie that keeps the client's reads
+    on the primary, so it sees its own changes. Every response says where
+    its reads went in X-DB-Route.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        read = scope["method"] in READ_METHODS
+        route = "primary"
+        if read and replica_state.enabled and not _sticky(scope):
+            if replica_state.healthy:
+                route = "replica"
+                replica_state.replica_reads += 1
+            else:
+                replica_state.fallbacks += 1
+        
+        async def send_with_route(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-route", route.encode()))
+                if scope["method"] in WRITE_METHODS and message["status"] < 400:
+                    until = time.time() + READ_YOUR_WRITES_SECONDS
+                    cookie = (
+                        f"{STICKY_COOKIE}={until:.3f}; Max-Age={math.ceil(READ_YOUR_WRITES_SECONDS)}; "
+                        "Path=/; HttpOnly; SameSite=Lax"
+                    )
+                    headers.append((b"set-cookie", cookie.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+        
+        token = _route.set(route)
+        try:
+            await self.app(scope, receive, send_with_route)
+        finally:
+            _route.reset(token)
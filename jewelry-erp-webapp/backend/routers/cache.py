@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+from services.master_data import master_data
+
+router = APIRouter()
+
+@router.get("/master-data")
+async def get_master_data_cache_stats():
+    """Get master-data cache version and hit/miss counters"""
+    return master_data.stats()
+
+@router.post("/master-data/invalidate")
+async def invalidate_master_data_cache():
+    """Force the master-data cache to reload on next use, e.g. after editing karigars"""
+    master_data.invalidate()
+    
+    return {"message": "Master-data cache invalidated", "version": master_data.version}
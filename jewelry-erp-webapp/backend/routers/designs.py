@@ -1,28 +1,32 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
 from typing import List, Optional
 from database import get_db
+from services.master_data import master_data
+from http_cache import MASTER_DATA_CACHE_CONTROL, conditional_response
 from prisma import Prisma
 
 router = APIRouter()
 
 @router.get("/")
 async def get_designs(
+    request: Request,
+    response: Response,
     active: Optional[bool] = Query(True),
     category: Optional[str] = Query(None),
     db: Prisma = Depends(get_db)
 ):
     """Get all designs"""
     try:
-        where_clause = {}
+        # The table's stamp, checked against the database, answers revalidations
+        etag, designs = await master_data.list_all(db, "design")
+        not_modified = conditional_response(request, response, etag, MASTER_DATA_CACHE_CONTROL)
+        if not_modified:
+            return not_modified
+        
         if active is not None:
-            where_clause["active"] = active
+            designs = [d for d in designs if d.active == active]
         if category:
-            where_clause["category"] = category
-        
-        designs = await db.design.find_many(
-            where=where_clause,
-            order={"name": "asc"}
-        )
+            designs = [d for d in designs if d.category == category]
         
         return designs
         
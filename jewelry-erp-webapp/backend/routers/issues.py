@@ -1,69 +1,222 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import List, Optional
 from datetime import datetime, timedelta
-from database import get_db
-from schemas.issue import IssueCreate, IssueUpdate, IssueResponse
+import asyncio
+from database import get_db, get_primary_db
+from pagination import keyset_where, keyset_order, paging_headers, count_rows
+from serialization import FastJSONResponse
+from fieldsets import parse_fields, parse_expand, project_rows
+from services.stock_ledger import append_stock_entry, append_stock_entries, stock_entry
+from services.master_data import master_data
+from services.document_numbers import allocate_document_number, allocate_document_numbers
+from services.exports import export_response
+from schemas.issue import (
+    IssueCreate,
+    IssueUpdate,
+    IssueResponse,
+    IssueBulkCreate,
+    IssueBulkRowResult,
+    IssueBulkResponse
+)
 from prisma import Prisma
 
 router = APIRouter()
 
+# Scalar fields and relations a list request may ask for with fields=/expand=
+ISSUE_FIELDS = (
+    "id", "issueNo", "issueDate", "karigarId", "processId", "designId",
+    "pieces", "grossWeight", "stoneWeight", "netWeight", "remarks", "status",
+    "receivedGross", "receivedNet", "receivedWastage", "createdAt", "updatedAt"
+)
+ISSUE_RELATIONS = ("karigar", "process", "design")
+
+# Columns written by the CSV export; dotted names read the included relations
+ISSUE_EXPORT_COLUMNS = [
+    "id", "issueNo", "issueDate", "karigar.code", "karigar.name", "process.name",
+    "design.code", "pieces", "grossWeight", "stoneWeight", "netWeight",
+    "receivedGross", "receivedNet", "receivedWastage", "status", "remarks",
+    "createdAt", "updatedAt"
+]
+
+def _issue_where(status: Optional[str], karigar_id: Optional[str]) -> dict:
+    """Build the where clause shared by the issue list and export"""
+    where_clause = {}
+    
+    if status:
+        where_clause["status"] = status
+    
+    if karigar_id:
+        where_clause["karigarId"] = karigar_id
+    
+    return where_clause
+
 @router.post("/", response_model=IssueResponse)
 async def create_issue(issue: IssueCreate, db: Prisma = Depends(get_db)):
     """Create a new issue"""
     try:
         # Check if karigar exists
-        karigar = await db.karigar.find_unique(where={"id": issue.karigar_id})
+        karigar = await master_data.get(db, "karigar", issue.karigar_id)
         if not karigar:
             raise HTTPException(status_code=404, detail="Karigar not found")
         
         # Check if process exists
-        process = await db.process.find_unique(where={"id": issue.process_id})
+        process = await master_data.get(db, "process", issue.process_id)
         if not process:
             raise HTTPException(status_code=404, detail="Process not found")
         
         # Check if design exists (if provided)
         if issue.design_id:
-            design = await db.design.find_unique(where={"id": issue.design_id})
+            design = await master_data.get(db, "design", issue.design_id)
             if not design:
                 raise HTTPException(status_code=404, detail="Design not found")
         
         # Calculate net weight
         net_weight = issue.gross_weight - issue.stone_weight
         
-        # Create issue
-        created_issue = await db.issue.create(
-            data={
-                "issueNo": issue.issue_no,
-                "issueDate": issue.issue_date,
-                "karigarId": issue.karigar_id,
-                "processId": issue.process_id,
-                "designId": issue.design_id,
-                "pieces": issue.pieces,
-                "grossWeight": issue.gross_weight,
-                "stoneWeight": issue.stone_weight,
-                "netWeight": net_weight,
-                "remarks": issue.remarks,
-                "status": "Pending"
-            },
-            include={
-                "karigar": True,
-                "process": True,
-                "design": True
-            }
-        )
+        # Numbered before the transaction, like the bulk endpoint
+        issue_no = issue.issue_no or await allocate_document_number(db, "issue")
         
-        # Create stock register entry
-        await db.stockregister.create(
-            data={
-                "transactionType": "Issue",
-                "transactionId": created_issue.id,
-                "transactionDate": issue.issue_date,
-                "grossWeightOut": issue.gross_weight,
-                "netWeightOut": net_weight
-            }
+        # Create issue and its stock register entry together
+        async with db.tx() as transaction:
+            created_issue = await transaction.issue.create(
+                data={
+                    "issueNo": issue_no,
+                    "issueDate": issue.issue_date,
+                    "karigarId": issue.karigar_id,
+                    "processId": issue.process_id,
+                    "designId": issue.design_id,
+                    "pieces": issue.pieces,
+                    "grossWeight": issue.gross_weight,
+                    "stoneWeight": issue.stone_weight,
+                    "netWeight": net_weight,
+                    "remarks": issue.remarks,
+                    "status": "Pending"
+                },
+                include={
+                    "karigar": True,
+                    "process": True,
+                    "design": True
+                }
+            )
+            
+            await append_stock_entry(
+                transaction,
+                "Issue",
+                created_issue.id,
+                issue.issue_date,
+                gross_out=issue.gross_weight,
+                net_out=net_weight
+            )
+        
+        # Prisma rows are camelCase; encode directly like the list endpoint
+        return FastJSONResponse(created_issue)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/bulk", response_model=IssueBulkResponse)
+async def create_issues_bulk(bulk: IssueBulkCreate, db: Prisma = Depends(get_db)):
+    """Create many issues in one call, reporting errors per row"""
+    try:
+        rows = bulk.issues
+        
+        # Validate referenced ids against the master-data cache; ids it does
+        # not know are checked with one IN query per model
+        issue_nos = list({row.issue_no for row in rows if row.issue_no})
+        karigars, processes, designs = await asyncio.gather(
+            master_data.get_many(db, "karigar", (row.karigar_id for row in rows)),
+            master_data.get_many(db, "process", (row.process_id for row in rows)),
+            master_data.get_many(db, "design", (row.design_id for row in rows if row.design_id))
         )
+        existing_issues = await db.issue.find_many(where={"issueNo": {"in": issue_nos}}) if issue_nos else []
+        known_karigars = set(karigars)
+        known_processes = set(processes)
+        known_designs = set(designs)
+        taken_issue_nos = {i.issueNo for i in existing_issues}
+        
+        results = []
+        valid = []
+        for index, row in enumerate(rows):
+            error = None
+            if row.karigar_id not in known_karigars:
+                error = "Karigar not found"
+            elif row.process_id not in known_processes:
+                error = "Process not found"
+            elif row.design_id and row.design_id not in known_designs:
+                error = "Design not found"
+            elif row.issue_no and row.issue_no in taken_issue_nos:
+                error = "Issue number already exists"
+            
+            if error:
+                results.append(IssueBulkRowResult(index=index, success=False, issue_no=row.issue_no, error=error))
+            else:
+                if row.issue_no:
+                    taken_issue_nos.add(row.issue_no)
+                valid.append((index, row))
+        
+        if valid:
+            # Allocate numbers for rows without one in a single block
+            unnumbered = [index for index, row in valid if not row.issue_no]
+            numbers = {}
+            if unnumbered:
+                block = await allocate_document_numbers(db, "issue", len(unnumbered))
+                numbers = dict(zip(unnumbered, block))
+            
+            data = []
+            for index, row in valid:
+                data.append({
+                    "issueNo": row.issue_no or numbers[index],
+                    "issueDate": row.issue_date,
+                    "karigarId": row.karigar_id,
+                    "processId": row.process_id,
+                    "designId": row.design_id,
+                    "pieces": row.pieces,
+                    "grossWeight": row.gross_weight,
+                    "stoneWeight": row.stone_weight,
+                    "netWeight": row.gross_weight - row.stone_weight,
+                    "remarks": row.remarks,
+                    "status": "Pending"
+                })
+            
+            # Insert issues and their stock register entries in one transaction
+            async with db.tx() as transaction:
+                await transaction.issue.create_many(data=data)
+                created = await transaction.issue.find_many(
+                    where={"issueNo": {"in": [d["issueNo"] for d in data]}}
+                )
+                ids_by_no = {issue.issueNo: issue.id for issue in created}
+                
+                await append_stock_entries(
+                    transaction,
+                    [
+                        stock_entry(
+                            "Issue",
+                            ids_by_no[d["issueNo"]],
+                            d["issueDate"],
+                            gross_out=d["grossWeight"],
+                            net_out=d["netWeight"]
+                        )
+                        for d in data
+                    ]
+                )
+            
+            for (index, _), d in zip(valid, data):
+                results.append(IssueBulkRowResult(
+                    index=index,
+                    success=True,
+                    issue_id=ids_by_no[d["issueNo"]],
+                    issue_no=d["issueNo"]
+                ))
         
-        return created_issue
+        results.sort(key=lambda result: result.index)
+        
+        return IssueBulkResponse(
+            created=len(valid),
+            failed=len(rows) - len(valid),
+            results=results
+        )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -74,35 +227,63 @@ async def get_issues(
     limit: int = Query(50, ge=1, le=100),
     status: Optional[str] = Query(None),
     karigar_id: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor; overrides skip"),
+    count: str = Query("none", pattern="^(exact|estimate|none)$", description="Total count mode for X-Total-Count"),
+    fields: Optional[str] = Query(None, description="Comma-separated issue fields to return (id is always included)"),
+    expand: Optional[str] = Query(None, description="Comma-separated relations to include: karigar, process, design"),
     db: Prisma = Depends(get_db)
 ):
     """Get all issues with optional filtering"""
     try:
-        where_clause = {}
-        
-        if status:
-            where_clause["status"] = status
+        selected = parse_fields(fields, ISSUE_FIELDS)
+        include = parse_expand(expand, ISSUE_RELATIONS, ISSUE_RELATIONS)
+        where_clause = _issue_where(status, karigar_id)
         
-        if karigar_id:
-            where_clause["karigarId"] = karigar_id
-        
-        issues = await db.issue.find_many(
-            where=where_clause,
-            skip=skip,
-            take=limit,
-            include={
-                "karigar": True,
-                "process": True,
-                "design": True
-            },
-            order={"issueDate": "desc"}
+        total, issues = await asyncio.gather(
+            count_rows(db, db.issue, "issues", where_clause, count),
+            db.issue.find_many(
+                where=keyset_where(where_clause, "issueDate", cursor),
+                skip=0 if cursor else skip,
+                take=limit + 1,
+                include=include or None,
+                order=keyset_order("issueDate")
+            )
         )
         
-        return issues
+        # Paging metadata travels in headers so the body stays a plain list;
+        # rows are encoded straight from Prisma without re-validation
+        return FastJSONResponse(
+            project_rows(issues[:limit], selected, include, ISSUE_FIELDS),
+            headers=paging_headers(issues, limit, "issueDate", total, count)
+        )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/export")
+async def export_issues(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    status: Optional[str] = Query(None),
+    karigar_id: Optional[str] = Query(None),
+    db: Prisma = Depends(get_db)
+):
+    """Stream every issue matching the list filters as NDJSON or CSV"""
+    return export_response(
+        db.issue,
+        _issue_where(status, karigar_id),
+        "issueDate",
+        format,
+        ISSUE_EXPORT_COLUMNS,
+        "issues",
+        include={
+            "karigar": True,
+            "process": True,
+            "design": True
+        }
+    )
+
 @router.get("/{issue_id}", response_model=IssueResponse)
 async def get_issue(issue_id: str, db: Prisma = Depends(get_db)):
     """Get a specific issue by ID"""
@@ -203,27 +384,16 @@ async def delete_issue(issue_id: str, db: Prisma = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/generate/number")
-async def generate_issue_number(db: Prisma = Depends(get_db)):
-    """Generate a new issue number"""
+@router.post("/generate/number")
+async def generate_issue_number(db: Prisma = Depends(get_primary_db)):
+    """Reserve a new issue number.
+    
+    A POST because every call uses up a number; an issue created without
+    issue_no is numbered inside its own request instead.
+    """
     try:
-        today = datetime.now()
-        date_str = today.strftime("%Y%m%d")
-        prefix = f"ISS-{date_str}-"
-        
-        # Find the last issue number for today
-        last_issue = await db.issue.find_first(
-            where={"issueNo": {"startswith": prefix}},
-            order={"issueNo": "desc"}
-        )
-        
-        if last_issue:
-            last_num = int(last_issue.issueNo.split("-")[-1])
-            new_num = last_num + 1
-        else:
-            new_num = 1
-        
-        return {"issue_number": f"{prefix}{new_num:03d}"}
+        # Reserved atomically, so two clerks never receive the same number
+        return {"issue_number": await allocate_document_number(db, "issue")}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
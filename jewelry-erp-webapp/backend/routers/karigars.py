@@ -1,12 +1,18 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
 from typing import List, Optional
+from datetime import datetime, timezone
 from database import get_db
+from services.karigar_balances import get_karigar_balances
+from services.master_data import master_data
+from http_cache import MASTER_DATA_CACHE_CONTROL, conditional_response
 from prisma import Prisma
 
 router = APIRouter()
 
 @router.get("/")
 async def get_karigars(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     active: Optional[bool] = Query(True),
@@ -14,19 +20,71 @@ async def get_karigars(
 ):
     """Get all karigars"""
     try:
-        where_clause = {}
+        # The table's stamp, checked against the database, answers revalidations
+        etag, karigars = await master_data.list_all(db, "karigar")
+        not_modified = conditional_response(request, response, etag, MASTER_DATA_CACHE_CONTROL)
+        if not_modified:
+            return not_modified
+        
         if active is not None:
-            where_clause["active"] = active
+            karigars = [k for k in karigars if k.active == active]
         
-        karigars = await db.karigar.find_many(
-            where=where_clause,
-            skip=skip,
-            take=limit,
-            order={"name": "asc"}
-        )
+        return karigars[skip:skip + limit]
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/balances")
+async def get_balances(
+    as_of: Optional[datetime] = Query(None, description="Balances as of this date (defaults to now)"),
+    outstanding_only: bool = Query(False, description="Only karigars still holding metal"),
+    db: Prisma = Depends(get_db)
+):
+    """Get outstanding net weight held by every karigar, per process"""
+    try:
+        balances = await get_karigar_balances(db, as_of or datetime.now(timezone.utc))
+        
+        if outstanding_only:
+            balances = [b for b in balances if abs(b["outstanding_net"]) >= 0.001]
+        
+        return balances
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{karigar_id}/balance")
+async def get_karigar_balance(
+    karigar_id: str,
+    as_of: Optional[datetime] = Query(None, description="Balance as of this date (defaults to now)"),
+    db: Prisma = Depends(get_db)
+):
+    """Get outstanding net weight held by one karigar, per process"""
+    try:
+        balances = await get_karigar_balances(db, as_of or datetime.now(timezone.utc), karigar_id)
+        
+        if balances:
+            return balances[0]
+        
+        # No transactions yet; still distinguish an unknown karigar
+        karigar = await db.karigar.find_unique(where={"id": karigar_id})
+        if not karigar:
+            raise HTTPException(status_code=404, detail="Karigar not found")
         
-        return karigars
+        return {
+            "karigar_id": karigar.id,
+            "karigar_code": karigar.code,
+            "karigar_name": karigar.name,
+            "issued_net": 0.0,
+            "issued_gross": 0.0,
+            "received_net": 0.0,
+            "received_gross": 0.0,
+            "wastage": 0.0,
+            "outstanding_net": 0.0,
+            "processes": []
+        }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1,17 +1,43 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from datetime import datetime, timedelta
 import asyncio
 import json
 
-from ..database import get_db
-from ..schemas.orders import (
+from database import get_db, get_primary_db
+from pagination import COUNT_MODES, keyset_where, keyset_order, next_cursor, paging_headers, count_rows
+from fieldsets import parse_fields, parse_expand, project_rows
+from http_cache import RECORD_CACHE_CONTROL, conditional_response
+from serialization import FastJSONResponse
+from services.order_counters import (
+    lock_order_bucket,
+    lock_order_buckets,
+    adjust_order_counter,
+    move_order_counter,
+    move_order_counters,
+    get_order_counters,
+    rebuild_order_counters
+)
+from services.order_search import search_orders
+from services.order_events import order_events
+from services.order_versions import get_order_version
+from services.order_list import select_order_columns
+from services.master_data import master_data
+from services.exports import export_response
+from services.document_numbers import allocate_document_number
+from schemas.orders import (
     OrderCreate,
     OrderUpdate,
     OrderStatusUpdate,
+    OrderStatusBatchUpdate,
+    OrderStatusBatchResult,
+    OrderStatusBatchResponse,
     OrderResponse,
+    OrderDetailResponse,
     OrderStatusHistoryResponse,
     OrderListResponse,
+    OrderSearchResponse,
     OrderDashboard,
     OrderStatus,
     Location,
@@ -21,54 +47,128 @@ from ..schemas.orders import (
 
 router = APIRouter(prefix="/api/orders", tags=["orders"])
 
+# Rows of each relation embedded in the order detail; the rest are paged
+DETAIL_HISTORY_LIMIT = 20
+DETAIL_JOB_CARD_LIMIT = 10
+
+# changedBy of status changes made through the API; there are no user
+# accounts yet, so both the single and the batch endpoint record this
+STATUS_CHANGED_BY = "User"
+
+# Seconds between keepalive comments on an idle event stream
+ORDER_EVENTS_HEARTBEAT = 15
+ORDER_EVENTS_RETRY_MS = 3000
+
+# Scalar fields and relations a list request may ask for with fields=/expand=
+ORDER_FIELDS = (
+    "id", "orderNo", "bagNo", "clientName", "clientCategory", "designNo",
+    "description", "quantity", "stoneType", "stoneSize", "stoneQuality",
+    "orderDate", "deliveryDate", "urgencyLevel", "specialInstructions",
+    "currentStatus", "currentLocation", "currentKarigarId", "currentProcessId",
+    "progressPercentage", "estimatedCompletion", "imageUrls", "documentUrls",
+    "createdAt", "updatedAt"
+)
+ORDER_RELATIONS = ("currentKarigar", "currentProcess")
+# Master-data table behind each relation, for rows read with raw SQL
+ORDER_RELATION_MODELS = {"currentKarigar": "karigar", "currentProcess": "process"}
+
+# Scalar columns written by the CSV export, plus the assigned karigar/process
+ORDER_EXPORT_COLUMNS = [
+    "id", "orderNo", "bagNo", "clientName", "clientCategory", "designNo",
+    "description", "quantity", "stoneType", "stoneSize", "stoneQuality",
+    "orderDate", "deliveryDate", "urgencyLevel", "currentStatus",
+    "currentLocation", "currentKarigar.name", "currentProcess.name",
+    "progressPercentage", "createdAt", "updatedAt"
+]
+
+def _order_where(
+    status: Optional[str],
+    location: Optional[str],
+    client_category: Optional[str],
+    urgency_level: Optional[str],
+    search: Optional[str]
+) -> dict:
+    """Build the where clause shared by the order list and export"""
+    where_clause = {}
+    
+    if status:
+        where_clause["currentStatus"] = status
+    if location:
+        where_clause["currentLocation"] = location
+    if client_category:
+        where_clause["clientCategory"] = client_category
+    if urgency_level:
+        where_clause["urgencyLevel"] = urgency_level
+    if search:
+        where_clause["OR"] = [
+            {"orderNo": {"contains": search, "mode": "insensitive"}},
+            {"clientName": {"contains": search, "mode": "insensitive"}},
+            {"description": {"contains": search, "mode": "insensitive"}}
+        ]
+    
+    return where_clause
+
 @router.post("/", response_model=OrderResponse)
 async def create_order(order: OrderCreate, db = Depends(get_db)):
     """Create a new order"""
     try:
-        # Check if order number already exists
-        existing_order = await db.order.find_unique(where={"orderNo": order.orderNo})
-        if existing_order:
-            raise HTTPException(status_code=400, detail="Order number already exists")
-        
-        # Create the order
-        new_order = await db.order.create(
-            data={
-                "orderNo": order.orderNo,
-                "bagNo": order.bagNo,
-                "clientName": order.clientName,
-                "clientCategory": order.clientCategory.value,
-                "designNo": order.designNo,
-                "description": order.description,
-                "quantity": order.quantity,
-                "stoneType": order.stoneType,
-                "stoneSize": order.stoneSize,
-                "stoneQuality": order.stoneQuality,
-                "orderDate": order.orderDate or datetime.now(),
-                "deliveryDate": order.deliveryDate,
-                "urgencyLevel": order.urgencyLevel.value,
-                "specialInstructions": order.specialInstructions,
-                "imageUrls": order.imageUrls,
-                "documentUrls": order.documentUrls,
-                "currentStatus": OrderStatus.RECEIVED.value,
-                "currentLocation": Location.HEAD_OFFICE.value,
-                "progressPercentage": 0.0
-            },
-            include={
-                "currentKarigar": True,
-                "currentProcess": True
-            }
-        )
+        if order.orderNo:
+            # Check if order number already exists
+            existing_order = await db.order.find_unique(where={"orderNo": order.orderNo})
+            if existing_order:
+                raise HTTPException(status_code=400, detail="Order number already exists")
+            order_no = order.orderNo
+        else:
+            order_no = await allocate_document_number(db, "order")
         
-        # Create initial status history entry
-        await db.orderstatushistory.create(
-            data={
-                "orderId": new_order.id,
-                "newStatus": OrderStatus.RECEIVED.value,
-                "location": Location.HEAD_OFFICE.value,
-                "comments": "Order created and received",
-                "changedBy": "System"
-            }
-        )
+        # Create the order, its first history entry and counter in one transaction
+        async with db.tx() as transaction:
+            new_order = await transaction.order.create(
+                data={
+                    "orderNo": order_no,
+                    "bagNo": order.bagNo,
+                    "clientName": order.clientName,
+                    "clientCategory": order.clientCategory.value,
+                    "designNo": order.designNo,
+                    "description": order.description,
+                    "quantity": order.quantity,
+                    "stoneType": order.stoneType,
+                    "stoneSize": order.stoneSize,
+                    "stoneQuality": order.stoneQuality,
+                    "orderDate": order.orderDate or datetime.now(),
+                    "deliveryDate": order.deliveryDate,
+                    "urgencyLevel": order.urgencyLevel.value,
+                    "specialInstructions": order.specialInstructions,
+                    "imageUrls": order.imageUrls,
+                    "documentUrls": order.documentUrls,
+                    "currentStatus": OrderStatus.RECEIVED.value,
+                    "currentLocation": Location.HEAD_OFFICE.value,
+                    "progressPercentage": 0.0
+                },
+                include={
+                    "currentKarigar": True,
+                    "currentProcess": True
+                }
+            )
+            
+            # Create initial status history entry
+            await transaction.orderstatushistory.create(
+                data={
+                    "orderId": new_order.id,
+                    "newStatus": OrderStatus.RECEIVED.value,
+                    "location": Location.HEAD_OFFICE.value,
+                    "comments": "Order created and received",
+                    "changedBy": "System"
+                }
+            )
+            
+            await adjust_order_counter(
+                transaction,
+                (new_order.currentStatus, new_order.currentLocation, new_order.urgencyLevel),
+                1
+            )
+        
+        order_events.publish("created", new_order)
         
         return new_order
         
@@ -84,87 +184,257 @@ async def get_orders(
     client_category: Optional[str] = Query(None),
     urgency_level: Optional[str] = Query(None),
     search: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from nextCursor; overrides page"),
+    count: str = Query("exact", pattern="^(exact|estimate|none)$", description=f"Total count mode: {', '.join(COUNT_MODES)}"),
+    fields: Optional[str] = Query(None, description="Comma-separated order fields to return (id is always included)"),
+    expand: Optional[str] = Query(None, description="Comma-separated relations to include: currentKarigar, currentProcess"),
     db = Depends(get_db)
 ):
     """Get paginated list of orders with filtering"""
     try:
-        # Build where clause
-        where_clause = {}
-        
-        if status:
-            where_clause["currentStatus"] = status
-        if location:
-            where_clause["currentLocation"] = location
-        if client_category:
-            where_clause["clientCategory"] = client_category
-        if urgency_level:
-            where_clause["urgencyLevel"] = urgency_level
-        if search:
-            where_clause["OR"] = [
-                {"orderNo": {"contains": search, "mode": "insensitive"}},
-                {"clientName": {"contains": search, "mode": "insensitive"}},
-                {"description": {"contains": search, "mode": "insensitive"}}
-            ]
-        
-        # Get total count
-        total = await db.order.count(where=where_clause)
+        where_clause = _order_where(status, location, client_category, urgency_level, search)
+        selected = parse_fields(fields, ORDER_FIELDS)
+        include = parse_expand(expand, ORDER_RELATIONS, ORDER_RELATIONS)
+        
+        if selected is not None:
+            return await _get_order_columns(
+                db, selected, include, where_clause, count, cursor, page, page_size,
+                {"status": status, "location": location, "client_category": client_category, "urgency_level": urgency_level},
+                search
+            )
+        
+        # Get total count and the page concurrently; with a cursor the page
+        # seeks on (createdAt, id) instead of skipping earlier rows
+        total, orders = await asyncio.gather(
+            count_rows(db, db.order, "orders", where_clause, count),
+            db.order.find_many(
+                where=keyset_where(where_clause, "createdAt", cursor),
+                skip=0 if cursor else (page - 1) * page_size,
+                take=page_size + 1,
+                include=include or None,
+                order=keyset_order("createdAt")
+            )
+        )
         
         # Calculate pagination
-        skip = (page - 1) * page_size
-        total_pages = (total + page_size - 1) // page_size
-        
-        # Get orders
-        orders = await db.order.find_many(
-            where=where_clause,
-            skip=skip,
-            take=page_size,
-            include={
-                "currentKarigar": True,
-                "currentProcess": True
+        total_pages = (total + page_size - 1) // page_size if total is not None else None
+        
+        # Same shape as OrderListResponse, encoded straight from Prisma rows
+        return FastJSONResponse({
+            "orders": project_rows(orders[:page_size], selected, include, ORDER_FIELDS),
+            "total": total,
+            "page": page,
+            "pageSize": page_size,
+            "totalPages": total_pages,
+            "totalIsEstimate": count == "estimate",
+            "nextCursor": next_cursor(orders, page_size, "createdAt")
+        })
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch orders: {str(e)}")
+
+async def _get_order_columns(
+    db,
+    selected: List[str],
+    include: dict,
+    where_clause: dict,
+    count: str,
+    cursor: Optional[str],
+    page: int,
+    page_size: int,
+    filters: dict,
+    search: Optional[str]
+):
+    """get_orders for a fields= request: only the requested columns are read"""
+    # Foreign keys of expanded relations are read too, then dropped
+    columns = selected + [f"{name}Id" for name in include if f"{name}Id" not in selected]
+    total, (rows, after) = await asyncio.gather(
+        count_rows(db, db.order, "orders", where_clause, count),
+        select_order_columns(
+            db, columns, filters, search, cursor,
+            0 if cursor else (page - 1) * page_size,
+            page_size
+        )
+    )
+    
+    # Karigars and processes come from the master-data cache, not a join
+    related = {}
+    for name in include:
+        related[name] = await master_data.get_many(
+            db, ORDER_RELATION_MODELS[name], [row[f"{name}Id"] for row in rows if row[f"{name}Id"]]
+        )
+    orders = [
+        {
+            **{field: row[field] for field in selected},
+            **{name: related[name].get(row[f"{name}Id"]) for name in include}
+        }
+        for row in rows
+    ]
+    
+    return FastJSONResponse({
+        "orders": orders,
+        "total": total,
+        "page": page,
+        "pageSize": page_size,
+        "totalPages": (total + page_size - 1) // page_size if total is not None else None,
+        "totalIsEstimate": count == "estimate",
+        "nextCursor": after
+    })
+
+@router.get("/export")
+async def export_orders(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    status: Optional[str] = Query(None),
+    location: Optional[str] = Query(None),
+    client_category: Optional[str] = Query(None),
+    urgency_level: Optional[str] = Query(None),
+    search: Optional[str] = Query(None),
+    db = Depends(get_db)
+):
+    """Stream every order matching the list filters as NDJSON or CSV"""
+    return export_response(
+        db.order,
+        _order_where(status, location, client_category, urgency_level, search),
+        "createdAt",
+        format,
+        ORDER_EXPORT_COLUMNS,
+        "orders",
+        include={
+            "currentKarigar": True,
+            "currentProcess": True
+        }
+    )
+
+@router.get("/search", response_model=OrderSearchResponse)
+async def search_orders_ranked(
+    q: str = Query(..., min_length=3, description="Order number, client name or description text"),
+    limit: int = Query(20, ge=1, le=100),
+    status: Optional[str] = Query(None),
+    location: Optional[str] = Query(None),
+    client_category: Optional[str] = Query(None),
+    urgency_level: Optional[str] = Query(None),
+    db = Depends(get_db)
+):
+    """Search orders by relevance using the trigram indexes"""
+    try:
+        orders = await search_orders(
+            db,
+            q,
+            {
+                "status": status,
+                "location": location,
+                "client_category": client_category,
+                "urgency_level": urgency_level
             },
-            order={"createdAt": "desc"}
+            limit
         )
         
-        return OrderListResponse(
-            orders=orders,
-            total=total,
-            page=page,
-            pageSize=page_size,
-            totalPages=total_pages
-        )
+        return FastJSONResponse({"query": q, "orders": orders})
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to fetch orders: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to search orders: {str(e)}")
+
+@router.get("/events")
+async def stream_order_events(
+    request: Request,
+    location: Optional[str] = Query(None),
+    karigar_id: Optional[str] = Query(None),
+    status: Optional[str] = Query(None),
+):
+    """Server-sent events for order changes matching the filters.
+    
+    Events are fanned out in process, so a client only hears about changes
+    made through the same server. Run one backend instance (main.py) for
+    the feed; the serverless entry answers this path with 501.
+    """
+    subscription = order_events.subscribe(location=location, karigar_id=karigar_id, status=status)
+    
+    async def event_stream():
+        try:
+            # Tell EventSource how long to wait before reconnecting
+            yield f"retry: {ORDER_EVENTS_RETRY_MS}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), ORDER_EVENTS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            order_events.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
-@router.get("/{order_id}", response_model=OrderResponse)
-async def get_order(order_id: str, db = Depends(get_db)):
+@router.get("/{order_id}", response_model=OrderDetailResponse)
+async def get_order(order_id: str, request: Request, response: Response, db = Depends(get_db)):
     """Get order by ID"""
     try:
-        order = await db.order.find_unique(
-            where={"id": order_id},
-            include={
-                "currentKarigar": True,
-                "currentProcess": True,
-                "statusHistory": {
-                    "include": {
-                        "karigar": True,
-                        "process": True
+        # The version covers the embedded history, job cards and master rows
+        # as well as the order, so a revalidation is answered before loading them
+        version = await get_order_version(db, order_id)
+        if not version:
+            raise HTTPException(status_code=404, detail="Order not found")
+        etag, last_modified = version
+        
+        not_modified = conditional_response(request, response, etag, RECORD_CACHE_CONTROL, last_modified)
+        if not_modified:
+            return not_modified
+        
+        history_where = {"orderId": order_id}
+        job_card_where = {"orderId": order_id}
+        
+        # Only the most recent history and job cards are loaded (one extra row
+        # tells whether there is more); counts run alongside
+        order, history_count, job_card_count = await asyncio.gather(
+            db.order.find_unique(
+                where={"id": order_id},
+                include={
+                    "currentKarigar": True,
+                    "currentProcess": True,
+                    "statusHistory": {
+                        "include": {
+                            "karigar": True,
+                            "process": True
+                        },
+                        "order_by": keyset_order("statusDate"),
+                        "take": DETAIL_HISTORY_LIMIT + 1
                     },
-                    "orderBy": {"statusDate": "desc"}
-                },
-                "jobCards": {
-                    "include": {
-                        "assignedKarigar": True,
-                        "assignedProcess": True
+                    "jobCards": {
+                        "include": {
+                            "assignedKarigar": True,
+                            "assignedProcess": True
+                        },
+                        "order_by": keyset_order("createdAt"),
+                        "take": DETAIL_JOB_CARD_LIMIT + 1
                     }
                 }
-            }
+            ),
+            db.orderstatushistory.count(where=history_where),
+            db.jobcard.count(where=job_card_where)
         )
         
         if not order:
             raise HTTPException(status_code=404, detail="Order not found")
         
-        return order
+        history = order.statusHistory or []
+        job_cards = order.jobCards or []
+        
+        return {
+            **order.model_dump(exclude={"statusHistory", "jobCards"}),
+            "statusHistory": history[:DETAIL_HISTORY_LIMIT],
+            "statusHistoryCount": history_count,
+            "statusHistoryNextCursor": next_cursor(history, DETAIL_HISTORY_LIMIT, "statusDate"),
+            "jobCards": job_cards[:DETAIL_JOB_CARD_LIMIT],
+            "jobCardsCount": job_card_count,
+            "jobCardsNextCursor": next_cursor(job_cards, DETAIL_JOB_CARD_LIMIT, "createdAt")
+        }
         
     except HTTPException:
         raise
@@ -189,15 +459,31 @@ async def update_order(order_id: str, order_update: OrderUpdate, db = Depends(ge
                 else:
                     update_data[field] = value
         
-        # Update the order
-        updated_order = await db.order.update(
-            where={"id": order_id},
-            data=update_data,
-            include={
-                "currentKarigar": True,
-                "currentProcess": True
-            }
-        )
+        # Update the order, moving it between counter buckets if urgency changed
+        async with db.tx() as transaction:
+            old_bucket = await lock_order_bucket(transaction, order_id)
+            
+            updated_order = await transaction.order.update(
+                where={"id": order_id},
+                data=update_data,
+                include={
+                    "currentKarigar": True,
+                    "currentProcess": True
+                }
+            )
+            
+            if old_bucket:
+                await move_order_counter(
+                    transaction,
+                    old_bucket,
+                    (updated_order.currentStatus, updated_order.currentLocation, updated_order.urgencyLevel)
+                )
+        
+        order_events.publish("updated", updated_order, {
+            "status": existing_order.currentStatus,
+            "location": existing_order.currentLocation,
+            "karigarId": existing_order.currentKarigarId
+        })
         
         return updated_order
         
@@ -230,6 +516,11 @@ async def update_order_status(order_id: str, status_update: OrderStatusUpdate, d
         
         # Update order and create status history in a transaction
         async with db.tx() as transaction:
+            # Lock the order so concurrent status changes apply one after another
+            old_bucket = await lock_order_bucket(transaction, order_id)
+            if not old_bucket:
+                raise HTTPException(status_code=404, detail="Order not found")
+            
             # Update order
             updated_order = await transaction.order.update(
                 where={"id": order_id},
@@ -244,15 +535,27 @@ async def update_order_status(order_id: str, status_update: OrderStatusUpdate, d
             await transaction.orderstatushistory.create(
                 data={
                     "orderId": order_id,
-                    "previousStatus": existing_order.currentStatus,
+                    "previousStatus": old_bucket[0],
                     "newStatus": status_update.newStatus.value,
                     "location": status_update.location.value,
                     "karigarId": status_update.karigarId,
                     "processId": status_update.processId,
                     "comments": status_update.comments,
-                    "changedBy": "User"  # TODO: Get from authentication context
+                    "changedBy": STATUS_CHANGED_BY
                 }
             )
+            
+            await move_order_counter(
+                transaction,
+                old_bucket,
+                (updated_order.currentStatus, updated_order.currentLocation, updated_order.urgencyLevel)
+            )
+        
+        order_events.publish("status", updated_order, {
+            "status": old_bucket[0],
+            "location": old_bucket[1],
+            "karigarId": existing_order.currentKarigarId
+        })
         
         return updated_order
         
@@ -261,32 +564,189 @@ async def update_order_status(order_id: str, status_update: OrderStatusUpdate, d
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update order status: {str(e)}")
 
+@router.post("/status/batch", response_model=OrderStatusBatchResponse)
+async def update_order_status_batch(batch: OrderStatusBatchUpdate, db = Depends(get_db)):
+    """Move many orders, or whole bags, to one status and location"""
+    try:
+        if bool(batch.orderIds) == bool(batch.bagNos):
+            raise HTTPException(status_code=400, detail="Give either orderIds or bagNos")
+        
+        column, keys = ("id", batch.orderIds) if batch.orderIds else ("bagNo", batch.bagNos)
+        
+        update_data = {
+            "currentStatus": batch.newStatus.value,
+            "currentLocation": batch.location.value,
+            "currentKarigarId": batch.karigarId,
+            "currentProcessId": batch.processId
+        }
+        
+        if batch.progressPercentage is not None:
+            update_data["progressPercentage"] = batch.progressPercentage
+        if batch.estimatedCompletion is not None:
+            update_data["estimatedCompletion"] = batch.estimatedCompletion
+        
+        async with db.tx() as transaction:
+            # One locking read gives every order's previous status
+            rows = await lock_order_buckets(transaction, column, keys)
+            
+            if rows:
+                await transaction.order.update_many(
+                    where={"id": {"in": [row["id"] for row in rows]}},
+                    data=update_data
+                )
+                
+                await transaction.orderstatushistory.create_many(
+                    data=[
+                        {
+                            "orderId": row["id"],
+                            "previousStatus": row["currentStatus"],
+                            "newStatus": batch.newStatus.value,
+                            "location": batch.location.value,
+                            "karigarId": batch.karigarId,
+                            "processId": batch.processId,
+                            "comments": batch.comments,
+                            "changedBy": STATUS_CHANGED_BY
+                        }
+                        for row in rows
+                    ]
+                )
+                
+                await move_order_counters(
+                    transaction,
+                    [
+                        (
+                            (row["currentStatus"], row["currentLocation"], row["urgencyLevel"]),
+                            (batch.newStatus.value, batch.location.value, row["urgencyLevel"])
+                        )
+                        for row in rows
+                    ]
+                )
+        
+        for row in rows:
+            order_events.publish("status", {
+                **row,
+                "currentStatus": batch.newStatus.value,
+                "currentLocation": batch.location.value,
+                "currentKarigarId": batch.karigarId,
+                "currentProcessId": batch.processId
+            }, {
+                "status": row["currentStatus"],
+                "location": row["currentLocation"],
+                "karigarId": row["currentKarigarId"]
+            })
+        
+        matched = {}
+        for row in rows:
+            matched.setdefault(row[column], []).append(row)
+        
+        results = []
+        for key in dict.fromkeys(keys):
+            if key not in matched:
+                results.append(OrderStatusBatchResult(
+                    key=key,
+                    success=False,
+                    error="Order not found" if column == "id" else "No orders in bag"
+                ))
+                continue
+            for row in matched[key]:
+                results.append(OrderStatusBatchResult(
+                    key=key,
+                    success=True,
+                    orderId=row["id"],
+                    orderNo=row["orderNo"],
+                    previousStatus=row["currentStatus"]
+                ))
+        
+        return OrderStatusBatchResponse(
+            updated=len(rows),
+            failed=sum(1 for result in results if not result.success),
+            results=results
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to update order statuses: {str(e)}")
+
 @router.get("/{order_id}/status-history", response_model=List[OrderStatusHistoryResponse])
-async def get_order_status_history(order_id: str, db = Depends(get_db)):
-    """Get order status history"""
+async def get_order_status_history(
+    order_id: str,
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor or statusHistoryNextCursor"),
+    count: str = Query("exact", pattern="^(exact|none)$", description="Total count mode for X-Total-Count"),
+    db = Depends(get_db)
+):
+    """Get order status history, newest first, one page at a time"""
     try:
         # Check if order exists
         existing_order = await db.order.find_unique(where={"id": order_id})
         if not existing_order:
             raise HTTPException(status_code=404, detail="Order not found")
         
-        # Get status history
-        history = await db.orderstatushistory.find_many(
-            where={"orderId": order_id},
-            include={
-                "karigar": True,
-                "process": True
-            },
-            order={"statusDate": "desc"}
+        where_clause = {"orderId": order_id}
+        
+        total, history = await asyncio.gather(
+            count_rows(db, db.orderstatushistory, "order_status_history", where_clause, count),
+            db.orderstatushistory.find_many(
+                where=keyset_where(where_clause, "statusDate", cursor),
+                take=limit + 1,
+                include={
+                    "karigar": True,
+                    "process": True
+                },
+                order=keyset_order("statusDate")
+            )
         )
         
-        return history
+        return FastJSONResponse(
+            history[:limit],
+            headers=paging_headers(history, limit, "statusDate", total, count)
+        )
         
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch status history: {str(e)}")
 
+@router.get("/{order_id}/job-cards")
+async def get_order_job_cards(
+    order_id: str,
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor or jobCardsNextCursor"),
+    count: str = Query("exact", pattern="^(exact|none)$", description="Total count mode for X-Total-Count"),
+    db = Depends(get_db)
+):
+    """Get the order's job cards, newest first, one page at a time"""
+    try:
+        existing_order = await db.order.find_unique(where={"id": order_id})
+        if not existing_order:
+            raise HTTPException(status_code=404, detail="Order not found")
+        
+        where_clause = {"orderId": order_id}
+        
+        total, job_cards = await asyncio.gather(
+            count_rows(db, db.jobcard, "job_cards", where_clause, count),
+            db.jobcard.find_many(
+                where=keyset_where(where_clause, "createdAt", cursor),
+                take=limit + 1,
+                include={
+                    "assignedKarigar": True,
+                    "assignedProcess": True
+                },
+                order=keyset_order("createdAt")
+            )
+        )
+        
+        return FastJSONResponse(
+            job_cards[:limit],
+            headers=paging_headers(job_cards, limit, "createdAt", total, count)
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch job cards: {str(e)}")
+
 @router.delete("/{order_id}")
 async def delete_order(order_id: str, db = Depends(get_db)):
     """Delete an order"""
@@ -306,11 +766,23 @@ async def delete_order(order_id: str, db = Depends(get_db)):
         
         # Delete order and its status history
         async with db.tx() as transaction:
+            bucket = await lock_order_bucket(transaction, order_id)
+            if not bucket:
+                raise HTTPException(status_code=404, detail="Order not found")
+            
             # Delete status history first
             await transaction.orderstatushistory.delete_many(where={"orderId": order_id})
             
             # Delete order
             await transaction.order.delete(where={"id": order_id})
+            
+            await adjust_order_counter(transaction, bucket, -1)
+        
+        order_events.publish("deleted", existing_order, {
+            "status": bucket[0],
+            "location": bucket[1],
+            "karigarId": existing_order.currentKarigarId
+        })
         
         return {"message": "Order deleted successfully"}
         
@@ -319,34 +791,16 @@ async def delete_order(order_id: str, db = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete order: {str(e)}")
 
-@router.get("/generate/number")
-async def generate_order_number(db = Depends(get_db)):
-    """Generate next available order number"""
+@router.post("/generate/number")
+async def generate_order_number(db = Depends(get_primary_db)):
+    """Reserve the next order number.
+    
+    A POST because every call uses up a number; an order created without
+    orderNo is numbered inside its own request instead.
+    """
     try:
-        # Get current date
-        today = datetime.now()
-        date_prefix = today.strftime("ORD-%Y%m%d-")
-        
-        # Find the highest order number for today
-        orders_today = await db.order.find_many(
-            where={
-                "orderNo": {
-                    "startswith": date_prefix
-                }
-            },
-            select={"orderNo": True},
-            order={"orderNo": "desc"},
-            take=1
-        )
-        
-        if orders_today:
-            # Extract the sequence number and increment
-            last_order_no = orders_today[0].orderNo
-            sequence = int(last_order_no.split("-")[-1]) + 1
-        else:
-            sequence = 1
-        
-        new_order_no = f"{date_prefix}{sequence:03d}"
+        # Reserved atomically, so two clerks never receive the same number
+        new_order_no = await allocate_document_number(db, "order")
         
         return {"orderNo": new_order_no}
         
@@ -357,47 +811,38 @@ async def generate_order_number(db = Depends(get_db)):
 async def get_order_dashboard(db = Depends(get_db)):
     """Get order dashboard statistics"""
     try:
-        # Get basic counts
-        total_orders = await db.order.count()
-        active_orders = await db.order.count(
-            where={
-                "currentStatus": {
-                    "not_in": [OrderStatus.DELIVERED.value, OrderStatus.CANCELLED.value]
-                }
-            }
-        )
-        completed_orders = await db.order.count(
-            where={"currentStatus": OrderStatus.DELIVERED.value}
-        )
-        on_hold_orders = await db.order.count(
-            where={"currentStatus": OrderStatus.ON_HOLD.value}
-        )
+        closed_statuses = [OrderStatus.DELIVERED.value, OrderStatus.CANCELLED.value]
+        today = datetime.now()
         
-        # Get urgent orders
-        urgent_orders = await db.order.count(
-            where={
-                "urgencyLevel": UrgencyLevel.URGENT.value,
-                "currentStatus": {
-                    "not_in": [OrderStatus.DELIVERED.value, OrderStatus.CANCELLED.value]
+        # Status/location/urgency numbers come from the maintained counters;
+        # only the delayed count depends on the clock and is queried directly
+        counters, delayed_orders = await asyncio.gather(
+            get_order_counters(db),
+            db.order.count(
+                where={
+                    "deliveryDate": {"lt": today},
+                    "currentStatus": {"not_in": closed_statuses}
                 }
-            }
+            )
         )
         
-        # Get delayed orders (delivery date passed and not delivered)
-        today = datetime.now()
-        delayed_orders = await db.order.count(
-            where={
-                "deliveryDate": {"lt": today},
-                "currentStatus": {
-                    "not_in": [OrderStatus.DELIVERED.value, OrderStatus.CANCELLED.value]
-                }
-            }
-        )
+        # Fold the counters into the headline numbers
+        status_counts = {}
+        urgent_orders = 0
+        for counter in counters:
+            status_counts[counter.status] = status_counts.get(counter.status, 0) + counter.count
+            if counter.urgencyLevel == UrgencyLevel.URGENT.value and counter.status not in closed_statuses:
+                urgent_orders += counter.count
+        
+        total_orders = sum(status_counts.values())
+        active_orders = total_orders - sum(status_counts.get(s, 0) for s in closed_statuses)
+        completed_orders = status_counts.get(OrderStatus.DELIVERED.value, 0)
+        on_hold_orders = status_counts.get(OrderStatus.ON_HOLD.value, 0)
         
         # Get status statistics
         status_stats = []
         for status in OrderStatus:
-            count = await db.order.count(where={"currentStatus": status.value})
+            count = status_counts.get(status.value, 0)
             percentage = (count / total_orders * 100) if total_orders > 0 else 0
             status_stats.append({
                 "status": status.value,
@@ -416,4 +861,15 @@ async def get_order_dashboard(db = Depends(get_db)):
         )
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to fetch dashboard stats: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to fetch dashboard stats: {str(e)}")
+
+@router.post("/dashboard/counters/rebuild")
+async def rebuild_dashboard_counters(db = Depends(get_db)):
+    """Rebuild the dashboard counters from the orders table"""
+    try:
+        buckets = await rebuild_order_counters(db)
+        
+        return {"message": "Dashboard counters rebuilt", "buckets": buckets}
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to rebuild dashboard counters: {str(e)}")
\ No newline at end of file
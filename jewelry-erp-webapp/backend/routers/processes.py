@@ -1,25 +1,29 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
 from typing import List, Optional
 from database import get_db
+from services.master_data import master_data
+from http_cache import MASTER_DATA_CACHE_CONTROL, conditional_response
 from prisma import Prisma
 
 router = APIRouter()
 
 @router.get("/")
 async def get_processes(
+    request: Request,
+    response: Response,
     active: Optional[bool] = Query(True),
     db: Prisma = Depends(get_db)
 ):
     """Get all processes"""
     try:
-        where_clause = {}
-        if active is not None:
-            where_clause["active"] = active
+        # The table's stamp, checked against the database, answers revalidations
+        etag, processes = await master_data.list_all(db, "process")
+        not_modified = conditional_response(request, response, etag, MASTER_DATA_CACHE_CONTROL)
+        if not_modified:
+            return not_modified
         
-        processes = await db.process.find_many(
-            where=where_clause,
-            order={"name": "asc"}
-        )
+        if active is not None:
+            processes = [p for p in processes if p.active == active]
         
         return processes
         
@@ -1,86 +1,244 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
 from typing import List, Optional
 from datetime import datetime
-from database import get_db
-from schemas.receipt import ReceiptCreate, ReceiptUpdate, ReceiptResponse
+import asyncio
+import json
+from database import get_db, get_primary_db
+from pagination import keyset_where, keyset_order, paging_headers, count_rows
+from serialization import FastJSONResponse
+from fieldsets import parse_fields, parse_expand, project_rows
+from services.stock_ledger import append_stock_entry, append_stock_entries, stock_entry
+from services.issue_receipts import lock_issue, lock_receipt, adjust_issue_received
+from services.document_numbers import allocate_document_number, allocate_document_numbers
+from services.exports import export_response
+from services.receipt_import import (
+    MAX_IMPORT_ROWS,
+    parse_csv_rows,
+    validate_rows,
+    load_issues,
+    plan_import,
+    apply_issue_deltas
+)
+from schemas.receipt import (
+    ReceiptCreate,
+    ReceiptUpdate,
+    ReceiptResponse,
+    ReceiptImportRowResult,
+    ReceiptImportResponse
+)
 from prisma import Prisma
 
 router = APIRouter()
 
+# Scalar fields and relations a list request may ask for with fields=/expand=
+RECEIPT_FIELDS = (
+    "id", "receiptNo", "receiptDate", "issueId", "karigarId", "pieces",
+    "grossWeight", "stoneWeight", "wastageWeight", "netWeight", "remarks",
+    "createdAt", "updatedAt"
+)
+RECEIPT_RELATIONS = ("issue", "karigar")
+
+# Columns written by the CSV export; dotted names read the included relations
+RECEIPT_EXPORT_COLUMNS = [
+    "id", "receiptNo", "receiptDate", "issue.issueNo", "karigar.code", "karigar.name",
+    "pieces", "grossWeight", "stoneWeight", "wastageWeight", "netWeight",
+    "remarks", "createdAt", "updatedAt"
+]
+
+def _receipt_where(issue_id: Optional[str], karigar_id: Optional[str]) -> dict:
+    """Build the where clause shared by the receipt list and export"""
+    where_clause = {}
+    
+    if issue_id:
+        where_clause["issueId"] = issue_id
+    
+    if karigar_id:
+        where_clause["karigarId"] = karigar_id
+    
+    return where_clause
+
 @router.post("/", response_model=ReceiptResponse)
 async def create_receipt(receipt: ReceiptCreate, db: Prisma = Depends(get_db)):
     """Create a new receipt"""
     try:
-        # Check if issue exists
-        issue = await db.issue.find_unique(
-            where={"id": receipt.issue_id},
-            include={"receipts": True}
-        )
-        if not issue:
-            raise HTTPException(status_code=404, detail="Issue not found")
-        
-        # Calculate existing receipts total
-        existing_receipts_total = sum(r.netWeight for r in issue.receipts)
-        
         # Calculate net weight for new receipt
         net_weight = receipt.gross_weight - receipt.stone_weight - receipt.wastage_weight
         
-        # Check if total receipts would exceed issue amount
-        total_with_new = existing_receipts_total + net_weight
-        if total_with_new > issue.netWeight * 1.01:  # Allow 1% tolerance
-            raise HTTPException(
-                status_code=400,
-                detail=f"Receipt amount exceeds issue amount. "
-                       f"Issue: {issue.netWeight}g, "
-                       f"Already received: {existing_receipts_total}g, "
-                       f"Trying to receive: {net_weight}g"
+        # Numbered before the issue is locked, like the import
+        receipt_no = receipt.receipt_no or await allocate_document_number(db, "receipt")
+        
+        # Lock the issue so concurrent receipts against it are checked one at a
+        # time, then record the receipt, issue totals and stock entry together
+        async with db.tx() as transaction:
+            issue = await lock_issue(transaction, receipt.issue_id)
+            if not issue:
+                raise HTTPException(status_code=404, detail="Issue not found")
+            
+            # Checks the 1% tolerance and updates the issue status
+            await adjust_issue_received(
+                transaction,
+                issue,
+                receipt.gross_weight,
+                net_weight,
+                receipt.wastage_weight
+            )
+            
+            created_receipt = await transaction.receipt.create(
+                data={
+                    "receiptNo": receipt_no,
+                    "receiptDate": receipt.receipt_date,
+                    "issueId": receipt.issue_id,
+                    "karigarId": issue["karigarId"],
+                    "pieces": receipt.pieces,
+                    "grossWeight": receipt.gross_weight,
+                    "stoneWeight": receipt.stone_weight,
+                    "wastageWeight": receipt.wastage_weight,
+                    "netWeight": net_weight,
+                    "remarks": receipt.remarks
+                },
+                include={
+                    "issue": True,
+                    "karigar": True
+                }
+            )
+            
+            await append_stock_entry(
+                transaction,
+                "Receipt",
+                created_receipt.id,
+                receipt.receipt_date,
+                gross_in=receipt.gross_weight,
+                net_in=net_weight
             )
         
-        # Create receipt
-        created_receipt = await db.receipt.create(
-            data={
-                "receiptNo": receipt.receipt_no,
-                "receiptDate": receipt.receipt_date,
-                "issueId": receipt.issue_id,
-                "karigarId": issue.karigarId,
-                "pieces": receipt.pieces,
-                "grossWeight": receipt.gross_weight,
-                "stoneWeight": receipt.stone_weight,
-                "wastageWeight": receipt.wastage_weight,
-                "netWeight": net_weight,
-                "remarks": receipt.remarks
-            },
-            include={
-                "issue": True,
-                "karigar": True
-            }
-        )
+        # Prisma rows are camelCase; encode directly like the list endpoint
+        return FastJSONResponse(created_receipt)
         
-        # Update issue status
-        new_total = existing_receipts_total + net_weight
-        if abs(new_total - issue.netWeight) < 0.001:
-            new_status = "Completed"
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/import", response_model=ReceiptImportResponse)
+async def import_receipts(
+    request: Request,
+    dry_run: bool = Query(False, description="Validate only; nothing is written"),
+    db: Prisma = Depends(get_db)
+):
+    """Import a day's receipts from a CSV sheet (text/csv) or a JSON array"""
+    try:
+        body = await request.body()
+        if "csv" in request.headers.get("content-type", ""):
+            records = parse_csv_rows(body.decode("utf-8-sig"))
         else:
-            new_status = "Partial"
-        
-        await db.issue.update(
-            where={"id": receipt.issue_id},
-            data={"status": new_status}
+            records = json.loads(body or b"[]")
+            if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+                raise HTTPException(status_code=400, detail="Expected a JSON array of receipts")
+        
+        if len(records) > MAX_IMPORT_ROWS:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_IMPORT_ROWS} rows per import")
+        
+        rows, errors = validate_rows(records)
+        
+        # Receipt numbers already in use, in one query
+        receipt_nos = list({row.receipt_no for _, row in rows if row.receipt_no})
+        existing = await db.receipt.find_many(where={"receiptNo": {"in": receipt_nos}}) if receipt_nos else []
+        taken_receipt_nos = {r.receiptNo for r in existing}
+        issue_ids = [row.issue_id for _, row in rows]
+        
+        receipt_ids = {}
+        numbers = {}
+        if dry_run:
+            issues = await load_issues(db, issue_ids)
+            accepted, row_errors, _ = plan_import(rows, issues, taken_receipt_nos)
+        else:
+            # Allocate numbers for rows without one in a single block before the
+            # transaction opens: the counter is not held while the issues are
+            # locked, and no second pooled connection is needed meanwhile.
+            # Rows rejected below leave gaps, as failed creates already do.
+            unnumbered = [index for index, row in rows if not row.receipt_no]
+            if unnumbered:
+                block = await allocate_document_numbers(db, "receipt", len(unnumbered))
+                numbers = dict(zip(unnumbered, block))
+            
+            # Lock every referenced issue, then check and write the whole batch
+            async with db.tx() as transaction:
+                issues = await load_issues(transaction, issue_ids, lock=True)
+                accepted, row_errors, deltas = plan_import(rows, issues, taken_receipt_nos)
+                
+                if accepted:
+                    data = [
+                        {
+                            "receiptNo": row.receipt_no or numbers[index],
+                            "receiptDate": row.receipt_date,
+                            "issueId": row.issue_id,
+                            "karigarId": issues[row.issue_id]["karigarId"],
+                            "pieces": row.pieces,
+                            "grossWeight": row.gross_weight,
+                            "stoneWeight": row.stone_weight,
+                            "wastageWeight": row.wastage_weight,
+                            "netWeight": net_weight,
+                            "remarks": row.remarks
+                        }
+                        for index, row, net_weight in accepted
+                    ]
+                    
+                    await transaction.receipt.create_many(data=data)
+                    created = await transaction.receipt.find_many(
+                        where={"receiptNo": {"in": [d["receiptNo"] for d in data]}}
+                    )
+                    receipt_ids = {r.receiptNo: r.id for r in created}
+                    
+                    await apply_issue_deltas(transaction, issues, deltas)
+                    await append_stock_entries(
+                        transaction,
+                        [
+                            stock_entry(
+                                "Receipt",
+                                receipt_ids[d["receiptNo"]],
+                                d["receiptDate"],
+                                gross_in=d["grossWeight"],
+                                net_in=d["netWeight"]
+                            )
+                            for d in data
+                        ]
+                    )
+        
+        errors.update(row_errors)
+        results = [
+            ReceiptImportRowResult(
+                index=index,
+                success=True,
+                receipt_id=receipt_ids.get(row.receipt_no or numbers.get(index)),
+                receipt_no=row.receipt_no or numbers.get(index),
+                issue_id=row.issue_id,
+                net_weight=net_weight
+            )
+            for index, row, net_weight in accepted
+        ]
+        results.extend(
+            ReceiptImportRowResult(
+                index=index,
+                success=False,
+                receipt_no=records[index].get("receipt_no"),
+                issue_id=records[index].get("issue_id"),
+                error=error
+            )
+            for index, error in errors.items()
         )
+        results.sort(key=lambda result: result.index)
         
-        # Create stock register entry
-        await db.stockregister.create(
-            data={
-                "transactionType": "Receipt",
-                "transactionId": created_receipt.id,
-                "transactionDate": receipt.receipt_date,
-                "grossWeightIn": receipt.gross_weight,
-                "netWeightIn": net_weight
-            }
+        return ReceiptImportResponse(
+            dry_run=dry_run,
+            accepted=len(accepted),
+            rejected=len(errors),
+            results=results
         )
         
-        return created_receipt
-        
+    except HTTPException:
+        raise
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -90,34 +248,62 @@ async def get_receipts(
     limit: int = Query(50, ge=1, le=100),
     issue_id: Optional[str] = Query(None),
     karigar_id: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor; overrides skip"),
+    count: str = Query("none", pattern="^(exact|estimate|none)$", description="Total count mode for X-Total-Count"),
+    fields: Optional[str] = Query(None, description="Comma-separated receipt fields to return (id is always included)"),
+    expand: Optional[str] = Query(None, description="Comma-separated relations to include: issue, karigar"),
     db: Prisma = Depends(get_db)
 ):
     """Get all receipts with optional filtering"""
     try:
-        where_clause = {}
-        
-        if issue_id:
-            where_clause["issueId"] = issue_id
-        
-        if karigar_id:
-            where_clause["karigarId"] = karigar_id
-        
-        receipts = await db.receipt.find_many(
-            where=where_clause,
-            skip=skip,
-            take=limit,
-            include={
-                "issue": True,
-                "karigar": True
-            },
-            order={"receiptDate": "desc"}
+        selected = parse_fields(fields, RECEIPT_FIELDS)
+        include = parse_expand(expand, RECEIPT_RELATIONS, RECEIPT_RELATIONS)
+        where_clause = _receipt_where(issue_id, karigar_id)
+        
+        total, receipts = await asyncio.gather(
+            count_rows(db, db.receipt, "receipts", where_clause, count),
+            db.receipt.find_many(
+                where=keyset_where(where_clause, "receiptDate", cursor),
+                skip=0 if cursor else skip,
+                take=limit + 1,
+                include=include or None,
+                order=keyset_order("receiptDate")
+            )
         )
         
-        return receipts
+        # Paging metadata travels in headers so the body stays a plain list;
+        # rows are encoded straight from Prisma without re-validation
+        return FastJSONResponse(
+            project_rows(receipts[:limit], selected, include, RECEIPT_FIELDS),
+            headers=paging_headers(receipts, limit, "receiptDate", total, count)
+        )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/export")
+async def export_receipts(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    issue_id: Optional[str] = Query(None),
+    karigar_id: Optional[str] = Query(None),
+    db: Prisma = Depends(get_db)
+):
+    """Stream every receipt matching the list filters as NDJSON or CSV"""
+    return export_response(
+        db.receipt,
+        _receipt_where(issue_id, karigar_id),
+        "receiptDate",
+        format,
+        RECEIPT_EXPORT_COLUMNS,
+        "receipts",
+        include={
+            "issue": True,
+            "karigar": True
+        }
+    )
+
 @router.get("/{receipt_id}", response_model=ReceiptResponse)
 async def get_receipt(receipt_id: str, db: Prisma = Depends(get_db)):
     """Get a specific receipt by ID"""
@@ -142,11 +328,6 @@ async def get_receipt(receipt_id: str, db: Prisma = Depends(get_db)):
 async def update_receipt(receipt_id: str, receipt_update: ReceiptUpdate, db: Prisma = Depends(get_db)):
     """Update an existing receipt"""
     try:
-        # Check if receipt exists
-        existing_receipt = await db.receipt.find_unique(where={"id": receipt_id})
-        if not existing_receipt:
-            raise HTTPException(status_code=404, detail="Receipt not found")
-        
         # Prepare update data
         update_data = {}
         for field, value in receipt_update.dict(exclude_unset=True).items():
@@ -169,25 +350,89 @@ async def update_receipt(receipt_id: str, receipt_update: ReceiptUpdate, db: Pri
             else:
                 update_data[field] = value
         
-        # Recalculate net weight if weights changed
-        if any(key in update_data for key in ["grossWeight", "stoneWeight", "wastageWeight"]):
-            gross_weight = update_data.get("grossWeight", existing_receipt.grossWeight)
-            stone_weight = update_data.get("stoneWeight", existing_receipt.stoneWeight)
-            wastage_weight = update_data.get("wastageWeight", existing_receipt.wastageWeight)
-            update_data["netWeight"] = gross_weight - stone_weight - wastage_weight
-        
-        # Update receipt
-        updated_receipt = await db.receipt.update(
-            where={"id": receipt_id},
-            data=update_data,
-            include={
-                "issue": True,
-                "karigar": True
-            }
-        )
+        # Update receipt, move its weights between issue totals and correct
+        # the stock register together
+        async with db.tx() as transaction:
+            # The old weights come from the locked row, so concurrent updates
+            # of this receipt each subtract what the other one wrote
+            existing_receipt = await lock_receipt(transaction, receipt_id)
+            if not existing_receipt:
+                raise HTTPException(status_code=404, detail="Receipt not found")
+            
+            # Recalculate net weight if weights changed
+            if any(key in update_data for key in ["grossWeight", "stoneWeight", "wastageWeight"]):
+                gross_weight = update_data.get("grossWeight", existing_receipt.grossWeight)
+                stone_weight = update_data.get("stoneWeight", existing_receipt.stoneWeight)
+                wastage_weight = update_data.get("wastageWeight", existing_receipt.wastageWeight)
+                update_data["netWeight"] = gross_weight - stone_weight - wastage_weight
+            
+            old_issue_id = existing_receipt.issueId
+            new_issue_id = update_data.get("issueId", old_issue_id)
+            new_gross = update_data.get("grossWeight", existing_receipt.grossWeight)
+            new_net = update_data.get("netWeight", existing_receipt.netWeight)
+            new_wastage = update_data.get("wastageWeight", existing_receipt.wastageWeight)
+            
+            # Lock in id order so two updates touching the same issues cannot deadlock
+            issues = {}
+            for issue_id in sorted({old_issue_id, new_issue_id}):
+                issues[issue_id] = await lock_issue(transaction, issue_id)
+            if not issues[new_issue_id]:
+                raise HTTPException(status_code=404, detail="Issue not found")
+            
+            if issues[old_issue_id]:
+                await adjust_issue_received(
+                    transaction,
+                    issues[old_issue_id],
+                    -existing_receipt.grossWeight,
+                    -existing_receipt.netWeight,
+                    -existing_receipt.wastageWeight,
+                    check_tolerance=False
+                )
+            await adjust_issue_received(
+                transaction,
+                issues[new_issue_id],
+                new_gross,
+                new_net,
+                new_wastage
+            )
+            
+            updated_receipt = await transaction.receipt.update(
+                where={"id": receipt_id},
+                data=update_data,
+                include={
+                    "issue": True,
+                    "karigar": True
+                }
+            )
+            
+            # Reverse the receipt's register entry on its old date and enter
+            # it again as it now stands
+            if (
+                new_gross != existing_receipt.grossWeight
+                or new_net != existing_receipt.netWeight
+                or updated_receipt.receiptDate != existing_receipt.receiptDate
+            ):
+                await append_stock_entries(transaction, [
+                    stock_entry(
+                        "Receipt",
+                        receipt_id,
+                        existing_receipt.receiptDate,
+                        gross_out=existing_receipt.grossWeight,
+                        net_out=existing_receipt.netWeight
+                    ),
+                    stock_entry(
+                        "Receipt",
+                        receipt_id,
+                        updated_receipt.receiptDate,
+                        gross_in=new_gross,
+                        net_in=new_net
+                    )
+                ])
         
         return updated_receipt
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -195,60 +440,53 @@ async def update_receipt(receipt_id: str, receipt_update: ReceiptUpdate, db: Pri
 async def delete_receipt(receipt_id: str, db: Prisma = Depends(get_db)):
     """Delete a receipt"""
     try:
-        # Check if receipt exists
-        receipt = await db.receipt.find_unique(where={"id": receipt_id})
-        if not receipt:
-            raise HTTPException(status_code=404, detail="Receipt not found")
-        
-        # Delete the receipt
-        await db.receipt.delete(where={"id": receipt_id})
-        
-        # Update issue status
-        issue = await db.issue.find_unique(
-            where={"id": receipt.issueId},
-            include={"receipts": True}
-        )
-        
-        if issue:
-            total_received = sum(r.netWeight for r in issue.receipts)
-            if total_received == 0:
-                new_status = "Pending"
-            elif abs(total_received - issue.netWeight) < 0.001:
-                new_status = "Completed"
-            else:
-                new_status = "Partial"
+        # Delete the receipt, take it off the issue totals and reverse its
+        # stock register entry together
+        async with db.tx() as transaction:
+            receipt = await lock_receipt(transaction, receipt_id)
+            if not receipt:
+                raise HTTPException(status_code=404, detail="Receipt not found")
             
-            await db.issue.update(
-                where={"id": receipt.issueId},
-                data={"status": new_status}
+            issue = await lock_issue(transaction, receipt.issueId)
+            
+            await transaction.receipt.delete(where={"id": receipt_id})
+            
+            if issue:
+                await adjust_issue_received(
+                    transaction,
+                    issue,
+                    -receipt.grossWeight,
+                    -receipt.netWeight,
+                    -receipt.wastageWeight,
+                    check_tolerance=False
+                )
+            
+            await append_stock_entry(
+                transaction,
+                "Receipt",
+                receipt_id,
+                receipt.receiptDate,
+                gross_out=receipt.grossWeight,
+                net_out=receipt.netWeight
             )
         
         return {"message": "Receipt deleted successfully"}
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/generate/number")
-async def generate_receipt_number(db: Prisma = Depends(get_db)):
-    """Generate a new receipt number"""
+@router.post("/generate/number")
+async def generate_receipt_number(db: Prisma = Depends(get_primary_db)):
+    """Reserve a new receipt number.
+    
+    A POST because every call uses up a number; a receipt created without
+    receipt_no is numbered inside its own request instead.
+    """
     try:
-        today = datetime.now()
-        date_str = today.strftime("%Y%m%d")
-        prefix = f"RCP-{date_str}-"
-        
-        # Find the last receipt number for today
-        last_receipt = await db.receipt.find_first(
-            where={"receiptNo": {"startswith": prefix}},
-            order={"receiptNo": "desc"}
-        )
-        
-        if last_receipt:
-            last_num = int(last_receipt.receiptNo.split("-")[-1])
-            new_num = last_num + 1
-        else:
-            new_num = 1
-        
-        return {"receipt_number": f"{prefix}{new_num:03d}"}
+        # Reserved atomically, so two clerks never receive the same number
+        return {"receipt_number": await allocate_document_number(db, "receipt")}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -257,30 +495,27 @@ async def generate_receipt_number(db: Prisma = Depends(get_db)):
 async def get_issue_receipt_summary(issue_id: str, db: Prisma = Depends(get_db)):
     """Get receipt summary for a specific issue"""
     try:
-        issue = await db.issue.find_unique(
-            where={"id": issue_id},
-            include={"receipts": True}
+        # Received totals are kept on the issue; only the receipt count is queried
+        issue, total_receipts = await asyncio.gather(
+            db.issue.find_unique(where={"id": issue_id}),
+            db.receipt.count(where={"issueId": issue_id})
         )
         
         if not issue:
             raise HTTPException(status_code=404, detail="Issue not found")
         
-        total_receipts = len(issue.receipts)
-        total_gross_received = sum(r.grossWeight for r in issue.receipts)
-        total_net_received = sum(r.netWeight for r in issue.receipts)
-        total_wastage = sum(r.wastageWeight for r in issue.receipts)
-        balance = issue.netWeight - total_net_received
-        
         return {
             "issue_id": issue_id,
             "issue_net_weight": issue.netWeight,
             "total_receipts": total_receipts,
-            "total_gross_received": total_gross_received,
-            "total_net_received": total_net_received,
-            "total_wastage": total_wastage,
-            "balance": balance,
+            "total_gross_received": issue.receivedGross,
+            "total_net_received": issue.receivedNet,
+            "total_wastage": issue.receivedWastage,
+            "balance": issue.netWeight - issue.receivedNet,
             "status": issue.status
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
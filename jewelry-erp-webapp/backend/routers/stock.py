@@ -0,0 +1,68 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Optional
+from datetime import datetime, timezone
+from database import get_db
+from services.stock_ledger import get_stock_balance, rebuild_stock_ledger
+from services.exports import export_response
+from prisma import Prisma
+
+router = APIRouter()
+
+STOCK_EXPORT_COLUMNS = [
+    "id", "transactionType", "transactionId", "transactionDate",
+    "grossWeightIn", "grossWeightOut", "netWeightIn", "netWeightOut",
+    "balanceGross", "balanceNet", "createdAt"
+]
+
+@router.get("/balance")
+async def get_balance(
+    as_of: Optional[datetime] = Query(None, description="Balance as of this date (defaults to now)"),
+    db: Prisma = Depends(get_db)
+):
+    """Get stock in hand as of a date"""
+    try:
+        return await get_stock_balance(db, as_of or datetime.now(timezone.utc))
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/rebuild")
+async def rebuild_ledger(db: Prisma = Depends(get_db)):
+    """Recompute running balances and snapshots for the whole stock register"""
+    try:
+        entries = await rebuild_stock_ledger(db)
+        
+        return {"message": "Stock ledger rebuilt", "entries": entries}
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/register/export")
+async def export_register(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    transaction_type: Optional[str] = Query(None, description="Issue or Receipt"),
+    date_from: Optional[datetime] = Query(None, description="Transaction date on or after"),
+    date_to: Optional[datetime] = Query(None, description="Transaction date before"),
+    db: Prisma = Depends(get_db)
+):
+    """Stream the stock register in entry order as NDJSON or CSV"""
+    where_clause = {}
+    
+    if transaction_type:
+        where_clause["transactionType"] = transaction_type
+    
+    if date_from or date_to:
+        where_clause["transactionDate"] = {}
+        if date_from:
+            where_clause["transactionDate"]["gte"] = date_from
+        if date_to:
+            where_clause["transactionDate"]["lt"] = date_to
+    
+    return export_response(
+        db.stockregister,
+        where_clause,
+        "createdAt",
+        format,
+        STOCK_EXPORT_COLUMNS,
+        "stock-register"
+    )
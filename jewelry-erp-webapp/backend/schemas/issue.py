@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class IssueBase(BaseModel):
@@ -15,7 +15,25 @@ class IssueBase(BaseModel):
     remarks: Optional[str] = Field(None, description="Additional remarks")
 
 class IssueCreate(IssueBase):
-    pass
+    issue_no: Optional[str] = Field(None, description="Unique issue number; allocated when omitted")
+
+class IssueBulkItem(IssueBase):
+    issue_no: Optional[str] = Field(None, description="Unique issue number; allocated when omitted")
+
+class IssueBulkCreate(BaseModel):
+    issues: List[IssueBulkItem] = Field(..., min_length=1, max_length=500)
+
+class IssueBulkRowResult(BaseModel):
+    index: int
+    success: bool
+    issue_id: Optional[str] = None
+    issue_no: Optional[str] = None
+    error: Optional[str] = None
+
+class IssueBulkResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[IssueBulkRowResult]
 
 class IssueUpdate(BaseModel):
     issue_no: Optional[str] = None
@@ -30,14 +48,27 @@ class IssueUpdate(BaseModel):
     remarks: Optional[str] = None
     status: Optional[str] = None
 
-class IssueResponse(IssueBase):
+class IssueResponse(BaseModel):
+    # Issue rows are returned as Prisma stores them, in camelCase
     id: str
+    issueNo: str
+    issueDate: datetime
+    karigarId: str
+    processId: str
+    designId: Optional[str] = None
+    pieces: int
+    grossWeight: float
+    stoneWeight: float
+    netWeight: float
+    remarks: Optional[str] = None
     status: str
-    created_at: datetime
-    updated_at: datetime
+    receivedGross: float = 0
+    receivedNet: float = 0
+    receivedWastage: float = 0
+    createdAt: datetime
+    updatedAt: datetime
+    
+    # Related data
     karigar: Optional[dict] = None
     process: Optional[dict] = None
     design: Optional[dict] = None
-
-    class Config:
-        from_attributes = True
\ No newline at end of file
@@ -63,7 +63,7 @@ class Location(str, Enum):
     KARIGAR = "KARIGAR"
 
 class OrderCreate(BaseModel):
-    orderNo: str = Field(..., description="Unique order number")
+    orderNo: Optional[str] = Field(None, description="Unique order number; allocated when omitted")
     bagNo: Optional[str] = Field(None, description="Alternative reference number")
     clientName: str = Field(..., description="Customer name")
     clientCategory: ClientCategory = Field(ClientCategory.RETAIL, description="Customer category")
@@ -115,6 +115,24 @@ class OrderStatusUpdate(BaseModel):
     progressPercentage: Optional[float] = Field(None, ge=0, le=100, description="Progress percentage")
     estimatedCompletion: Optional[datetime] = Field(None, description="Estimated completion date")
 
+class OrderStatusBatchUpdate(OrderStatusUpdate):
+    # Give either orderIds or bagNos; a bag number selects every order in the bag
+    orderIds: Optional[List[str]] = Field(None, min_length=1, max_length=500, description="Orders to move")
+    bagNos: Optional[List[str]] = Field(None, min_length=1, max_length=100, description="Bags whose orders to move")
+
+class OrderStatusBatchResult(BaseModel):
+    key: str
+    success: bool
+    orderId: Optional[str] = None
+    orderNo: Optional[str] = None
+    previousStatus: Optional[str] = None
+    error: Optional[str] = None
+
+class OrderStatusBatchResponse(BaseModel):
+    updated: int
+    failed: int
+    results: List[OrderStatusBatchResult]
+
 class OrderResponse(BaseModel):
     id: str
     orderNo: str
@@ -162,12 +180,28 @@ class OrderStatusHistoryResponse(BaseModel):
     karigar: Optional[dict] = None
     process: Optional[dict] = None
 
+class OrderDetailResponse(OrderResponse):
+    # Most recent slices only; the cursors continue on the paginated
+    # /status-history and /job-cards endpoints
+    statusHistory: List[OrderStatusHistoryResponse] = []
+    statusHistoryCount: int = 0
+    statusHistoryNextCursor: Optional[str] = None
+    jobCards: List[dict] = []
+    jobCardsCount: int = 0
+    jobCardsNextCursor: Optional[str] = None
+
 class OrderListResponse(BaseModel):
     orders: List[OrderResponse]
-    total: int
+    total: Optional[int]
     page: int
     pageSize: int
-    totalPages: int
+    totalPages: Optional[int]
+    totalIsEstimate: bool = False
+    nextCursor: Optional[str] = None
+
+class OrderSearchResponse(BaseModel):
+    query: str
+    orders: List[OrderResponse]
 
 class OrderStatusStats(BaseModel):
     status: str
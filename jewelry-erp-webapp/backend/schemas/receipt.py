@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class ReceiptBase(BaseModel):
@@ -13,7 +13,25 @@ class ReceiptBase(BaseModel):
     remarks: Optional[str] = Field(None, description="Additional remarks")
 
 class ReceiptCreate(ReceiptBase):
-    pass
+    receipt_no: Optional[str] = Field(None, description="Unique receipt number; allocated when omitted")
+
+class ReceiptImportRow(ReceiptBase):
+    receipt_no: Optional[str] = Field(None, description="Unique receipt number; allocated when omitted")
+
+class ReceiptImportRowResult(BaseModel):
+    index: int
+    success: bool
+    receipt_id: Optional[str] = None
+    receipt_no: Optional[str] = None
+    issue_id: Optional[str] = None
+    net_weight: Optional[float] = None
+    error: Optional[str] = None
+
+class ReceiptImportResponse(BaseModel):
+    dry_run: bool
+    accepted: int
+    rejected: int
+    results: List[ReceiptImportRowResult]
 
 class ReceiptUpdate(BaseModel):
     receipt_no: Optional[str] = None
@@ -27,14 +45,22 @@ class ReceiptUpdate(BaseModel):
     net_weight: Optional[float] = None
     remarks: Optional[str] = None
 
-class ReceiptResponse(ReceiptBase):
+class ReceiptResponse(BaseModel):
+    # Receipt rows are returned as Prisma stores them, in camelCase
     id: str
-    karigar_id: str
-    net_weight: float
-    created_at: datetime
-    updated_at: datetime
+    receiptNo: str
+    receiptDate: datetime
+    issueId: str
+    karigarId: str
+    pieces: int
+    grossWeight: float
+    stoneWeight: float
+    wastageWeight: float
+    netWeight: float
+    remarks: Optional[str] = None
+    createdAt: datetime
+    updatedAt: datetime
+    
+    # Related data
     issue: Optional[dict] = None
     karigar: Optional[dict] = None
-
-    class Config:
-        from_attributes = True
\ No newline at end of file
@@ -0,0 +1,23 @@
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from typing import Any
+import orjson
+
+def encode_model(value: Any):
+    # Prisma records are pydantic models whose __dict__ holds exactly their
+    # fields; handing it to orjson skips a model_dump()/re-validation pass,
+    # and nested relations come back through here
+    if isinstance(value, BaseModel):
+        return value.__dict__
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+class FastJSONResponse(ORJSONResponse):
+    """orjson response that also encodes Prisma/pydantic models directly.
+    
+    Returning one from a handler bypasses FastAPI's response_model
+    validation and jsonable_encoder, so use it for rows that come straight
+    from the database with the shape the client expects.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=encode_model, option=orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1 @@
+# Business Services
\ No newline at end of file
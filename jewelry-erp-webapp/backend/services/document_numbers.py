@@ -0,0 +1,38 @@
+from typing import List, Optional
+from datetime import datetime
+
+# Prefix of each document number: <PREFIX>-<YYYYMMDD>-<sequence>
+DOCUMENT_PREFIXES = {
+    "order": "ORD",
+    "issue": "ISS",
+    "receipt": "RCP"
+}
+
+async def allocate_document_numbers(db, document_type: str, count: int = 1, today: Optional[datetime] = None) -> List[str]:
+    """Reserve count consecutive numbers for a document type and day.
+    
+    The per-(type, day) counter is bumped by a single upsert, so concurrent
+    callers always receive disjoint numbers. Numbers that end up unused are
+    simply skipped, like a database sequence. Pass the base client rather
+    than an open transaction so the counter row is not held until commit.
+    """
+    prefix = DOCUMENT_PREFIXES[document_type]
+    day = (today or datetime.now()).strftime("%Y%m%d")
+    
+    rows = await db.query_raw(
+        'INSERT INTO document_sequences ("documentType", "day", "lastValue", "updatedAt") '
+        'VALUES ($1, $2, $3, NOW()) '
+        'ON CONFLICT ("documentType", "day") DO UPDATE SET '
+        '"lastValue" = document_sequences."lastValue" + EXCLUDED."lastValue", '
+        '"updatedAt" = NOW() '
+        'RETURNING "lastValue"',
+        prefix,
+        day,
+        count
+    )
+    last = int(rows[0]["lastValue"])
+    return [f"{prefix}-{day}-{sequence:03d}" for sequence in range(last - count + 1, last + 1)]
+
+async def allocate_document_number(db, document_type: str) -> str:
+    """Reserve the next number for a document type"""
+    return (await allocate_document_numbers(db, document_type))[0]
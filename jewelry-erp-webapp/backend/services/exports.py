@@ -0,0 +1,90 @@
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, List, Optional
+from datetime import datetime
+import csv
+import io
+import orjson
+
+from pagination import seek_where, keyset_order
+from serialization import encode_model
+
+# Rows fetched per keyset batch; memory use is bounded by one batch
+EXPORT_BATCH_SIZE = 1000
+
+# Output is flushed to the client in chunks of about this size
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+async def iter_rows(model, where_clause: dict, sort_field: str, include: Optional[dict] = None) -> AsyncIterator:
+    """Yield every matching row in (sort_field, id) order, one keyset batch at a time"""
+    where = where_clause
+    while True:
+        rows = await model.find_many(
+            where=where,
+            take=EXPORT_BATCH_SIZE,
+            include=include,
+            order=keyset_order(sort_field, descending=False)
+        )
+        for row in rows:
+            yield row
+        if len(rows) < EXPORT_BATCH_SIZE:
+            return
+        last = rows[-1]
+        where = seek_where(where_clause, sort_field, getattr(last, sort_field), last.id, descending=False)
+
+def _column_value(row, column: str):
+    # Dotted columns such as "karigar.name" read through an included relation
+    value = row
+    for part in column.split("."):
+        value = getattr(value, part, None) if value is not None else None
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, list):
+        return ";".join(str(item) for item in value)
+    return value
+
+async def _ndjson_chunks(rows: AsyncIterator) -> AsyncIterator[bytes]:
+    buffer = bytearray()
+    async for row in rows:
+        buffer += orjson.dumps(row, default=encode_model)
+        buffer += b"\n"
+        if len(buffer) >= EXPORT_CHUNK_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+async def _csv_chunks(rows: AsyncIterator, columns: List[str]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for row in rows:
+        writer.writerow([_column_value(row, column) for column in columns])
+        if buffer.tell() >= EXPORT_CHUNK_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+def export_response(
+    model,
+    where_clause: dict,
+    sort_field: str,
+    export_format: str,
+    columns: List[str],
+    filename: str,
+    include: Optional[dict] = None
+) -> StreamingResponse:
+    """Stream a whole filtered table as NDJSON (full rows) or CSV (the given columns)"""
+    rows = iter_rows(model, where_clause, sort_field, include)
+    if export_format == "csv":
+        body = _csv_chunks(rows, columns)
+        media_type = "text/csv"
+    else:
+        body = _ndjson_chunks(rows)
+        media_type = "application/x-ndjson"
+    
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'}
+    )
@@ -0,0 +1,69 @@
+from fastapi import HTTPException
+from typing import Optional
+
+# Receipts may exceed the issued net weight by up to 1%
+RECEIPT_TOLERANCE = 1.01
+
+def issue_status(issue_net: float, received_net: float) -> str:
+    """Issue status for the net weight received against it so far"""
+    if abs(received_net) < 0.001:
+        return "Pending"
+    if abs(received_net - issue_net) < 0.001:
+        return "Completed"
+    return "Partial"
+
+async def lock_issue(transaction, issue_id: str) -> Optional[dict]:
+    """Lock an issue row until the transaction ends and return its received totals"""
+    rows = await transaction.query_raw(
+        'SELECT id, "karigarId", "netWeight", "receivedNet", "receivedGross", "receivedWastage" '
+        'FROM issues WHERE id = $1 FOR UPDATE',
+        issue_id
+    )
+    return rows[0] if rows else None
+
+async def lock_receipt(transaction, receipt_id: str):
+    """Lock a receipt row until the transaction ends and return it as it now stands"""
+    rows = await transaction.query_raw('SELECT id FROM receipts WHERE id = $1 FOR UPDATE', receipt_id)
+    if not rows:
+        return None
+    # Read after the lock, so a concurrent update has already committed
+    return await transaction.receipt.find_unique(where={"id": receipt_id})
+
+def check_receipt_tolerance(issue: dict, received_net: float, net_weight: float):
+    """Reject a receipt that would take the issue over its tolerance"""
+    if received_net + net_weight > issue["netWeight"] * RECEIPT_TOLERANCE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Receipt amount exceeds issue amount. "
+                   f"Issue: {issue['netWeight']}g, "
+                   f"Already received: {received_net}g, "
+                   f"Trying to receive: {net_weight}g"
+        )
+
+async def adjust_issue_received(
+    transaction,
+    issue: dict,
+    gross_delta: float,
+    net_delta: float,
+    wastage_delta: float,
+    check_tolerance: bool = True
+):
+    """Add deltas to a locked issue's received totals and refresh its status"""
+    if check_tolerance and net_delta > 0:
+        check_receipt_tolerance(issue, issue["receivedNet"], net_delta)
+    
+    received_net = issue["receivedNet"] + net_delta
+    await transaction.issue.update(
+        where={"id": issue["id"]},
+        data={
+            "receivedNet": {"increment": net_delta},
+            "receivedGross": {"increment": gross_delta},
+            "receivedWastage": {"increment": wastage_delta},
+            "status": issue_status(issue["netWeight"], received_net)
+        }
+    )
+    
+    # Keep the locked snapshot current for further adjustments in this transaction
+    issue["receivedNet"] = received_net
+    issue["receivedGross"] += gross_delta
+    issue["receivedWastage"] += wastage_delta
@@ -0,0 +1,90 @@
+from typing import List, Optional
+from datetime import datetime
+
+from services.stock_ledger import as_utc
+
+# Issued minus received minus wastage per (karigar, process) in one statement.
+# Receipts are attributed to the karigar and process of the issue they settle.
+BALANCES_SQL = '''
+WITH issued AS (
+    SELECT "karigarId", "processId",
+           SUM("netWeight") AS issued_net, SUM("grossWeight") AS issued_gross
+    FROM issues
+    WHERE "issueDate" <= $1::timestamp {issue_filter}
+    GROUP BY "karigarId", "processId"
+), received AS (
+    SELECT i."karigarId", i."processId",
+           SUM(r."netWeight") AS received_net, SUM(r."grossWeight") AS received_gross,
+           SUM(r."wastageWeight") AS wastage
+    FROM receipts r
+    JOIN issues i ON i.id = r."issueId"
+    WHERE r."receiptDate" <= $1::timestamp {receipt_filter}
+    GROUP BY i."karigarId", i."processId"
+)
+SELECT k.id AS "karigarId", k.code AS "karigarCode", k.name AS "karigarName",
+       p.id AS "processId", p.name AS "processName",
+       COALESCE(iss.issued_net, 0) AS issued_net,
+       COALESCE(iss.issued_gross, 0) AS issued_gross,
+       COALESCE(rec.received_net, 0) AS received_net,
+       COALESCE(rec.received_gross, 0) AS received_gross,
+       COALESCE(rec.wastage, 0) AS wastage
+FROM issued iss
+FULL OUTER JOIN received rec
+    ON rec."karigarId" = iss."karigarId" AND rec."processId" = iss."processId"
+JOIN karigars k ON k.id = COALESCE(iss."karigarId", rec."karigarId")
+JOIN processes p ON p.id = COALESCE(iss."processId", rec."processId")
+ORDER BY k.name, p.name
+'''
+
+def _totals(issued_net: float, issued_gross: float, received_net: float, received_gross: float, wastage: float) -> dict:
+    return {
+        "issued_net": issued_net,
+        "issued_gross": issued_gross,
+        "received_net": received_net,
+        "received_gross": received_gross,
+        "wastage": wastage,
+        "outstanding_net": issued_net - received_net - wastage
+    }
+
+async def get_karigar_balances(db, as_of: datetime, karigar_id: Optional[str] = None) -> List[dict]:
+    """Outstanding metal per karigar, broken down by process, as of a date"""
+    params = [as_utc(as_of).replace(tzinfo=None).isoformat()]
+    issue_filter = receipt_filter = ""
+    if karigar_id:
+        params.append(karigar_id)
+        issue_filter = 'AND "karigarId" = $2'
+        receipt_filter = 'AND i."karigarId" = $2'
+    
+    rows = await db.query_raw(
+        BALANCES_SQL.format(issue_filter=issue_filter, receipt_filter=receipt_filter),
+        *params
+    )
+    
+    # Rows arrive ordered by karigar, so fold them into one entry per karigar
+    balances = []
+    for row in rows:
+        if not balances or balances[-1]["karigar_id"] != row["karigarId"]:
+            balances.append({
+                "karigar_id": row["karigarId"],
+                "karigar_code": row["karigarCode"],
+                "karigar_name": row["karigarName"],
+                **_totals(0.0, 0.0, 0.0, 0.0, 0.0),
+                "processes": []
+            })
+        entry = balances[-1]
+        process_totals = _totals(
+            float(row["issued_net"]),
+            float(row["issued_gross"]),
+            float(row["received_net"]),
+            float(row["received_gross"]),
+            float(row["wastage"])
+        )
+        entry["processes"].append({
+            "process_id": row["processId"],
+            "process_name": row["processName"],
+            **process_totals
+        })
+        for key, value in process_totals.items():
+            entry[key] += value
+    
+    return balances
@@ -0,0 +1,140 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+import asyncio
+import os
+import time
+
+from database import db as primary_db
+
+# Master-data tables held in memory: Prisma model accessor and table name
+MASTER_TABLES = {"karigar": "karigars", "process": "processes", "design": "designs"}
+
+# Row count and newest updatedAt of every table, in one round trip. Rows are
+# written by seed scripts and other instances too, so this is what tells a
+# cached copy it is out of date.
+MASTER_STAMPS_SQL = "\nUNION ALL\n".join(
+    f"SELECT '{model}' AS model, COUNT(*) AS total, "
+    f'(EXTRACT(EPOCH FROM MAX("updatedAt")) * 1000)::bigint AS "latestMs" FROM {table}'
+    for model, table in MASTER_TABLES.items()
+)
+
+class MasterDataCache:
+    """In-process cache of karigars, processes and designs.
+    
+    Tables are loaded together, in name order, and stamped with a version
+    that changes on every reload or invalidation. Lookups by id trust the
+    loaded rows for ttl seconds. Full lists first compare each table's row
+    count and newest updatedAt with the database and reload on a change, so
+    a list and its ETag are current on every instance however the rows were
+    written; the stamp is the same everywhere and serves as the validator.
+    """
+    
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._tables: Dict[str, Dict[str, object]] = {model: {} for model in MASTER_TABLES}
+        self._stamps: Dict[str, str] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+    
+    def _is_fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl
+    
+    @staticmethod
+    async def _read_stamps(db) -> Dict[str, str]:
+        rows = await db.query_raw(MASTER_STAMPS_SQL)
+        return {row["model"]: f"{row['total']}-{row['latestMs'] or 0}" for row in rows}
+    
+    async def warm(self, db, stamps: Optional[Dict[str, str]] = None):
+        """Load every master-data table, ordered by name as the lists are served"""
+        # Stamped before loading: a write in between only causes another reload
+        stamps = stamps or await self._read_stamps(db)
+        karigars, processes, designs = await asyncio.gather(
+            db.karigar.find_many(order={"name": "asc"}),
+            db.process.find_many(order={"name": "asc"}),
+            db.design.find_many(order={"name": "asc"})
+        )
+        self._tables = {
+            "karigar": {k.id: k for k in karigars},
+            "process": {p.id: p for p in processes},
+            "design": {d.id: d for d in designs}
+        }
+        self._stamps = stamps
+        self._loaded_at = time.monotonic()
+        self.version += 1
+    
+    async def _reload(self, stamps: Optional[Dict[str, str]] = None):
+        self.misses += 1
+        # Always from the primary: a load from a lagging replica would be
+        # served to every request for the whole TTL
+        await self.warm(primary_db, stamps)
+    
+    async def _ensure_fresh(self, db):
+        if self._is_fresh():
+            return
+        async with self._lock:
+            # Another request may have reloaded while this one waited
+            if not self._is_fresh():
+                await self._reload()
+    
+    async def _ensure_current(self):
+        # Read from the primary too, to compare like with like
+        stamps = await self._read_stamps(primary_db)
+        if stamps == self._stamps and self._loaded_at is not None:
+            return
+        async with self._lock:
+            if stamps != self._stamps or self._loaded_at is None:
+                await self._reload(stamps)
+    
+    def invalidate(self):
+        """Drop the loaded tables so the next read reloads them"""
+        self._loaded_at = None
+        self._stamps = {}
+        self.version += 1
+    
+    async def get(self, db, model: str, record_id: str):
+        """Get one record by id, falling back to the database for unknown ids"""
+        return (await self.get_many(db, model, [record_id])).get(record_id)
+    
+    async def get_many(self, db, model: str, record_ids: Iterable[str]) -> Dict[str, object]:
+        """Get records by id; ids missing from the cache are fetched in one query"""
+        await self._ensure_fresh(db)
+        table = self._tables[model]
+        found = {}
+        missing = []
+        for record_id in set(record_ids):
+            if record_id in table:
+                found[record_id] = table[record_id]
+            else:
+                missing.append(record_id)
+        
+        self.hits += len(found)
+        if missing:
+            # Created by another instance since the last load
+            self.misses += len(missing)
+            records = await getattr(db, model).find_many(where={"id": {"in": missing}})
+            for record in records:
+                table[record.id] = record
+                found[record.id] = record
+        return found
+    
+    async def list_all(self, db, model: str) -> Tuple[str, List[object]]:
+        """Entity tag and all records, by name, of a table as it is in the database now"""
+        await self._ensure_current()
+        self.hits += 1
+        return f'"{model}-{self._stamps[model]}"', list(self._tables[model].values())
+    
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "fresh": self._is_fresh(),
+            "sizes": {model: len(table) for model, table in self._tables.items()}
+        }
+
+# Shared cache used by the routers
+master_data = MasterDataCache(ttl=float(os.getenv("MASTER_DATA_CACHE_TTL", "300")))
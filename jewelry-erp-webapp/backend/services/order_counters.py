@@ -0,0 +1,102 @@
+from typing import Dict, List, Optional, Tuple
+
+# A counter bucket is keyed by (status, location, urgencyLevel)
+Bucket = Tuple[str, str, str]
+
+async def lock_order_bucket(transaction, order_id: str) -> Optional[Bucket]:
+    """Lock an order row for the rest of the transaction and return its counter bucket"""
+    rows = await transaction.query_raw(
+        'SELECT "currentStatus", "currentLocation", "urgencyLevel" '
+        'FROM orders WHERE id = $1 FOR UPDATE',
+        order_id
+    )
+    if not rows:
+        return None
+    row = rows[0]
+    return (row["currentStatus"], row["currentLocation"], row["urgencyLevel"])
+
+async def lock_order_buckets(transaction, column: str, values: List[str]) -> List[dict]:
+    """Lock every order whose id or bagNo is in values; rows carry their bucket"""
+    if column not in ("id", "bagNo"):
+        raise ValueError(f"Cannot select orders by {column}")
+    if not values:
+        return []
+    keys = sorted(set(values))
+    placeholders = ", ".join(f"${n}" for n in range(1, len(keys) + 1))
+    # Locking in id order keeps concurrent batches from deadlocking
+    return await transaction.query_raw(
+        'SELECT id, "orderNo", "bagNo", "currentStatus", "currentLocation", "urgencyLevel", "currentKarigarId" '
+        f'FROM orders WHERE "{column}" IN ({placeholders}) ORDER BY id FOR UPDATE',
+        *keys
+    )
+
+async def adjust_order_counter(transaction, bucket: Bucket, delta: int):
+    """Add delta to a counter bucket, creating the bucket if needed"""
+    # Single-statement upsert so concurrent writers never race on bucket creation
+    status, location, urgency_level = bucket
+    await transaction.execute_raw(
+        'INSERT INTO order_status_counters ("status", "location", "urgencyLevel", "count", "updatedAt") '
+        'VALUES ($1, $2, $3, $4, NOW()) '
+        'ON CONFLICT ("status", "location", "urgencyLevel") '
+        'DO UPDATE SET "count" = order_status_counters."count" + EXCLUDED."count", "updatedAt" = NOW()',
+        status, location, urgency_level, delta
+    )
+
+async def move_order_counter(transaction, old_bucket: Bucket, new_bucket: Bucket):
+    """Move one order from old_bucket to new_bucket"""
+    if old_bucket == new_bucket:
+        return
+    await adjust_order_counter(transaction, old_bucket, -1)
+    await adjust_order_counter(transaction, new_bucket, 1)
+
+async def move_order_counters(transaction, moves: List[Tuple[Bucket, Bucket]]):
+    """Apply many single-order moves with one upsert per affected bucket"""
+    deltas: Dict[Bucket, int] = {}
+    for old_bucket, new_bucket in moves:
+        if old_bucket == new_bucket:
+            continue
+        deltas[old_bucket] = deltas.get(old_bucket, 0) - 1
+        deltas[new_bucket] = deltas.get(new_bucket, 0) + 1
+    # Fixed bucket order keeps concurrent writers from deadlocking on counter rows
+    for bucket in sorted(deltas):
+        if deltas[bucket]:
+            await adjust_order_counter(transaction, bucket, deltas[bucket])
+
+async def get_order_counters(db) -> List:
+    """Read all non-empty counter buckets"""
+    return await db.orderstatuscounter.find_many(where={"count": {"gt": 0}})
+
+async def rebuild_order_counters(db) -> int:
+    """Recompute every counter bucket from the orders table"""
+    async with db.tx() as transaction:
+        # Writers adjust counters inside their own transactions, so holding this
+        # lock until commit keeps the rebuilt snapshot consistent with them
+        await transaction.execute_raw("LOCK TABLE order_status_counters IN EXCLUSIVE MODE")
+        await transaction.orderstatuscounter.delete_many()
+        
+        groups = await transaction.order.group_by(
+            by=["currentStatus", "currentLocation", "urgencyLevel"],
+            count=True
+        )
+        if groups:
+            await transaction.orderstatuscounter.create_many(
+                data=[
+                    {
+                        "status": group["currentStatus"],
+                        "location": group["currentLocation"],
+                        "urgencyLevel": group["urgencyLevel"],
+                        "count": group["_count"]["_all"]
+                    }
+                    for group in groups
+                ]
+            )
+    
+    return len(groups)
+
+async def ensure_order_counters(db) -> bool:
+    """Build the counters if the table is empty but orders exist; True if rebuilt"""
+    # Deployments that predate the counters start with an empty table
+    if await db.orderstatuscounter.find_first() or not await db.order.find_first():
+        return False
+    await rebuild_order_counters(db)
+    return True
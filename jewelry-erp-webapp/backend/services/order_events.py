@@ -0,0 +1,101 @@
+from typing import Dict, Optional, Set
+from datetime import datetime, timezone
+import asyncio
+import itertools
+import os
+
+class OrderSubscription:
+    """One client's view of the feed: its filters and a bounded queue.
+    
+    A filter matches on either side of a change, so a client watching the
+    factory also hears about orders leaving it. When the queue is full the
+    client has fallen behind; its pending events are dropped and replaced by
+    a single "resync" event telling it to reload, which keeps a slow reader
+    from holding memory or slowing the publisher.
+    """
+    
+    def __init__(self, max_queue: int, location: Optional[str] = None, karigar_id: Optional[str] = None, status: Optional[str] = None):
+        self.location = location
+        self.karigar_id = karigar_id
+        self.status = status
+        self.dropped = 0
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+    
+    def matches(self, event: dict) -> bool:
+        if self.location and self.location not in (event.get("location"), event.get("previousLocation")):
+            return False
+        if self.karigar_id and self.karigar_id not in (event.get("karigarId"), event.get("previousKarigarId")):
+            return False
+        if self.status and self.status not in (event.get("status"), event.get("previousStatus")):
+            return False
+        return True
+    
+    def offer(self, event: dict):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"type": "resync", "id": event["id"], "at": event["at"]})
+
+class OrderEventBroker:
+    """In-process fan-out of order changes to SSE subscribers.
+    
+    publish() never awaits: it hands each event to every matching
+    subscription's queue and returns, so a write request is not slowed by
+    its listeners. Subscribers only see events from the process they are
+    connected to.
+    """
+    
+    def __init__(self, max_queue: int):
+        self.max_queue = max_queue
+        self.published = 0
+        self._subscriptions: Set[OrderSubscription] = set()
+        self._ids = itertools.count(1)
+    
+    def subscribe(self, **filters) -> OrderSubscription:
+        subscription = OrderSubscription(self.max_queue, **filters)
+        self._subscriptions.add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: OrderSubscription):
+        self._subscriptions.discard(subscription)
+    
+    def publish(self, event_type: str, order, previous: Optional[dict] = None):
+        """Queue an event for an order after its change has committed.
+        
+        order is a Prisma Order or a dict with the same field names;
+        previous holds the status, location and karigarId it moved from.
+        """
+        fields = order if isinstance(order, dict) else order.__dict__
+        previous = previous or {}
+        event = {
+            "id": next(self._ids),
+            "type": event_type,
+            "at": datetime.now(timezone.utc).isoformat(),
+            "orderId": fields["id"],
+            "orderNo": fields.get("orderNo"),
+            "bagNo": fields.get("bagNo"),
+            "status": fields.get("currentStatus"),
+            "location": fields.get("currentLocation"),
+            "karigarId": fields.get("currentKarigarId"),
+            "processId": fields.get("currentProcessId"),
+            "urgencyLevel": fields.get("urgencyLevel"),
+            "previousStatus": previous.get("status"),
+            "previousLocation": previous.get("location"),
+            "previousKarigarId": previous.get("karigarId")
+        }
+        self.published += 1
+        for subscription in self._subscriptions:
+            if subscription.matches(event):
+                subscription.offer(event)
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "subscribers": len(self._subscriptions),
+            "published": self.published,
+            "dropped": sum(subscription.dropped for subscription in self._subscriptions)
+        }
+
+order_events = OrderEventBroker(max_queue=int(os.getenv("ORDER_EVENTS_QUEUE_SIZE", "100")))
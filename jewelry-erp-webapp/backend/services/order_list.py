@@ -0,0 +1,57 @@
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timezone
+
+from pagination import decode_cursor, encode_cursor
+from services.order_search import SEARCH_FILTER_COLUMNS, like_pattern
+from services.stock_ledger import as_utc
+
+async def select_order_columns(
+    db,
+    columns: List[str],
+    filters: Dict[str, Optional[str]],
+    search: Optional[str],
+    cursor: Optional[str],
+    offset: int,
+    limit: int
+) -> Tuple[List[dict], Optional[str]]:
+    """One page of orders, newest first, reading only the given columns.
+    
+    Prisma always selects every column of a model; this is the list path
+    for fields= requests. Filters, search and the (createdAt, id) keyset
+    match the Prisma query in get_orders. Returns the rows and the cursor
+    of the next page.
+    """
+    params = []
+    conditions = []
+    for key, column in SEARCH_FILTER_COLUMNS.items():
+        value = filters.get(key)
+        if value:
+            params.append(value)
+            conditions.append(f'"{column}" = ${len(params)}')
+    if search:
+        params.append(like_pattern(search))
+        conditions.append(
+            f'("orderNo" ILIKE ${len(params)} OR "clientName" ILIKE ${len(params)} '
+            f'OR "description" ILIKE ${len(params)})'
+        )
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        params.extend([as_utc(created_at).replace(tzinfo=None).isoformat(), row_id])
+        conditions.append(f'("createdAt", id) < (${len(params) - 1}::timestamp, ${len(params)})')
+    
+    select = ", ".join(f'"{column}"' for column in columns)
+    where = f'WHERE {" AND ".join(conditions)} ' if conditions else ""
+    # The cursor's createdAt comes back as epoch milliseconds, the column's precision
+    rows = await db.query_raw(
+        f'SELECT {select}, '
+        '(EXTRACT(EPOCH FROM "createdAt") * 1000)::bigint AS "cursorMs" '
+        f'FROM orders {where}'
+        f'ORDER BY "createdAt" DESC, id DESC LIMIT {int(limit) + 1} OFFSET {int(offset)}',
+        *params
+    )
+    
+    after = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        after = encode_cursor(datetime.fromtimestamp(int(last["cursorMs"]) / 1000, timezone.utc), last["id"])
+    return [{column: row[column] for column in columns} for row in rows[:limit]], after
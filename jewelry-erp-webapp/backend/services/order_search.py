@@ -0,0 +1,59 @@
+from typing import Dict, List, Optional, Tuple
+
+# Query parameters accepted by the search endpoint, mapped to order columns
+SEARCH_FILTER_COLUMNS = {
+    "status": "currentStatus",
+    "location": "currentLocation",
+    "client_category": "clientCategory",
+    "urgency_level": "urgencyLevel"
+}
+
+def like_pattern(term: str) -> str:
+    """Build an ILIKE pattern matching term anywhere, with wildcards escaped"""
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+async def search_order_ids(db, term: str, filters: Dict[str, Optional[str]], limit: int) -> List[Tuple[str, float]]:
+    """Return (id, rank) pairs for orders matching term, best match first"""
+    # Every predicate on the text columns is served by the trigram indexes
+    # from migrations/001_order_search.sql
+    params = [term, like_pattern(term)]
+    conditions = [
+        '("orderNo" ILIKE $2 OR "clientName" ILIKE $2 OR "description" ILIKE $2 '
+        'OR $1 <% "clientName" OR $1 <% "description")'
+    ]
+    for key, column in SEARCH_FILTER_COLUMNS.items():
+        value = filters.get(key)
+        if value:
+            params.append(value)
+            conditions.append(f'"{column}" = ${len(params)}')
+    
+    rows = await db.query_raw(
+        'SELECT id, GREATEST('
+        'similarity("orderNo", $1), '
+        'word_similarity($1, "clientName"), '
+        'word_similarity($1, coalesce("description", \'\'))'
+        ') AS rank '
+        f'FROM orders WHERE {" AND ".join(conditions)} '
+        f'ORDER BY rank DESC, "createdAt" DESC LIMIT {int(limit)}',
+        *params
+    )
+    return [(row["id"], float(row["rank"])) for row in rows]
+
+async def search_orders(db, term: str, filters: Dict[str, Optional[str]], limit: int) -> List:
+    """Ranked order search returning full orders with their current karigar/process"""
+    ranked = await search_order_ids(db, term, filters, limit)
+    if not ranked:
+        return []
+    
+    orders = await db.order.find_many(
+        where={"id": {"in": [order_id for order_id, _ in ranked]}},
+        include={
+            "currentKarigar": True,
+            "currentProcess": True
+        }
+    )
+    
+    # Restore rank order
+    by_id = {order.id: order for order in orders}
+    return [by_id[order_id] for order_id, _ in ranked if order_id in by_id]
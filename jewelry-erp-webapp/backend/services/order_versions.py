@@ -0,0 +1,38 @@
+from typing import Optional, Tuple
+from datetime import datetime, timezone
+
+# Everything the order detail embeds, folded into one version in one round
+# trip without reading the embedded rows: the order row; the newest status
+# history entry, found through (orderId, statusDate, id) since history is
+# append-only and written with its order; the count and newest change of
+# the job cards through (orderId, updatedAt); and a count and newest change
+# of the karigar and process tables. Those cover the whole (small, rarely
+# written) tables rather than the rows this order points at, so a master
+# data edit revalidates every order.
+ORDER_VERSION_SQL = '''
+SELECT
+    md5(concat_ws('|', o."updatedAt", h.id, j.total, j.latest, k.total, k.latest, p.total, p.latest)) AS version,
+    (EXTRACT(EPOCH FROM GREATEST(o."updatedAt", h."statusDate", j.latest, k.latest, p.latest)) * 1000)::bigint AS "lastModifiedMs"
+FROM orders o
+LEFT JOIN LATERAL (
+    SELECT id, "statusDate" FROM order_status_history
+    WHERE "orderId" = o.id
+    ORDER BY "statusDate" DESC, id DESC
+    LIMIT 1
+) h ON TRUE
+CROSS JOIN LATERAL (
+    SELECT COUNT(*) AS total, MAX("updatedAt") AS latest
+    FROM job_cards WHERE "orderId" = o.id
+) j
+CROSS JOIN (SELECT COUNT(*) AS total, MAX("updatedAt") AS latest FROM karigars) k
+CROSS JOIN (SELECT COUNT(*) AS total, MAX("updatedAt") AS latest FROM processes) p
+WHERE o.id = $1
+'''
+
+async def get_order_version(db, order_id: str) -> Optional[Tuple[str, datetime]]:
+    """Weak ETag and Last-Modified of an order's detail, or None if it does not exist"""
+    rows = await db.query_raw(ORDER_VERSION_SQL, order_id)
+    if not rows:
+        return None
+    last_modified = datetime.fromtimestamp(int(rows[0]["lastModifiedMs"]) / 1000, timezone.utc)
+    return f'W/"{order_id}-{rows[0]["version"]}"', last_modified
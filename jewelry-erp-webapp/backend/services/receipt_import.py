@@ -0,0 +1,121 @@
+from typing import Dict, List, Optional, Tuple
+from pydantic import ValidationError
+import csv
+import io
+
+from schemas.receipt import ReceiptImportRow
+from services.issue_receipts import RECEIPT_TOLERANCE, issue_status
+
+# Upper bound on rows per import request
+MAX_IMPORT_ROWS = 5000
+
+def parse_csv_rows(text: str) -> List[dict]:
+    """Read a CSV sheet with ReceiptImportRow column names; blank cells use defaults"""
+    reader = csv.DictReader(io.StringIO(text))
+    return [
+        {key.strip(): value for key, value in record.items() if key and value not in (None, "")}
+        for record in reader
+    ]
+
+def validate_rows(records: List[dict]) -> Tuple[List[Tuple[int, ReceiptImportRow]], Dict[int, str]]:
+    """Validate raw records into rows, collecting per-row schema errors"""
+    rows = []
+    errors = {}
+    for index, record in enumerate(records):
+        try:
+            rows.append((index, ReceiptImportRow(**record)))
+        except ValidationError as e:
+            errors[index] = "; ".join(
+                f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors()
+            )
+    return rows, errors
+
+async def load_issues(db, issue_ids: List[str], lock: bool = False) -> Dict[str, dict]:
+    """Load issues with their received totals in one query, optionally locking them"""
+    if not issue_ids:
+        return {}
+    ids = sorted(set(issue_ids))
+    placeholders = ", ".join(f"${n}" for n in range(1, len(ids) + 1))
+    # Locking in id order keeps concurrent imports from deadlocking
+    rows = await db.query_raw(
+        'SELECT id, "karigarId", "netWeight", "receivedNet", "receivedGross", "receivedWastage" '
+        f'FROM issues WHERE id IN ({placeholders}) ORDER BY id'
+        + (' FOR UPDATE' if lock else ''),
+        *ids
+    )
+    return {row["id"]: row for row in rows}
+
+def plan_import(
+    rows: List[Tuple[int, ReceiptImportRow]],
+    issues: Dict[str, dict],
+    taken_receipt_nos: set
+) -> Tuple[List[Tuple[int, ReceiptImportRow, float]], Dict[int, str], Dict[str, dict]]:
+    """Check every row against its issue, accumulating rows that share an issue.
+    
+    Returns the accepted (index, row, net weight) triples, errors by row index
+    and the received-total deltas per issue.
+    """
+    accepted = []
+    errors = {}
+    deltas = {}
+    for index, row in rows:
+        issue = issues.get(row.issue_id)
+        if not issue:
+            errors[index] = "Issue not found"
+            continue
+        if row.receipt_no and row.receipt_no in taken_receipt_nos:
+            errors[index] = "Receipt number already exists"
+            continue
+        
+        net_weight = row.gross_weight - row.stone_weight - row.wastage_weight
+        delta = deltas.setdefault(row.issue_id, {"gross": 0.0, "net": 0.0, "wastage": 0.0})
+        received_net = issue["receivedNet"] + delta["net"]
+        if received_net + net_weight > issue["netWeight"] * RECEIPT_TOLERANCE:
+            errors[index] = (
+                f"Receipt amount exceeds issue amount. "
+                f"Issue: {issue['netWeight']}g, "
+                f"Already received: {received_net}g, "
+                f"Trying to receive: {net_weight}g"
+            )
+            continue
+        
+        delta["gross"] += row.gross_weight
+        delta["net"] += net_weight
+        delta["wastage"] += row.wastage_weight
+        if row.receipt_no:
+            taken_receipt_nos.add(row.receipt_no)
+        accepted.append((index, row, net_weight))
+    
+    # Drop issues whose every row was rejected
+    deltas = {issue_id: d for issue_id, d in deltas.items() if d["gross"] or d["net"] or d["wastage"]}
+    return accepted, errors, deltas
+
+async def apply_issue_deltas(transaction, issues: Dict[str, dict], deltas: Dict[str, dict]):
+    """Add received-total deltas and new statuses to many issues in one statement"""
+    if not deltas:
+        return
+    values = []
+    params = []
+    for issue_id, delta in deltas.items():
+        issue = issues[issue_id]
+        n = len(params)
+        values.append(f"(${n + 1}, ${n + 2}::float8, ${n + 3}::float8, ${n + 4}::float8, ${n + 5})")
+        params.extend([
+            issue_id,
+            delta["gross"],
+            delta["net"],
+            delta["wastage"],
+            issue_status(issue["netWeight"], issue["receivedNet"] + delta["net"])
+        ])
+    
+    await transaction.execute_raw(
+        'UPDATE issues AS i SET '
+        '"receivedGross" = i."receivedGross" + v.gross, '
+        '"receivedNet" = i."receivedNet" + v.net, '
+        '"receivedWastage" = i."receivedWastage" + v.wastage, '
+        '"status" = v.status, '
+        '"updatedAt" = NOW() '
+        f'FROM (VALUES {", ".join(values)}) AS v(id, gross, net, wastage, status) '
+        'WHERE i.id = v.id',
+        *params
+    )
@@ -0,0 +1,206 @@
+from typing import List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+
+def as_utc(value: datetime) -> datetime:
+    """Normalise a datetime to aware UTC; naive values are stored as UTC by Prisma"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def snapshot_boundary(now: Optional[datetime] = None) -> datetime:
+    """Snapshots are taken at UTC midnight"""
+    now = as_utc(now or datetime.now(timezone.utc))
+    return now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+async def sum_entries(db, start: Optional[datetime], end: datetime, include_end: bool = True) -> Tuple[float, float]:
+    """Net (in - out) gross and net weight of register entries dated in [start, end]"""
+    date_filter = {"lte" if include_end else "lt": end}
+    if start is not None:
+        date_filter["gte"] = start
+    
+    groups = await db.stockregister.group_by(
+        by=["transactionType"],
+        where={"transactionDate": date_filter},
+        sum={
+            "grossWeightIn": True,
+            "grossWeightOut": True,
+            "netWeightIn": True,
+            "netWeightOut": True
+        }
+    )
+    
+    gross = 0.0
+    net = 0.0
+    for group in groups:
+        totals = group["_sum"]
+        gross += (totals["grossWeightIn"] or 0) - (totals["grossWeightOut"] or 0)
+        net += (totals["netWeightIn"] or 0) - (totals["netWeightOut"] or 0)
+    return gross, net
+
+async def _take_snapshot(transaction, boundary: datetime):
+    """Write the snapshot at boundary from the previous snapshot plus the entries since"""
+    previous = await transaction.stocksnapshot.find_first(
+        where={"snapshotDate": {"lt": boundary}},
+        order={"snapshotDate": "desc"}
+    )
+    start = previous.snapshotDate if previous else None
+    gross, net = await sum_entries(transaction, start, boundary, include_end=False)
+    if previous:
+        gross += previous.balanceGross
+        net += previous.balanceNet
+    
+    await transaction.stocksnapshot.upsert(
+        where={"snapshotDate": boundary},
+        data={
+            "create": {"snapshotDate": boundary, "balanceGross": gross, "balanceNet": net},
+            "update": {"balanceGross": gross, "balanceNet": net}
+        }
+    )
+    await transaction.stockbalance.update(
+        where={"id": 1},
+        data={"snapshotThrough": boundary}
+    )
+
+def stock_entry(
+    transaction_type: str,
+    transaction_id: str,
+    transaction_date: datetime,
+    gross_in: float = 0,
+    gross_out: float = 0,
+    net_in: float = 0,
+    net_out: float = 0
+) -> dict:
+    """Build a register entry for append_stock_entries"""
+    return {
+        "transactionType": transaction_type,
+        "transactionId": transaction_id,
+        "transactionDate": transaction_date,
+        "grossWeightIn": gross_in,
+        "grossWeightOut": gross_out,
+        "netWeightIn": net_in,
+        "netWeightOut": net_out
+    }
+
+async def append_stock_entries(transaction, entries: List[dict]):
+    """Append register entries with their running balances; call inside a transaction.
+    
+    Every ledger write, for any issue or receipt, updates the one
+    stock_balance row and holds its lock until the transaction commits, so
+    stock writes across the whole system run one at a time. That is what
+    keeps the running balances in order. To keep the wait short, make this
+    the last statement of the transaction, after any checks that can fail.
+    """
+    if not entries:
+        return
+    
+    deltas = [
+        (e["grossWeightIn"] - e["grossWeightOut"], e["netWeightIn"] - e["netWeightOut"])
+        for e in entries
+    ]
+    
+    # The single-row upsert takes a row lock held until commit, so concurrent
+    # ledger writes are applied one after another and balances never interleave
+    rows = await transaction.query_raw(
+        'INSERT INTO stock_balance (id, "balanceGross", "balanceNet", "updatedAt") '
+        'VALUES (1, $1, $2, NOW()) '
+        'ON CONFLICT (id) DO UPDATE SET '
+        '"balanceGross" = stock_balance."balanceGross" + EXCLUDED."balanceGross", '
+        '"balanceNet" = stock_balance."balanceNet" + EXCLUDED."balanceNet", '
+        '"updatedAt" = NOW() '
+        'RETURNING "balanceGross", "balanceNet", '
+        'EXTRACT(EPOCH FROM "snapshotThrough")::float8 AS "snapshotThrough"',
+        sum(gross for gross, _ in deltas),
+        sum(net for _, net in deltas)
+    )
+    balance = rows[0]
+    snapshot_through = (
+        datetime.fromtimestamp(balance["snapshotThrough"], tz=timezone.utc)
+        if balance["snapshotThrough"] is not None else None
+    )
+    
+    # Running balances step forward from the total before this batch
+    running_gross = balance["balanceGross"] - sum(gross for gross, _ in deltas)
+    running_net = balance["balanceNet"] - sum(net for _, net in deltas)
+    data = []
+    for entry, (gross_delta, net_delta) in zip(entries, deltas):
+        running_gross += gross_delta
+        running_net += net_delta
+        data.append({**entry, "balanceGross": running_gross, "balanceNet": running_net})
+        
+        # A back-dated entry also belongs in every snapshot taken after its date
+        if snapshot_through is not None and as_utc(entry["transactionDate"]) < snapshot_through:
+            await transaction.stocksnapshot.update_many(
+                where={"snapshotDate": {"gt": entry["transactionDate"]}},
+                data={
+                    "balanceGross": {"increment": gross_delta},
+                    "balanceNet": {"increment": net_delta}
+                }
+            )
+    
+    await transaction.stockregister.create_many(data=data)
+    
+    # First write of a new day checkpoints the balance at midnight
+    boundary = snapshot_boundary()
+    if snapshot_through is None or snapshot_through < boundary:
+        await _take_snapshot(transaction, boundary)
+
+async def append_stock_entry(transaction, *args, **kwargs):
+    """Append a single register entry; takes the arguments of stock_entry"""
+    await append_stock_entries(transaction, [stock_entry(*args, **kwargs)])
+
+async def get_stock_balance(db, as_of: datetime) -> dict:
+    """Stock in hand as of a date: nearest snapshot plus the entries after it"""
+    snapshot = await db.stocksnapshot.find_first(
+        where={"snapshotDate": {"lte": as_of}},
+        order={"snapshotDate": "desc"}
+    )
+    start = snapshot.snapshotDate if snapshot else None
+    gross, net = await sum_entries(db, start, as_of)
+    if snapshot:
+        gross += snapshot.balanceGross
+        net += snapshot.balanceNet
+    
+    return {
+        "as_of": as_of,
+        "balance_gross": gross,
+        "balance_net": net,
+        "snapshot_date": start
+    }
+
+async def ensure_stock_ledger(db) -> bool:
+    """Rebuild the ledger if register entries exist without a balance row; True if rebuilt"""
+    # Deployments that predate the running balances have entries but no
+    # stock_balance row, and their entries carry zero balances
+    if await db.stockbalance.find_unique(where={"id": 1}) or not await db.stockregister.find_first():
+        return False
+    await rebuild_stock_ledger(db)
+    return True
+
+async def rebuild_stock_ledger(db) -> int:
+    """Recompute running balances, totals and snapshots from the register entries"""
+    async with db.tx() as transaction:
+        # Block ledger writers until the rebuilt balances are committed
+        await transaction.execute_raw("LOCK TABLE stock_balance IN EXCLUSIVE MODE")
+        
+        updated = await transaction.execute_raw(
+            'UPDATE stock_register s SET "balanceGross" = r.gross, "balanceNet" = r.net '
+            'FROM ('
+            'SELECT id, '
+            'SUM("grossWeightIn" - "grossWeightOut") OVER (ORDER BY "createdAt", id) AS gross, '
+            'SUM("netWeightIn" - "netWeightOut") OVER (ORDER BY "createdAt", id) AS net '
+            'FROM stock_register'
+            ') r WHERE s.id = r.id'
+        )
+        await transaction.execute_raw(
+            'INSERT INTO stock_balance (id, "balanceGross", "balanceNet", "snapshotThrough", "updatedAt") '
+            'SELECT 1, COALESCE(SUM("grossWeightIn" - "grossWeightOut"), 0), '
+            'COALESCE(SUM("netWeightIn" - "netWeightOut"), 0), NULL, NOW() '
+            'FROM stock_register '
+            'ON CONFLICT (id) DO UPDATE SET '
+            '"balanceGross" = EXCLUDED."balanceGross", "balanceNet" = EXCLUDED."balanceNet", '
+            '"snapshotThrough" = NULL, "updatedAt" = NOW()'
+        )
+        await transaction.stocksnapshot.delete_many()
+        await _take_snapshot(transaction, snapshot_boundary())
+    
+    return updated
@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Database tests write issues, receipts and stock entries, so they only run
+# against a database set aside for them. database.py reads DATABASE_URL when
+# it is first imported, so point it there before any test imports it.
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+    os.environ.pop("DIRECT_URL", None)
+    os.environ.pop("DATABASE_REPLICA_URL", None)
+
+@pytest.fixture
+def database_url() -> str:
+    """Skips the test unless TEST_DATABASE_URL names a disposable database"""
+    if not TEST_DATABASE_URL:
+        pytest.skip("Set TEST_DATABASE_URL to a disposable, migrated database to run")
+    pytest.importorskip("prisma")
+    return TEST_DATABASE_URL
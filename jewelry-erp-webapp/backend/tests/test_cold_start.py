@@ -0,0 +1,74 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+API_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "api")
+
+# Run in a fresh interpreter: argv[1] is the api directory, argv[2] the path
+# requested first. FastAPI is imported before the clock starts, so the
+# import time is what the entry itself adds. Prints one JSON line.
+COLD_START_PROBE = """
+import asyncio, json, sys, time
+import fastapi.responses, httpx
+started = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+import index
+imported = time.perf_counter()
+APP_PACKAGES = ("prisma", "database", "routers", "services")
+loaded_on_import = sorted(name for name in sys.modules if name.split(".")[0] in APP_PACKAGES)
+
+async def first_request():
+    transport = httpx.ASGITransport(app=index.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://serverless") as client:
+        started = time.perf_counter()
+        response = await client.get(sys.argv[2])
+        return response.status_code, time.perf_counter() - started
+
+status, elapsed = asyncio.run(first_request())
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "first_request_ms": elapsed * 1000,
+    "status": status,
+    "loaded_on_import": loaded_on_import,
+    "prisma_loaded": "prisma" in sys.modules
+}))
+"""
+
+RUNS = 3
+IMPORT_BUDGET_MS = 250
+FIRST_REQUEST_BUDGET_MS = 3000
+
+# A cheap read that still loads a router and touches the database
+DB_PATH = "/api/orders/?page_size=1&count=none"
+
+def cold_start(path: str) -> dict:
+    probe = subprocess.run(
+        [sys.executable, "-c", COLD_START_PROBE, API_DIR, path],
+        capture_output=True, text=True
+    )
+    assert probe.returncode == 0, probe.stderr
+    # Earlier lines are the app's own connection logs
+    return json.loads(probe.stdout.strip().splitlines()[-1])
+
+def test_import_loads_no_router_or_database():
+    runs = [cold_start("/api") for _ in range(RUNS)]
+    
+    for run in runs:
+        assert run["loaded_on_import"] == []
+        assert run["status"] == 200
+        # /api needs no router, so Prisma is still not loaded after it
+        assert not run["prisma_loaded"]
+    import_ms = statistics.median(run["import_ms"] for run in runs)
+    assert import_ms < IMPORT_BUDGET_MS, f"api/index.py took {import_ms:.0f}ms to import"
+
+def test_order_feed_is_not_served():
+    assert cold_start("/api/orders/events")["status"] == 501
+
+def test_first_request_connects_within_budget(database_url):
+    runs = [cold_start(DB_PATH) for _ in range(RUNS)]
+    
+    assert [run["status"] for run in runs] == [200] * RUNS
+    first_request_ms = statistics.median(run["first_request_ms"] for run in runs)
+    assert first_request_ms < FIRST_REQUEST_BUDGET_MS, f"first request took {first_request_ms:.0f}ms"
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+import asyncio
+import json
+
+from pydantic import BaseModel
+
+from services.exports import EXPORT_BATCH_SIZE, EXPORT_CHUNK_SIZE, _csv_chunks, _ndjson_chunks, iter_rows
+
+ROWS = 5000
+
+class Row(BaseModel):
+    id: str
+    orderNo: str
+    createdAt: datetime
+    notes: str
+
+def make_rows(count: int):
+    started = datetime(2026, 1, 1)
+    return [
+        Row(id=f"row-{n:06d}", orderNo=f"ORD-{n:06d}", createdAt=started + timedelta(seconds=n), notes="x" * 100)
+        for n in range(count)
+    ]
+
+async def each(rows):
+    for row in rows:
+        yield row
+
+async def collect(chunks):
+    return [chunk async for chunk in chunks]
+
+class FakeModel:
+    """find_many over a list, honouring take and the keyset where of iter_rows"""
+    
+    def __init__(self, rows):
+        self.rows = rows
+        self.takes = []
+    
+    async def find_many(self, where, take, include, order):
+        self.takes.append(take)
+        rows = self.rows
+        if where:
+            seek = where["OR"]
+            after_value = seek[0]["createdAt"]["gt"]
+            after_id = seek[1]["id"]["gt"]
+            rows = [row for row in rows if (row.createdAt, row.id) > (after_value, after_id)]
+        return rows[:take]
+
+def test_ndjson_is_flushed_in_bounded_chunks():
+    rows = make_rows(ROWS)
+    chunks = asyncio.run(collect(_ndjson_chunks(each(rows))))
+    
+    longest_line = max(len(line) + 1 for line in b"".join(chunks).splitlines())
+    # One chunk per EXPORT_CHUNK_SIZE, not one per row, and never much more than that
+    assert len(chunks) <= len(b"".join(chunks)) // EXPORT_CHUNK_SIZE + 1
+    for chunk in chunks[:-1]:
+        assert EXPORT_CHUNK_SIZE <= len(chunk) < EXPORT_CHUNK_SIZE + longest_line
+        assert chunk.endswith(b"\n")
+    
+    lines = b"".join(chunks).splitlines()
+    assert len(lines) == ROWS
+    assert json.loads(lines[0])["orderNo"] == "ORD-000000"
+    assert json.loads(lines[-1])["id"] == rows[-1].id
+
+def test_ndjson_of_no_rows_is_empty():
+    assert asyncio.run(collect(_ndjson_chunks(each([])))) == []
+
+def test_csv_is_flushed_in_bounded_chunks():
+    rows = make_rows(ROWS)
+    chunks = asyncio.run(collect(_csv_chunks(each(rows), ["orderNo", "createdAt"])))
+    
+    assert len(chunks) <= len(b"".join(chunks)) // EXPORT_CHUNK_SIZE + 1
+    lines = b"".join(chunks).decode().splitlines()
+    assert lines[0] == "orderNo,createdAt"
+    assert len(lines) == ROWS + 1
+    assert lines[1] == f"ORD-000000,{rows[0].createdAt.isoformat()}"
+
+def test_rows_are_read_one_batch_at_a_time():
+    rows = make_rows(EXPORT_BATCH_SIZE * 2 + 10)
+    model = FakeModel(rows)
+    
+    read = asyncio.run(collect(iter_rows(model, {}, "createdAt")))
+    
+    assert [row.id for row in read] == [row.id for row in rows]
+    assert model.takes == [EXPORT_BATCH_SIZE] * 3
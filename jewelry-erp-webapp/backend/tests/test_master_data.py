@@ -0,0 +1,35 @@
+from datetime import datetime
+import asyncio
+
+import httpx
+
+async def list_before_and_after_outside_write():
+    """List karigars, add one straight to the database, then list them again"""
+    from database import connect_db, disconnect_db, db
+    from main import app
+    
+    run = f"{datetime.now():%Y%m%d%H%M%S%f}"
+    await connect_db(replica=False)
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            before = await client.get("/api/karigars/", params={"active": "false"})
+            # As a seed script or another instance would, bypassing this app
+            await db.karigar.create(data={"code": f"CACHE-{run}", "name": f"Cache check {run}", "active": False})
+            revalidated = await client.get(
+                "/api/karigars/",
+                params={"active": "false"},
+                headers={"If-None-Match": before.headers["ETag"]}
+            )
+            after = await client.get("/api/karigars/", params={"active": "false"})
+        return run, before, revalidated, after
+    finally:
+        await disconnect_db()
+
+def test_lists_and_etags_follow_writes_made_elsewhere(database_url):
+    run, before, revalidated, after = asyncio.run(list_before_and_after_outside_write())
+    
+    assert before.status_code == 200
+    assert revalidated.status_code == 200
+    assert after.headers["ETag"] != before.headers["ETag"]
+    assert f"CACHE-{run}" in [karigar["code"] for karigar in after.json()]
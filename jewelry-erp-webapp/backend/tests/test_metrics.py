@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+import httpx
+from fastapi import APIRouter, FastAPI
+
+from metrics import MetricsMiddleware, http_requests
+from query_stats import QueryStatsMiddleware
+
+# Generous for a shared CI machine; recording takes a few microseconds
+OVERHEAD_BUDGET_US = 100
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+    router = APIRouter()
+    
+    @router.get("/{order_id}/history/{entry_id}")
+    async def history_entry(order_id: str, entry_id: str):
+        return {}
+    
+    @router.get("/{order_id}")
+    async def order(order_id: str):
+        return {}
+    
+    app.include_router(router, prefix="/orders")
+    app.add_middleware(MetricsMiddleware)
+    return app
+
+def routes_requested(*paths: str):
+    async def request_all():
+        transport = httpx.ASGITransport(app=make_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for path in paths:
+                await client.get(path)
+    
+    before = dict(http_requests.values)
+    asyncio.run(request_all())
+    return {labels for labels, count in http_requests.values.items() if count != before.get(labels)}
+
+def test_route_label_is_the_matched_template():
+    # Equal parameter values used to be put back in the wrong place
+    assert routes_requested("/orders/1/history/1", "/orders/history") == {
+        ("GET", "/orders/{order_id}/history/{entry_id}", "200"),
+        ("GET", "/orders/{order_id}", "200")
+    }
+
+def test_unmatched_paths_share_one_label():
+    assert routes_requested("/nowhere/1", "/nowhere/2") == {("GET", "unmatched", "404")}
+
+def test_metrics_overhead_per_request():
+    class Route:
+        path_format = "/api/orders/{order_id}"
+    
+    async def endpoint(scope, receive, send):
+        scope["endpoint"] = endpoint
+        scope["route"] = Route
+        scope["path_params"] = {"order_id": "ord-1"}
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": b"{}"})
+    
+    async def receive():
+        return {"type": "http.request", "body": b""}
+    
+    async def send(message):
+        pass
+    
+    async def per_request(app, iterations: int = 20000) -> float:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            await app({"type": "http", "method": "GET", "path": "/api/orders/ord-1"}, receive, send)
+        return (time.perf_counter() - started) / iterations * 1e6
+    
+    async def overhead() -> float:
+        instrumented = MetricsMiddleware(QueryStatsMiddleware(endpoint))
+        await per_request(instrumented)
+        return await per_request(instrumented) - await per_request(endpoint)
+    
+    overhead_us = asyncio.run(overhead())
+    assert overhead_us < OVERHEAD_BUDGET_US, f"metrics add {overhead_us:.1f}us per request"
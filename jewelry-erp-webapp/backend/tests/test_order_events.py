@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+from services.order_events import OrderEventBroker
+
+SUBSCRIBERS = 1000
+LOCATIONS = [None, "FACTORY", "HEAD_OFFICE", "KARIGAR"]
+
+# Generous for a shared CI machine; a publish to 1k streams takes a few ms
+DELIVERY_BUDGET_MS = 250
+PUBLISH_BUDGET_US = 5000
+
+ORDER = {
+    "id": "ord-1", "orderNo": "ORD-20260101-001", "bagNo": None,
+    "currentStatus": "IN_PRODUCTION", "currentLocation": "FACTORY",
+    "currentKarigarId": None, "currentProcessId": None, "urgencyLevel": "NORMAL"
+}
+# A move from the head office to the factory matches every filter but KARIGAR
+PREVIOUS = {"status": "RECEIVED", "location": "HEAD_OFFICE", "karigarId": None}
+
+def subscribe_all(broker):
+    return [broker.subscribe(location=LOCATIONS[n % len(LOCATIONS)]) for n in range(SUBSCRIBERS)]
+
+def test_one_publish_reaches_every_matching_stream():
+    async def fan_out():
+        broker = OrderEventBroker(max_queue=10)
+        subscriptions = subscribe_all(broker)
+        matching = [subscription for subscription in subscriptions if subscription.location != "KARIGAR"]
+        waiting = [asyncio.create_task(subscription.queue.get()) for subscription in matching]
+        await asyncio.sleep(0)
+        started = time.perf_counter()
+        broker.publish("status", ORDER, PREVIOUS)
+        received = await asyncio.gather(*waiting)
+        return subscriptions, matching, received, (time.perf_counter() - started) * 1000
+    
+    subscriptions, matching, received, delivery_ms = asyncio.run(fan_out())
+    
+    assert len(matching) == SUBSCRIBERS * 3 // 4
+    assert len(received) == len(matching)
+    assert all(event["type"] == "status" and event["orderId"] == "ord-1" for event in received)
+    assert all(subscription.queue.empty() for subscription in subscriptions)
+    assert delivery_ms < DELIVERY_BUDGET_MS, f"delivery to {len(matching)} streams took {delivery_ms:.1f}ms"
+
+def test_publish_with_idle_readers_stays_within_the_queue_bound():
+    async def publish(events):
+        broker = OrderEventBroker(max_queue=events + 1)
+        subscriptions = subscribe_all(broker)
+        started = time.perf_counter()
+        for _ in range(events):
+            broker.publish("status", ORDER, PREVIOUS)
+        return broker, subscriptions, (time.perf_counter() - started) / events * 1e6
+    
+    broker, subscriptions, publish_us = asyncio.run(publish(50))
+    
+    for subscription in subscriptions:
+        expected = 0 if subscription.location == "KARIGAR" else 50
+        assert subscription.queue.qsize() == expected
+    assert broker.stats() == {"subscribers": SUBSCRIBERS, "published": 50, "dropped": 0}
+    assert publish_us < PUBLISH_BUDGET_US, f"publish took {publish_us:.0f}us per event"
+
+def test_stream_that_falls_behind_keeps_a_single_resync_event():
+    async def fall_behind():
+        broker = OrderEventBroker(max_queue=10)
+        subscriptions = [broker.subscribe() for _ in range(SUBSCRIBERS)]
+        for _ in range(25):
+            broker.publish("status", ORDER, PREVIOUS)
+        return broker, subscriptions
+    
+    broker, subscriptions = asyncio.run(fall_behind())
+    
+    for subscription in subscriptions:
+        assert subscription.queue.qsize() <= broker.max_queue
+        assert subscription.queue.get_nowait()["type"] == "resync"
+    assert broker.stats()["dropped"] > 0
+
+def test_unsubscribed_stream_gets_nothing():
+    async def publish_after_unsubscribe():
+        broker = OrderEventBroker(max_queue=10)
+        subscription = broker.subscribe()
+        broker.unsubscribe(subscription)
+        broker.publish("status", ORDER, PREVIOUS)
+        return broker, subscription
+    
+    broker, subscription = asyncio.run(publish_after_unsubscribe())
+    
+    assert subscription.queue.empty()
+    assert broker.stats()["subscribers"] == 0
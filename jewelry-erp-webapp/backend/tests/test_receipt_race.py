@@ -0,0 +1,69 @@
+from datetime import datetime
+import asyncio
+
+import httpx
+
+ISSUE_NET = 48.0
+RECEIPT_NET = 2.0
+POSTS = 50
+
+async def post_receipts_at_once():
+    """Create an issue, then post POSTS equal receipts against it concurrently"""
+    from database import connect_db, disconnect_db, db
+    from main import app
+    
+    run = f"{datetime.now():%Y%m%d%H%M%S%f}"
+    await connect_db(replica=False)
+    try:
+        karigar = await db.karigar.create(data={"code": f"RACE-{run}", "name": "Receipt race"})
+        process = await db.process.create(data={"name": f"Receipt race {run}"})
+        
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=60) as client:
+            response = await client.post("/api/issues/", json={
+                "karigar_id": karigar.id,
+                "process_id": process.id,
+                "pieces": POSTS,
+                "gross_weight": ISSUE_NET,
+                "stone_weight": 0.0,
+                "net_weight": ISSUE_NET
+            })
+            assert response.status_code == 200, response.text
+            issue_id = response.json()["id"]
+            
+            responses = await asyncio.gather(*(
+                client.post("/api/receipts/", json={
+                    "issue_id": issue_id,
+                    "pieces": 1,
+                    "gross_weight": RECEIPT_NET,
+                    "stone_weight": 0.0,
+                    "wastage_weight": 0.0
+                })
+                for _ in range(POSTS)
+            ))
+        
+        issue = await db.issue.find_unique(where={"id": issue_id})
+        receipts = await db.receipt.find_many(where={"issueId": issue_id})
+        entries = await db.stockregister.count(
+            where={"transactionType": "Receipt", "transactionId": {"in": [receipt.id for receipt in receipts]}}
+        )
+        return [response.status_code for response in responses], issue, receipts, entries
+    finally:
+        await disconnect_db()
+
+def test_concurrent_receipts_never_over_receive(database_url):
+    from services.issue_receipts import RECEIPT_TOLERANCE
+    
+    statuses, issue, receipts, entries = asyncio.run(post_receipts_at_once())
+    
+    limit = ISSUE_NET * RECEIPT_TOLERANCE
+    # The lots are equal, so exactly this many fit under the tolerance
+    expected = int(limit / RECEIPT_NET + 1e-9)
+    accepted = statuses.count(200)
+    
+    assert issue.receivedNet <= limit + 1e-6
+    assert accepted == expected
+    assert statuses.count(400) == POSTS - expected
+    assert len(receipts) == accepted
+    assert abs(sum(receipt.netWeight for receipt in receipts) - issue.receivedNet) < 1e-6
+    assert entries == accepted
@@ -31,9 +31,12 @@ const OrdersPage: React.FC = () => {
   const router = useRouter();
   const [orders, setOrders] = useState<Order[]>([]);
   const [loading, setLoading] = useState(true);
-  const [totalOrders, setTotalOrders] = useState(0);
+  const [totalOrders, setTotalOrders] = useState<number | null>(0);
+  const [totalIsEstimate, setTotalIsEstimate] = useState(false);
   const [currentPage, setCurrentPage] = useState(1);
-  const [totalPages, setTotalPages] = useState(1);
+  // null when the API skipped the count; hasMore then drives the Next button
+  const [totalPages, setTotalPages] = useState<number | null>(1);
+  const [hasMore, setHasMore] = useState(false);
   const [pageSize] = useState(12);
 
   // Filters
@@ -67,7 +70,9 @@ const OrdersPage: React.FC = () => {
       const data = await orderApi.getAll(params);
       setOrders(data.orders);
       setTotalOrders(data.total);
+      setTotalIsEstimate(!!data.totalIsEstimate);
       setTotalPages(data.totalPages);
+      setHasMore(!!data.nextCursor);
     } catch (error) {
       toast.error('Failed to fetch orders');
       console.error('Error fetching orders:', error);
@@ -243,7 +248,9 @@ const OrdersPage: React.FC = () => {
 
         <div className="flex justify-between items-center mt-4">
           <div className="text-sm text-gray-600">
-            {totalOrders} total orders
+            {totalOrders === null
+              ? `Showing page ${currentPage}`
+              : `${totalIsEstimate ? '~' : ''}${totalOrders} total orders`}
             {(searchTerm || statusFilter || locationFilter || categoryFilter || urgencyFilter) && (
               <span> • {orders.length} filtered results</span>
             )}
@@ -302,7 +309,7 @@ const OrdersPage: React.FC = () => {
       )}
 
       {/* Pagination */}
-      {totalPages > 1 && (
+      {((totalPages ?? 0) > 1 || (totalPages === null && (currentPage > 1 || hasMore))) && (
         <div className="flex justify-center items-center mt-8 gap-2">
           <Button
             variant="outline"
@@ -314,7 +321,10 @@ const OrdersPage: React.FC = () => {
           </Button>
 
           <div className="flex gap-1">
-            {[...Array(totalPages)].map((_, i) => {
+            {totalPages === null && (
+              <span className="px-2 text-sm">Page {currentPage}</span>
+            )}
+            {totalPages !== null && [...Array(totalPages)].map((_, i) => {
               const page = i + 1;
               const isVisible = 
                 page === 1 ||
@@ -345,7 +355,7 @@ const OrdersPage: React.FC = () => {
             variant="outline"
             size="sm"
             onClick={() => handlePageChange(currentPage + 1)}
-            disabled={currentPage === totalPages}
+            disabled={totalPages === null ? !hasMore : currentPage === totalPages}
           >
             <ChevronRightIcon className="h-4 w-4" />
           </Button>
@@ -1,6 +1,6 @@
 import axios from 'axios'
 import { CreateIssueData, CreateReceiptData, Issue, Receipt, Karigar, Process, Design } from '@/types'
-import { OrderCreate, OrderUpdate, OrderStatusUpdate, Order, OrderListResponse, OrderDashboard } from '@/types/orders'
+import { OrderCreate, OrderUpdate, OrderStatusUpdate, OrderStatusBatchUpdate, OrderStatusBatchResponse, OrderEvent, Order, OrderListResponse, OrderDashboard } from '@/types/orders'
 
 const api = axios.create({
   baseURL: process.env.NODE_ENV === 'production' 
@@ -9,6 +9,8 @@ const api = axios.create({
   headers: {
     'Content-Type': 'application/json',
   },
+  // Sends the cookie that keeps reads on the primary right after a write
+  withCredentials: true,
 })
 
 // Issue API
@@ -18,7 +20,7 @@ export const issueApi = {
     return response.data
   },
 
-  getAll: async (params?: { skip?: number; limit?: number; status?: string; karigar_id?: string }): Promise<Issue[]> => {
+  getAll: async (params?: { skip?: number; limit?: number; status?: string; karigar_id?: string; fields?: string; expand?: string }): Promise<Issue[]> => {
     const response = await api.get('/issues/', { params })
     return response.data
   },
@@ -29,7 +31,7 @@ export const issueApi = {
   },
 
   generateNumber: async (): Promise<{ issue_number: string }> => {
-    const response = await api.get('/issues/generate/number')
+    const response = await api.post('/issues/generate/number')
     return response.data
   },
 
@@ -46,7 +48,7 @@ export const receiptApi = {
     return response.data
   },
 
-  getAll: async (params?: { skip?: number; limit?: number; issue_id?: string; karigar_id?: string }): Promise<Receipt[]> => {
+  getAll: async (params?: { skip?: number; limit?: number; issue_id?: string; karigar_id?: string; fields?: string; expand?: string }): Promise<Receipt[]> => {
     const response = await api.get('/receipts/', { params })
     return response.data
   },
@@ -57,7 +59,7 @@ export const receiptApi = {
   },
 
   generateNumber: async (): Promise<{ receipt_number: string }> => {
-    const response = await api.get('/receipts/generate/number')
+    const response = await api.post('/receipts/generate/number')
     return response.data
   },
 
@@ -111,6 +113,10 @@ export const orderApi = {
     client_category?: string; 
     urgency_level?: string; 
     search?: string; 
+    cursor?: string; 
+    count?: 'exact' | 'estimate' | 'none'; 
+    fields?: string; 
+    expand?: string; 
   }): Promise<OrderListResponse> => {
     const response = await api.get('/orders/', { params })
     return response.data
@@ -131,13 +137,18 @@ export const orderApi = {
     return response.data
   },
 
+  updateStatusBatch: async (data: OrderStatusBatchUpdate): Promise<OrderStatusBatchResponse> => {
+    const response = await api.post('/orders/status/batch', data)
+    return response.data
+  },
+
   delete: async (id: string): Promise<{ message: string }> => {
     const response = await api.delete(`/orders/${id}`)
     return response.data
   },
 
   generateNumber: async (): Promise<{ orderNo: string }> => {
-    const response = await api.get('/orders/generate/number')
+    const response = await api.post('/orders/generate/number')
     return response.data
   },
 
@@ -150,6 +161,23 @@ export const orderApi = {
     const response = await api.get('/orders/dashboard/stats')
     return response.data
   },
+
+  // Live order changes; a 'resync' event means events were dropped and the
+  // caller should reload. Returns a function that closes the stream.
+  subscribe: (
+    params: { location?: string; karigar_id?: string; status?: string },
+    onEvent: (event: OrderEvent) => void
+  ): (() => void) => {
+    const query = new URLSearchParams(
+      Object.entries(params).filter(([, value]) => value) as [string, string][]
+    )
+    const source = new EventSource(`${api.defaults.baseURL}/orders/events?${query}`)
+    const types: OrderEvent['type'][] = ['created', 'updated', 'status', 'deleted', 'resync']
+    types.forEach((type) => {
+      source.addEventListener(type, (message) => onEvent(JSON.parse((message as MessageEvent).data)))
+    })
+    return () => source.close()
+  },
 }
 
 export default api
\ No newline at end of file
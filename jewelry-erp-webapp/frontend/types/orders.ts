@@ -172,12 +172,52 @@ export interface OrderStatusUpdate {
   estimatedCompletion?: string;
 }
 
+export interface OrderStatusBatchUpdate extends OrderStatusUpdate {
+  orderIds?: string[];
+  bagNos?: string[];
+}
+
+export interface OrderStatusBatchResult {
+  key: string;
+  success: boolean;
+  orderId?: string;
+  orderNo?: string;
+  previousStatus?: string;
+  error?: string;
+}
+
+export interface OrderStatusBatchResponse {
+  updated: number;
+  failed: number;
+  results: OrderStatusBatchResult[];
+}
+
+export interface OrderEvent {
+  id: number;
+  type: 'created' | 'updated' | 'status' | 'deleted' | 'resync';
+  at: string;
+  orderId?: string;
+  orderNo?: string;
+  bagNo?: string;
+  status?: string;
+  location?: string;
+  karigarId?: string;
+  processId?: string;
+  urgencyLevel?: string;
+  previousStatus?: string;
+  previousLocation?: string;
+  previousKarigarId?: string;
+}
+
 export interface OrderListResponse {
   orders: Order[];
-  total: number;
+  // null when the list was requested with count=none, or count=estimate with filters
+  total: number | null;
   page: number;
   pageSize: number;
-  totalPages: number;
+  totalPages: number | null;
+  totalIsEstimate?: boolean;
+  nextCursor?: string | null;
 }
 
 export interface OrderStatusStats {